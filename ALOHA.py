@@ -1,40 +1,35 @@
-import struct
 import time
 import random
 import pmt
-import json
-from queue import Queue
 from gnuradio import gr
+from FrameCodec import (build_frame_array, parse_frame_flags, split_priority, view_slots, rx_masks, BROADCAST_MAC, ACK_PAYLOAD,
+                        pack_aggregate, unpack_aggregate, is_aggregate, aggregate_size, MAX_RECORDS,
+                        pack_arq, is_arq, unpack_arq, pack_arq_ack, is_arq_ack, unpack_arq_ack, arq_acked,
+                        seq_diff, SEQ_MODULO, ACK_BITMAP_BITS, FLAG_ARQ, FLAG_ARQ_ACK, FLAG_AGGREGATE, FLAG_BLOCK_ACK,
+                        pack_block_ack, is_block_ack, find_block_ack, MAX_BLOCK_ACK_ENTRIES)
+from EventScheduler import RealTimeScheduler
+from SlotClock import SlotClock
+from TxQueue import TxQueue, TAIL_DROP
+from AppMessage import parse_app_pmt, to_u8vector, u8vector_bytes
+from MacMetrics import MacMetrics
+from Tracer import (Tracer, EV_ENQUEUE, EV_DROP, EV_TX, EV_TIMEOUT, EV_BACKOFF, EV_ACK, EV_FAIL,
+                    EV_RX, EV_ACK_SENT, EV_DUPLICATE)
+from DuplicateCache import DuplicateCache
 
-def build_frame(src_mac, dst_mac, priority, data):
-    """
-    Construit la trame MAC :
-      - src_mac: 6 octets
-      - dst_mac: 6 octets
-      - priority: 1 octet (0 ou 1)
-      - length: 2 octets (taille des données)
-      - data: N octets
-    """
-    # s = string (bytes), B = unsigned char, H = unsigned short
-    length = len(data)
-    fmt_header = "!IIBH"  # ! = réseau (big-endian)
-    header = struct.pack(fmt_header, src_mac, dst_mac, priority, length)
-    print(header)
-    return header + data
-
-def parse_frame(frame_bytes):
-    """
-    Décode une trame MAC.
-    Retourne (src_mac, dst_mac, priority, data).
-    """
-    fmt_header = "!IIBH"
-    header_size = struct.calcsize(fmt_header)
-    header = frame_bytes[:header_size]
-    data = frame_bytes[header_size:]
+class ArqEntry:
+    """ Trame en vol dans la fenêtre ARQ, avec son propre état de retransmission """
+    __slots__ = ("dst", "seq", "pmt", "records", "retries", "state", "deadline", "event", "gen")
 
-    src_mac, dst_mac, priority, length = struct.unpack(fmt_header, header)
-    payload = data[:length]
-    return src_mac, dst_mac, priority, payload
+    def __init__(self, dst, seq, frame_pmt, records):
+        self.dst = dst
+        self.seq = seq
+        self.pmt = frame_pmt
+        self.records = records
+        self.retries = 0
+        self.state = "WAIT_ACK"
+        self.deadline = None
+        self.event = None
+        self.gen = None
 
 
 class aloha_mac_block(gr.basic_block):
@@ -46,7 +41,27 @@ class aloha_mac_block(gr.basic_block):
                  mac_addr=1, 
                  ack_timeout=0.1,   # Temps d'attente de l'ACK (ajuster selon la couche PHY)
                  max_retries=3,     # Nombre d'essais max
-                 max_backoff=1.0):  # Temps max d'attente aléatoire après échec
+                 max_backoff=1.0,   # Temps max d'attente aléatoire après échec
+                 event_timers=False, # Échéances armées sur un ordonnanceur au lieu du polling 'clock'
+                 scheduler=None,    # Ordonnanceur à utiliser (partagé par défaut si event_timers)
+                 rng=None,          # Générateur aléatoire (random.Random) pour des tirages reproductibles
+                 rx_slot_size=64,   # Taille d'emplacement des rafales reçues sur phy_batch_in
+                 queue_capacity=64, # Nombre max de paquets en attente
+                 drop_policy=TAIL_DROP, # tail_drop, drop_oldest ou drop_low_priority
+                 dst_mac=BROADCAST_MAC, # Destination par défaut (messages sans dst_mac)
+                 aggregation=False, # Regroupe les payloads d'une même destination dans une trame
+                 max_aggregate_size=255, # Taille max du payload agrégé (octets)
+                 aggregation_delay=0.0, # Attente max pour remplir une trame agrégée (s)
+                 binary_payloads=False, # app_out en PDU (meta, u8vector) au lieu du dict de compatibilité
+                 stats_interval=0.0, # Période (s) de publication sur stats_out, vérifiée à chaque tick (0 = jamais)
+                 tracer=None,       # Traceur d'événements (Tracer ou chemin de fichier partagé)
+                 arq_window=0,      # ARQ à répétition sélective : trames en vol (0 = stop-and-wait)
+                 slot_time=0.0,     # Slotted ALOHA : durée d'un slot (s), >= émission trame + ACK (0 = ALOHA pur)
+                 slot_epoch=0.0,    # Début convenu d'un slot (recalé par le port beacon)
+                 backoff_slots=0,   # Backoff max en slots (0 = déduit de max_backoff)
+                 block_ack_delay=0.0, # Passerelle : ACK regroupés sur cette fenêtre (s) en un block-ACK (0 = un ACK par trame)
+                 dedup_capacity=4096, # Doublons (src, seq) mémorisés en réception (0 = pas de détection)
+                 dedup_ttl=None):   # Oubli d'une entrée non revue depuis dedup_ttl secondes (None = LRU seul)
         gr.basic_block.__init__(
             self,
             name="ALOHA MAC",
@@ -58,70 +73,314 @@ class aloha_mac_block(gr.basic_block):
         self.ack_timeout = ack_timeout
         self.max_retries = max_retries
         self.max_backoff = max_backoff
+        self.rng = rng if rng is not None else random
+        self.rx_slot_size = rx_slot_size
+        self.dst_mac = dst_mac
+        self.aggregation = aggregation
+        self.max_aggregate_size = max_aggregate_size
+        self.aggregation_delay = aggregation_delay
+        self.binary_payloads = binary_payloads
         
         # État interne
         self.state = "IDLE"
         self.current_frame = None
+        self.current_pmt = None  # PMT de la trame courante, réutilisé à chaque retransmission
+        self.current_dst = None
+        self.current_arq_seq = None # Numéro de séquence de la trame courante (unicast)
+        self.current_records = [] # Suivi des paquets portés par la trame courante
         self.retries = 0
         
-        # File d'attente
-        self.tx_queue = Queue() 
+        # Numéros de séquence par destination (fenêtre glissante, ou
+        # stop-and-wait pour la détection des doublons côté récepteur)
+        if arq_window > ACK_BITMAP_BITS:
+            raise ValueError(f"arq_window must be <= {ACK_BITMAP_BITS}")
+        self.arq_window = arq_window
+        self.window = {}      # (dst, seq) -> ArqEntry
+        self.arq_timers = {}  # génération d'échéance -> ArqEntry
+        self.arq_gen = 0
+        self.tx_seq = {}      # dst -> prochain numéro de séquence
+        self.rx_windows = {}  # src -> (base, bitmap) côté réception
+
+        # File d'attente bornée, une FIFO par priorité
+        self.tx_queue = TxQueue(capacity=queue_capacity, policy=drop_policy)
         
         # Timers
         self.timer_start = 0
         self.backoff_duration = 0
+
+        # Ordonnanceur : une seule échéance armée (WAIT_ACK ou BACKOFF), rien à l'état IDLE
+        if scheduler is None and event_timers:
+            scheduler = RealTimeScheduler.shared()
+        self.scheduler = scheduler
+        self.clock = scheduler.now if scheduler is not None else time.time
+        self.timer_event = None
+        self.timer_gen = 0 # Un compteur par type d'échéance : WAIT_ACK/BACKOFF, ARQ, block-ACK
+
+        # Slotted ALOHA : émissions alignées sur les frontières de slots
+        self.slot_clock = SlotClock(slot_time, slot_epoch, self.clock) if slot_time > 0 else None
+        self.backoff_slots = backoff_slots or (max(1, int(round(max_backoff / slot_time))) if slot_time > 0 else 0)
+        self.last_slot = None  # Dernier slot réservé par ce nœud (une trame par slot)
+
+        # Block-ACK : acquittements en attente, par source (ARQ : (base, bitmap), sinon None)
+        if block_ack_delay > 0 and block_ack_delay >= ack_timeout:
+            # L'émetteur aurait déjà retransmis avant le block-ACK
+            raise ValueError(f"block_ack_delay ({block_ack_delay}) must be < ack_timeout ({ack_timeout})")
+        self.block_ack_delay = block_ack_delay
+        self.pending_acks = {}
+        self.block_ack_deadline = None
+        self.block_ack_event = None
+        self.block_ack_gen = 0
+
+        # Réception : doublons des trames numérotées (ARQ), réacquittés sans être remontés
+        # (un recul au-delà de la fenêtre d'ACK signale le redémarrage de la source)
+        self.dedup = DuplicateCache(dedup_capacity, dedup_ttl, self.clock, ACK_BITMAP_BITS) if dedup_capacity > 0 else None
+
+        # Métriques par paquet et par bloc
+        self.mac_metrics = MacMetrics(self.clock)
+        self.stats_interval = stats_interval
+        self.last_stats = self.clock()
+        self.tracer = Tracer.resolve(tracer)
         
         # Ports (Note: Plus de cs_in)
         self.message_port_register_in(pmt.intern("app_in"))
         self.message_port_register_in(pmt.intern("phy_in"))
         self.message_port_register_out(pmt.intern("phy_out"))
         self.message_port_register_out(pmt.intern("app_out"))
+        self.message_port_register_out(pmt.intern("stats_out"))
 
         # Clock
         self.message_port_register_in(pmt.intern("clock"))
         self.set_msg_handler(pmt.intern("clock"), self.general_work)
+
+        # Échéances de l'ordonnanceur, repostées dans le thread du bloc
+        self.message_port_register_in(pmt.intern("timer"))
+        self.set_msg_handler(pmt.intern("timer"), self.handle_timer)
         
         self.set_msg_handler(pmt.intern("app_in"), self.handle_msg_in)
         self.set_msg_handler(pmt.intern("phy_in"), self.handle_phy_in)
 
+        # Réception groupée (passerelle) : rafale de trames à emplacements fixes
+        self.message_port_register_in(pmt.intern("phy_batch_in"))
+        self.set_msg_handler(pmt.intern("phy_batch_in"), self.handle_phy_batch)
+
+        # Balise de synchronisation des slots
+        self.message_port_register_in(pmt.intern("beacon"))
+        self.set_msg_handler(pmt.intern("beacon"), self.handle_beacon)
+
     def handle_msg_in(self, msg_pmt):
         """ Nouvelle donnée à envoyer """
-        # ... (Extraction du JSON identique au script précédent) ...
-        # Pour l'exemple simplifié :
         try:
-            msg_str = pmt.to_python(pmt.cdr(msg_pmt))
-            self.tx_queue.put(msg_str) # On stocke juste le message brut pour simplifier l'exemple
+            # Binaire compact, PDU (meta, u8vector), JSON ou texte brut
+            dst_mac, priority, data = parse_app_pmt(msg_pmt, self.dst_mac)
+            record = self.mac_metrics.new_packet(len(data))
+            self.trace(EV_ENQUEUE, record.seq, len(data))
+            if not self.tx_queue.put((dst_mac, priority, data, record), priority):
+                self.trace(EV_DROP, record.seq)
             
-            if self.state == "IDLE":
+            if self.arq_window:
+                self.fill_window()
+            elif self.state == "IDLE":
+                if self.aggregation and self.aggregation_delay > 0 and not self.aggregate_ready():
+                    # On laisse aux paquets suivants le temps d'arriver
+                    self.state = "AGGREGATE"
+                    self.timer_start = self.clock()
+                    self.arm_timer(self.aggregation_delay)
+                else:
+                    self.process_next_packet()
+            elif self.state == "AGGREGATE" and self.aggregate_ready():
+                self.cancel_timer()
+                self.state = "IDLE"
                 self.process_next_packet()
         except:
             pass
 
+    def aggregate_ready(self):
+        """ Vrai si les paquets en tête de file remplissent déjà une trame agrégée """
+        sizes = []
+        dst_mac = None
+        for dst, _, data, _ in self.tx_queue:
+            if dst_mac is None:
+                dst_mac = dst
+            elif dst != dst_mac:
+                return True # Rien de plus à agréger pour cette destination
+            sizes.append(len(data))
+            if aggregate_size(sizes) >= self.max_aggregate_size or len(sizes) >= MAX_RECORDS:
+                return True
+        return False
+
+    def dequeue_payload(self):
+        """
+        Retire le prochain payload à émettre, agrégé avec les suivants de même
+        destination si l'agrégation est active.
+        Retourne (dst_mac, priority, flags, data, records).
+        """
+        dst_mac, priority, data, record = self.tx_queue.get()
+        records = [record]
+        flags = 0
+
+        if self.aggregation:
+            # Paquets suivants pour la même destination, tant que ça tient
+            payloads = [data]
+            while not self.tx_queue.empty() and len(payloads) < MAX_RECORDS:
+                next_dst, _, next_data, _ = self.tx_queue.peek()
+                if next_dst != dst_mac:
+                    break
+                if aggregate_size([len(p) for p in payloads] + [len(next_data)]) > self.max_aggregate_size:
+                    break
+                _, _, next_data, next_record = self.tx_queue.get()
+                payloads.append(next_data)
+                records.append(next_record)
+            if len(payloads) > 1:
+                data = pack_aggregate(payloads)
+                flags = FLAG_AGGREGATE
+        return dst_mac, priority, flags, data, records
+
     def process_next_packet(self):
         """ Prépare l'envoi """
-        if not self.tx_queue.empty():
-            msg_str = self.tx_queue.get()
-            # Construction fictive de la trame (à adapter avec build_frame)
-            # self.current_frame = build_frame(...) 
-            self.current_frame = bytes(msg_str, 'utf-8') # Simplification
+        if self.arq_window:
+            self.fill_window()
+            return
+        # Boucle plutôt que récursion : un broadcast se termine dès l'envoi
+        while not self.tx_queue.empty():
+            dst_mac, priority, flags, data, self.current_records = self.dequeue_payload()
+
+            self.current_dst = dst_mac
+            self.current_arq_seq = None
+            if dst_mac != BROADCAST_MAC:
+                # Unicast : numéro de séquence, le récepteur écarte les retransmissions déjà reçues
+                self.current_arq_seq = self.take_seq(dst_mac)
+                data = pack_arq(self.current_arq_seq, data)
+                flags |= FLAG_ARQ
+            self.current_frame = build_frame_array(self.mac_addr, dst_mac, priority, data, flags)
+            self.current_pmt = pmt.cons(pmt.intern("frame"), to_u8vector(self.current_frame))
             
             self.retries = 0
+            if self.slot_clock is not None:
+                # Slotted : on attend le début du prochain slot libre
+                self.backoff_duration = self.slot_delay(0)
+                self.timer_start = self.clock()
+                self.state = "BACKOFF"
+                self.arm_timer(self.backoff_duration)
+                return
             self.tx_frame() # DANS ALOHA, ON TIRE DIRECTEMENT !
+            if self.state == "WAIT_ACK":
+                return
+
+    def slot_delay(self, slots):
+        """
+        Délai jusqu'au début du slot situé `slots` slots après le prochain,
+        en sautant ceux déjà réservés par ce nœud. Réserve le slot retenu.
+        """
+        now = self.clock()
+        index = self.slot_clock.next_index(now) + slots
+        if self.last_slot is not None and index <= self.last_slot:
+            index = self.last_slot + 1
+        self.last_slot = index
+        return max(self.slot_clock.boundary(index) - now, 0.0)
+
+    def handle_beacon(self, msg_pmt):
+        """ Balise : début de slot à l'instant porté par le message, sinon à réception """
+        if self.slot_clock is None:
+            return
+        value = pmt.to_python(msg_pmt)
+        self.slot_clock.resync(value if isinstance(value, (int, float)) else None)
+        self.last_slot = None
 
     def tx_frame(self):
         """ Envoi physique """
         # Envoi au PHY
-        self.message_port_pub(pmt.intern("phy_out"), 
-                              pmt.cons(pmt.intern("frame"), 
-                              pmt.to_pmt(self.current_frame)))
+        self.message_port_pub(pmt.intern("phy_out"), self.current_pmt)
+
+        if self.current_dst == BROADCAST_MAC:
+            # Pas d'ACK en broadcast : émission unique, succès dès l'envoi
+            self.mac_metrics.on_tx(self.current_records, self.clock())
+            self.trace(EV_TX, self.current_seq(), 1)
+            self.state = "IDLE"
+            records, self.current_records = self.current_records, []
+            self.current_frame = None
+            self.current_pmt = None
+            self.current_dst = None
+            self.current_arq_seq = None
+            self.publish_tx_status("tx_success", records)
+            return
         
         # On passe en attente d'ACK
         self.state = "WAIT_ACK"
-        self.timer_start = time.time()
+        self.timer_start = self.clock()
+        self.mac_metrics.on_tx(self.current_records, self.timer_start)
+        self.trace(EV_TX, self.current_seq(), self.retries + 1)
+        self.arm_timer(self.ack_timeout)
+
+    def arm_timer(self, delay):
+        """ Arme l'unique échéance courante (remplace la précédente) """
+        if self.scheduler is None:
+            return # Mode polling : general_work surveille l'échéance
+        self.cancel_timer()
+        self.timer_gen += 1
+        self.timer_event = self.scheduler.schedule(delay, self.post_timer, "main", self.timer_gen)
+
+    def cancel_timer(self):
+        if self.timer_event is not None:
+            self.scheduler.cancel(self.timer_event)
+            self.timer_event = None
+
+    def post_timer(self, kind, gen):
+        """ Appelé par l'ordonnanceur à l'échéance """
+        if self.scheduler.threaded:
+            # Thread du timer : on repasse par la file de messages du bloc
+            self._post(pmt.intern("timer"), pmt.cons(pmt.intern(kind), pmt.from_long(gen)))
+        else:
+            self.fire_timer(kind, gen)
+
+    def handle_timer(self, msg_pmt):
+        self.fire_timer(pmt.symbol_to_string(pmt.car(msg_pmt)), pmt.to_long(pmt.cdr(msg_pmt)))
+
+    def fire_timer(self, kind, gen):
+        """ Échéance : timeout d'ACK, fin de backoff, trame ARQ ou block-ACK """
+        if kind == "block_ack":
+            # Périmée si le block-ACK est déjà parti (vidage anticipé) ou réarmé
+            if gen != self.block_ack_gen or self.block_ack_deadline is None:
+                return
+            self.block_ack_event = None
+            self.flush_block_ack()
+            return
+        if kind == "arq":
+            entry = self.arq_timers.pop(gen, None)
+            if entry is not None:
+                entry.event = None
+                self.expire_entry(entry)
+            return
+        if gen != self.timer_gen:
+            return # Échéance périmée (réarmée ou annulée entre-temps)
+        self.timer_event = None
+        if self.state == "AGGREGATE":
+            self.state = "IDLE"
+            self.process_next_packet()
+        elif self.state == "WAIT_ACK":
+            self.handle_tx_failure()
+        elif self.state == "BACKOFF":
+            self.tx_frame()
+            if self.state == "IDLE":
+                self.process_next_packet() # Broadcast : terminé dès l'envoi
 
     def general_work(self, clk):
         """ Machine d'état gérée par l'horloge """
-        now = time.time()
+        now = self.clock()
+        if self.stats_interval > 0 and now - self.last_stats >= self.stats_interval:
+            self.last_stats = now
+            self.publish_stats()
+        if self.scheduler is not None:
+            return # Les échéances sont gérées par l'ordonnanceur
+
+        if self.block_ack_deadline is not None and now >= self.block_ack_deadline:
+            self.flush_block_ack()
+
+        if self.arq_window:
+            # Une échéance par trame en vol
+            for entry in list(self.window.values()):
+                if entry.deadline is not None and now >= entry.deadline:
+                    self.expire_entry(entry)
+            return
         
         if self.state == "WAIT_ACK":
             # Timeout : Pas d'ACK reçu à temps
@@ -132,26 +391,404 @@ class aloha_mac_block(gr.basic_block):
             # On attend un temps aléatoire avant de réessayer
             if (now - self.timer_start) > self.backoff_duration:
                 self.tx_frame() # On réessaie d'envoyer
+                if self.state == "IDLE":
+                    self.process_next_packet() # Broadcast : terminé dès l'envoi
+
+        elif self.state == "AGGREGATE":
+            # Fin du délai d'agrégation : on envoie ce qu'on a
+            if (now - self.timer_start) > self.aggregation_delay:
+                self.state = "IDLE"
+                self.process_next_packet()
 
     def handle_tx_failure(self):
         """ Gestion de l'échec (Collision probable) """
         self.retries += 1
+        self.mac_metrics.on_timeout()
+        self.trace(EV_TIMEOUT, self.current_seq())
         if self.retries < self.max_retries:
-            # On calcule un temps d'attente aléatoire
-            self.backoff_duration = random.uniform(0.1, self.max_backoff)
-            self.timer_start = time.time()
+            # On calcule un temps d'attente aléatoire (en slots entiers si slotted)
+            if self.slot_clock is not None:
+                self.backoff_duration = self.slot_delay(self.rng.randint(1, self.backoff_slots))
+            else:
+                self.backoff_duration = self.rng.uniform(0.1, self.max_backoff)
+            self.timer_start = self.clock()
+            self.mac_metrics.on_backoff(self.current_records, self.timer_start)
+            self.trace(EV_BACKOFF, self.current_seq(), self.backoff_duration)
             self.state = "BACKOFF"
+            self.arm_timer(self.backoff_duration)
             #print(f"Collision/Perte. Nouvel essai dans {self.backoff_duration:.2f}s")
         else:
             # Échec définitif
             self.state = "IDLE"
-            self.message_port_pub(pmt.intern("app_out"), pmt.cons(pmt.intern("tx_failed"), pmt.PMT_NIL))
+            self.mac_metrics.on_fail(self.current_records)
+            self.trace(EV_FAIL, self.current_seq())
+            records, self.current_records = self.current_records, []
+            self.publish_tx_status("tx_failed", records)
             self.process_next_packet()
 
+    # --- ARQ à répétition sélective (arq_window > 0) ---
+
+    def window_open(self, dst_mac):
+        """
+        Vrai si un nouveau numéro peut partir vers dst_mac : la fenêtre n'est
+        pas pleine et l'écart avec la plus ancienne trame en vol reste dans
+        le bitmap d'ACK du récepteur.
+        """
+        if len(self.window) >= self.arq_window:
+            return False
+        next_seq = self.peek_seq(dst_mac)
+        for dst, seq in self.window:
+            if dst == dst_mac and seq_diff(next_seq, seq) >= self.arq_window:
+                return False
+        return True
+
+    def peek_seq(self, dst_mac):
+        """
+        Prochain numéro vers dst_mac. Le premier est tiré au hasard : après un
+        redémarrage, le récepteur ne confond pas la nouvelle session avec des
+        retransmissions de l'ancienne.
+        """
+        if dst_mac not in self.tx_seq:
+            self.tx_seq[dst_mac] = self.rng.randrange(SEQ_MODULO)
+        return self.tx_seq[dst_mac]
+
+    def take_seq(self, dst_mac):
+        seq = self.peek_seq(dst_mac)
+        self.tx_seq[dst_mac] = (seq + 1) % SEQ_MODULO
+        return seq
+
+    def fill_window(self):
+        """ Émet des paquets de la file tant que la fenêtre le permet """
+        while not self.tx_queue.empty() and self.window_open(self.tx_queue.peek()[0]):
+            dst_mac, priority, flags, data, records = self.dequeue_payload()
+            if dst_mac == BROADCAST_MAC:
+                # Pas d'ACK en broadcast : émission unique, hors fenêtre
+                frame = build_frame_array(self.mac_addr, dst_mac, priority, data, flags)
+                self.message_port_pub(pmt.intern("phy_out"), pmt.cons(pmt.intern("frame"), to_u8vector(frame)))
+                self.mac_metrics.on_tx(records)
+                self.publish_tx_status("tx_success", records)
+                continue
+            seq = self.take_seq(dst_mac)
+            frame = build_frame_array(self.mac_addr, dst_mac, priority, pack_arq(seq, data), FLAG_ARQ | flags)
+            entry = ArqEntry(dst_mac, seq, pmt.cons(pmt.intern("frame"), to_u8vector(frame)), records)
+            self.window[(dst_mac, seq)] = entry
+            if self.slot_clock is not None:
+                entry.state = "BACKOFF"
+                self.arm_entry(entry, self.slot_delay(0))
+            else:
+                self.arq_tx(entry)
+
+    def arq_tx(self, entry):
+        """ (Ré)émission d'une trame de la fenêtre """
+        self.message_port_pub(pmt.intern("phy_out"), entry.pmt)
+        entry.state = "WAIT_ACK"
+        self.mac_metrics.on_tx(entry.records)
+        self.trace(EV_TX, entry.records[0].seq, entry.retries + 1)
+        self.arm_entry(entry, self.ack_timeout)
+
+    def arm_entry(self, entry, delay):
+        """ Échéance propre à une trame en vol """
+        self.disarm_entry(entry)
+        entry.deadline = self.clock() + delay
+        if self.scheduler is not None:
+            self.arq_gen += 1
+            entry.gen = self.arq_gen
+            self.arq_timers[entry.gen] = entry
+            entry.event = self.scheduler.schedule(delay, self.post_timer, "arq", entry.gen)
+
+    def disarm_entry(self, entry):
+        entry.deadline = None
+        if entry.event is not None:
+            self.scheduler.cancel(entry.event)
+            entry.event = None
+        self.arq_timers.pop(entry.gen, None)
+
+    def expire_entry(self, entry):
+        """ Échéance d'une trame : timeout d'ACK ou fin de son backoff """
+        entry.deadline = None
+        if entry.state == "WAIT_ACK":
+            self.arq_failure(entry)
+        elif entry.state == "BACKOFF":
+            self.arq_tx(entry)
+
+    def arq_failure(self, entry):
+        """ Même politique que handle_tx_failure, trame par trame """
+        entry.retries += 1
+        self.mac_metrics.on_timeout()
+        self.trace(EV_TIMEOUT, entry.records[0].seq)
+        if entry.retries < self.max_retries:
+            if self.slot_clock is not None:
+                backoff = self.slot_delay(self.rng.randint(1, self.backoff_slots))
+            else:
+                backoff = self.rng.uniform(0.1, self.max_backoff)
+            entry.state = "BACKOFF"
+            self.mac_metrics.on_backoff(entry.records)
+            self.trace(EV_BACKOFF, entry.records[0].seq, backoff)
+            self.arm_entry(entry, backoff)
+        else:
+            del self.window[(entry.dst, entry.seq)]
+            self.mac_metrics.on_fail(entry.records)
+            self.trace(EV_FAIL, entry.records[0].seq)
+            self.publish_tx_status("tx_failed", entry.records)
+            self.fill_window()
+
+    def handle_arq_ack(self, src_mac, cumulative, bitmap):
+        """ ACK cumulatif + sélectif : libère toutes les trames couvertes """
+        if not self.arq_window:
+            # Stop-and-wait : l'ACK doit couvrir la trame courante
+            if self.current_arq_seq is not None and arq_acked(self.current_arq_seq, cumulative, bitmap):
+                self.handle_rx_ack(src_mac)
+            return
+        acked = [entry for (dst, seq), entry in self.window.items()
+                 if dst == src_mac and arq_acked(seq, cumulative, bitmap)]
+        for entry in acked:
+            del self.window[(entry.dst, entry.seq)]
+            self.disarm_entry(entry)
+            self.mac_metrics.on_ack(entry.records)
+            record = entry.records[0]
+            self.trace(EV_ACK, record.seq, record.ack_time - record.enqueue_time)
+            self.publish_tx_status("tx_success", entry.records)
+        if acked:
+            self.fill_window()
+
+    def arq_receive(self, src_mac, seq):
+        """
+        Fenêtre de réception de src_mac : base = plus petit numéro non reçu,
+        bit i du bitmap = base + i reçu. Retourne l'ACK (base, bitmap).
+        """
+        base, bitmap = self.rx_windows.get(src_mac, (seq, 0))
+        d = seq_diff(seq, base)
+        if d < -ACK_BITMAP_BITS:
+            # Loin derrière : l'émetteur a redémarré, nouvelle fenêtre à partir de seq
+            base, bitmap, d = seq, 0, 0
+        elif d >= ACK_BITMAP_BITS:
+            # Trop loin devant : l'émetteur a abandonné des trames, on recale la fenêtre
+            base, bitmap = (seq - ACK_BITMAP_BITS + 1) % SEQ_MODULO, 0
+            d = ACK_BITMAP_BITS - 1
+        if d >= 0:
+            bitmap |= 1 << d
+            while bitmap & 1:
+                bitmap >>= 1
+                base = (base + 1) % SEQ_MODULO
+        self.rx_windows[src_mac] = (base, bitmap)
+        return base, bitmap
+
     def handle_phy_in(self, msg_pmt):
         """ Réception (ACK ou Données) """
-        # ... (Logique de parsing identique) ...
-        # Si c'est un ACK pour moi :
-        #    self.state = "IDLE"
-        #    self.process_next_packet()
-        pass
\ No newline at end of file
+        try:
+            # u8vector -> bytes (copie), puis payload en memoryview sur ces octets
+            frame = u8vector_bytes(pmt.cdr(msg_pmt))
+            src_mac, dst_mac, priority, flags, payload = parse_frame_flags(frame)
+
+            if dst_mac != self.mac_addr and dst_mac != BROADCAST_MAC:
+                return # Pas pour moi
+
+            if not flags and payload == ACK_PAYLOAD:
+                self.handle_rx_ack(src_mac)
+            else:
+                self.handle_rx_data(src_mac, dst_mac, priority, payload, flags)
+        except Exception as e:
+            # Trame mal formée : ignorée
+            print(f"Error in handle_phy_in: {e}")
+
+    def handle_phy_batch(self, msg_pmt):
+        """
+        Réception groupée : un u8vector contenant une rafale de trames à
+        emplacements fixes (rx_slot_size octets). Le filtrage par adresse et
+        la séparation ACK / données sont faits en vectoriel sur les en-têtes ;
+        les trames de données (et les ACK ARQ / block-ACK, qui portent des
+        drapeaux) restent traitées une à une : fenêtre de réception, doublons
+        et ACK dépendent de la trame précédente de la même source.
+        """
+        try:
+            buf = u8vector_bytes(pmt.cdr(msg_pmt))
+            frames = view_slots(buf, self.rx_slot_size)
+        except Exception as e:
+            print(f"Error in handle_phy_batch: {e}")
+            return
+
+        data_mask, ack_mask = rx_masks(frames, self.mac_addr)
+
+        # ACK simples (stop-and-wait) : une seule trame en attente, acquittée par
+        # l'ACK de sa destination, quelle que soit sa place dans la rafale. Les
+        # autres ACK de cette source ne doivent pas acquitter la trame suivante
+        if self.state == "WAIT_ACK" and (ack_mask & (frames["src_mac"] == self.current_dst)).any():
+            self.handle_rx_ack(self.current_dst)
+
+        for i in data_mask.nonzero()[0]:
+            frame = frames[i]
+            payload = frame["payload"][:frame["length"]]
+            priority, flags = split_priority(int(frame["priority"]))
+            try:
+                self.handle_rx_data(int(frame["src_mac"]), int(frame["dst_mac"]), priority, payload, flags)
+            except Exception as e:
+                print(f"Error in handle_phy_batch: {e}")
+
+    def handle_rx_ack(self, src_mac):
+        """ ACK reçu : la trame courante est acquittée """
+        if self.state == "WAIT_ACK" and src_mac == self.current_dst:
+            self.cancel_timer()
+            self.state = "IDLE"
+            self.mac_metrics.on_ack(self.current_records)
+            if self.current_records:
+                record = self.current_records[0]
+                self.trace(EV_ACK, record.seq, record.ack_time - record.enqueue_time)
+            records, self.current_records = self.current_records, []
+            self.current_frame = None
+            self.current_pmt = None
+            self.current_dst = None
+            self.current_arq_seq = None
+            self.publish_tx_status("tx_success", records)
+            self.process_next_packet()
+
+    def handle_rx_data(self, src_mac, dst_mac, priority, payload, flags=0):
+        """ Données reçues : acquittement (si unicast) puis remontée à l'application """
+        if is_arq_ack(flags, payload):
+            if dst_mac == self.mac_addr:
+                self.handle_arq_ack(src_mac, *unpack_arq_ack(payload))
+            return
+        if dst_mac == BROADCAST_MAC and is_block_ack(flags, payload):
+            self.handle_block_ack(src_mac, payload)
+            return
+
+        self.mac_metrics.on_rx(len(payload))
+        self.trace(EV_RX, 0, len(payload))
+        arq_state = None
+        duplicate = False
+        if is_arq(flags):
+            seq, payload = unpack_arq(payload)
+        # Trame agrégée : un message app_out par sous-trame. Décodée avant
+        # l'ACK : si les longueurs sont incohérentes (ValueError), la trame
+        # entière est ignorée sans être acquittée
+        records = unpack_aggregate(payload) if is_aggregate(flags) else [payload]
+        if is_arq(flags) and dst_mac == self.mac_addr:
+            arq_state = self.arq_receive(src_mac, seq)
+            duplicate = self.dedup is not None and self.dedup.seen(src_mac, seq)
+        if dst_mac == self.mac_addr:
+            # Un doublon est réacquitté : l'ACK précédent s'est perdu
+            self.send_ack(src_mac, priority, arq_state)
+        if duplicate:
+            self.mac_metrics.on_duplicate()
+            self.trace(EV_DUPLICATE, seq)
+            return
+
+        for data in records:
+            self.publish_rx(src_mac, priority, data)
+
+    def send_ack(self, src_mac, priority, arq_state=None):
+        """ Acquitte src_mac : tout de suite, ou dans le prochain block-ACK """
+        if self.block_ack_delay > 0:
+            # Plusieurs trames d'une même source : seule la dernière fenêtre compte
+            self.pending_acks[src_mac] = arq_state
+            if len(self.pending_acks) >= MAX_BLOCK_ACK_ENTRIES:
+                self.flush_block_ack()
+            elif self.block_ack_deadline is None:
+                self.arm_block_ack()
+            return
+        self.transmit_ack(src_mac, priority, arq_state)
+
+    def transmit_ack(self, src_mac, priority, arq_state=None):
+        """ ACK simple (stop-and-wait) ou ACK ARQ (base, bitmap) vers src_mac """
+        if arq_state is not None:
+            ack = build_frame_array(self.mac_addr, src_mac, priority, pack_arq_ack(*arq_state), FLAG_ARQ_ACK)
+        else:
+            ack = build_frame_array(self.mac_addr, src_mac, priority, ACK_PAYLOAD)
+        self.message_port_pub(pmt.intern("phy_out"),
+                              pmt.cons(pmt.intern("frame"), to_u8vector(ack)))
+        self.mac_metrics.on_ack_sent()
+        self.trace(EV_ACK_SENT)
+
+    def arm_block_ack(self):
+        self.block_ack_deadline = self.clock() + self.block_ack_delay
+        if self.scheduler is not None:
+            self.block_ack_gen += 1
+            self.block_ack_event = self.scheduler.schedule(self.block_ack_delay, self.post_timer,
+                                                           "block_ack", self.block_ack_gen)
+
+    def flush_block_ack(self):
+        """ Une seule trame broadcast acquitte toutes les sources en attente """
+        if self.block_ack_event is not None:
+            self.scheduler.cancel(self.block_ack_event)
+            self.block_ack_event = None
+        self.block_ack_deadline = None
+        # Trames sans numéro de séquence : une entrée ne saurait pas laquelle
+        # est acquittée, elles reçoivent un ACK simple
+        for src_mac in [mac for mac, arq_state in self.pending_acks.items() if arq_state is None]:
+            del self.pending_acks[src_mac]
+            self.transmit_ack(src_mac, 0)
+        if not self.pending_acks:
+            return
+        if len(self.pending_acks) == 1:
+            # Une seule source : l'ACK simple est plus court que le block-ACK
+            src_mac, arq_state = self.pending_acks.popitem()
+            self.transmit_ack(src_mac, 0, arq_state)
+            return
+        payload = pack_block_ack((mac, *arq_state) for mac, arq_state in self.pending_acks.items())
+        frame = build_frame_array(self.mac_addr, BROADCAST_MAC, 0, payload, FLAG_BLOCK_ACK)
+        self.message_port_pub(pmt.intern("phy_out"), pmt.cons(pmt.intern("frame"), to_u8vector(frame)))
+        self.mac_metrics.on_ack_sent()
+        self.trace(EV_ACK_SENT, 0, len(self.pending_acks))
+        self.pending_acks.clear()
+
+    def handle_block_ack(self, src_mac, payload):
+        """ Block-ACK reçu : on cherche notre entrée """
+        entry = find_block_ack(payload, self.mac_addr)
+        if entry is not None:
+            self.handle_arq_ack(src_mac, *entry)
+
+    def publish_tx_status(self, status, records):
+        """ Un tx_success / tx_failed par paquet porté par la trame, comme MacMetrics """
+        for _ in records:
+            self.message_port_pub(pmt.intern("app_out"), pmt.cons(pmt.intern(status), pmt.PMT_NIL))
+
+    def publish_rx(self, src_mac, priority, data):
+        """ Remonte un payload reçu à l'application """
+        if self.binary_payloads:
+            # PDU : métadonnées + u8vector des octets du payload
+            meta = pmt.to_pmt({"src_mac": src_mac, "priority": priority})
+            self.message_port_pub(pmt.intern("app_out"), pmt.cons(meta, to_u8vector(data)))
+        else:
+            msg_dict = {
+                "src_mac": src_mac,
+                "priority": priority,
+                "data": bytes(data)
+            }
+            self.message_port_pub(pmt.intern("app_out"),
+                                  pmt.cons(pmt.intern("rx_frame"), pmt.to_pmt(msg_dict)))
+
+    def current_seq(self):
+        return self.current_records[0].seq if self.current_records else 0
+
+    def trace(self, event, seq=0, value=0.0):
+        """ Événement vers le traceur, horodaté avec l'horloge du bloc """
+        if self.tracer is not None:
+            self.tracer.record(self.mac_addr, event, seq, value, self.clock())
+
+    def metrics(self):
+        """ Compteurs, histogrammes de latence et état de la file d'émission """
+        stats = self.mac_metrics.snapshot()
+        stats["queue"] = self.tx_queue.stats()
+        stats["state"] = self.state
+        stats["window"] = len(self.window)
+        if self.dedup is not None:
+            stats["dedup"] = self.dedup.stats()
+        return stats
+
+    def publish_stats(self):
+        try:
+            self.message_port_pub(pmt.intern("stats_out"),
+                                  pmt.cons(pmt.intern("mac_stats"), pmt.to_pmt(self.metrics())))
+        except Exception as e:
+            print(f"Error in publish_stats: {e}")
+
+    def stop(self):
+        """ Désarme l'échéance en cours à l'arrêt du flowgraph """
+        self.cancel_timer()
+        self.timer_gen += 1
+        for entry in self.window.values():
+            self.disarm_entry(entry)
+        self.pending_acks.clear()
+        self.flush_block_ack() # Désarme seulement, plus rien à envoyer
+        if self.tracer is not None:
+            self.tracer.release()
+        return super().stop()
@@ -0,0 +1,121 @@
+import json
+import struct
+import numpy as np
+import pmt
+from FrameCodec import BROADCAST_MAC
+
+# Formats des messages application -> MAC
+FORMAT_JSON = "json"      # cons(NIL, chaîne JSON {"dst_mac", "priority", "data"})
+FORMAT_BINARY = "binary"  # cons(APP_BINARY_TAG, u8vector APP_HEADER + payload)
+
+# Le car du message sert de drapeau de format : pas d'ambiguïté avec le JSON
+# ni avec les PDU (meta, u8vector) déjà acceptées par les MAC
+APP_BINARY_TAG = "app_bin"
+APP_VERSION = 1
+
+# En-tête binaire : version, dst_mac, priority
+APP_HEADER = struct.Struct("!BIB")
+# Mesure capteur : température (centièmes de °C), humidité (centièmes de %)
+SENSOR_READING = struct.Struct("!hH")
+
+
+def to_u8vector(data):
+    """
+    Octets (tableau uint8, bytes, memoryview) -> u8vector. Les octets sont
+    recopiés d'un bloc dans le buffer du vecteur PMT, via la vue numpy de
+    pmt.u8vector_writable_elements, sans liste d'entiers intermédiaire.
+    """
+    src = np.frombuffer(data, dtype=np.uint8)
+    blob = pmt.make_u8vector(len(src), 0)
+    view = pmt.u8vector_writable_elements(blob)
+    if isinstance(view, np.ndarray):
+        view[:] = src
+        return blob
+    # Bindings sans vue sur le buffer : init_u8vector recopie le tableau
+    return pmt.init_u8vector(len(src), src)
+
+
+def u8vector_bytes(blob):
+    """
+    u8vector -> bytes, lu directement dans le buffer PMT (vue numpy de
+    pmt.u8vector_writable_elements) : une seule copie, sans passer par la
+    liste d'entiers de pmt.u8vector_elements.
+    """
+    return np.asarray(pmt.u8vector_writable_elements(blob), dtype=np.uint8).tobytes()
+
+
+def encode_reading(temperature, humidity):
+    """ Mesure capteur en 4 octets (au lieu de ~11 en texte "T22.5,H55.1") """
+    return SENSOR_READING.pack(int(round(temperature * 100)), int(round(humidity * 100)))
+
+
+def decode_reading(payload):
+    """ Retourne (temperature, humidity) """
+    temp, humidity = SENSOR_READING.unpack_from(payload, 0)
+    return temp / 100.0, humidity / 100.0
+
+
+def encode_app_message(dst_mac, priority, payload):
+    """ Message application binaire : en-tête fixe + payload """
+    buf = bytearray(APP_HEADER.size + len(payload))
+    APP_HEADER.pack_into(buf, 0, APP_VERSION, dst_mac, priority)
+    buf[APP_HEADER.size:] = payload
+    return bytes(buf)
+
+
+def decode_app_message(buf):
+    """
+    Retourne (dst_mac, priority, payload) ; payload est une memoryview (sans copie).
+    """
+    version, dst_mac, priority = APP_HEADER.unpack_from(buf, 0)
+    if version != APP_VERSION:
+        raise ValueError(f"Unsupported app message version: {version}")
+    return dst_mac, priority, memoryview(buf)[APP_HEADER.size:]
+
+
+def make_app_pmt(dst_mac, priority, data, msg_format=FORMAT_JSON):
+    """
+    Message PMT à publier vers la MAC.
+    En JSON, `data` doit être une chaîne ; en binaire, des octets.
+    """
+    if msg_format == FORMAT_BINARY:
+        msg = encode_app_message(dst_mac, priority, data)
+        return pmt.cons(pmt.intern(APP_BINARY_TAG), to_u8vector(msg))
+    msg_str = json.dumps({"dst_mac": dst_mac, "priority": priority, "data": data})
+    return pmt.cons(pmt.PMT_NIL, pmt.to_pmt(msg_str))
+
+
+def parse_app_pmt(msg_pmt, default_dst=BROADCAST_MAC):
+    """
+    Décode un message application reçu par une MAC, quel que soit son format.
+    Retourne (dst_mac, priority, data) où data est un objet bytes-like.
+      - cons(APP_BINARY_TAG, u8vector) : format binaire compact
+      - cons(meta, u8vector) : PDU brute, dst_mac/priority optionnels dans meta
+      - cons(_, chaîne) : JSON de l'AppSimulator, ou texte brut
+    """
+    car, blob = pmt.car(msg_pmt), pmt.cdr(msg_pmt)
+    dst_mac, priority = default_dst, 0
+
+    if pmt.is_u8vector(blob):
+        data = u8vector_bytes(blob)
+        if pmt.is_symbol(car) and pmt.symbol_to_string(car) == APP_BINARY_TAG:
+            return decode_app_message(data)
+        if pmt.is_dict(car):
+            meta = pmt.to_python(car)
+            if isinstance(meta.get("dst_mac"), int):
+                dst_mac = meta["dst_mac"]
+            priority = meta.get("priority") or 0
+        return dst_mac, priority, data
+
+    msg_str = pmt.to_python(blob)
+    data = msg_str
+    try:
+        msg_dict = json.loads(msg_str)
+        if isinstance(msg_dict, dict):
+            if isinstance(msg_dict.get("dst_mac"), int):
+                dst_mac = msg_dict["dst_mac"]
+            priority = msg_dict.get("priority") or 0
+            data = str(msg_dict.get("data", msg_str))
+    except ValueError:
+        pass
+    return dst_mac, priority, data.encode("utf-8")
@@ -4,7 +4,8 @@ import random
 import pmt
 from gnuradio import gr
 import numpy as np
-import json
+from AppMessage import make_app_pmt, u8vector_bytes, encode_reading, decode_reading, FORMAT_JSON, FORMAT_BINARY
+from FrameCodec import BROADCAST_MAC
 
 class app_simulator(gr.basic_block):
     """
@@ -13,9 +14,10 @@ class app_simulator(gr.basic_block):
     """
     def __init__(self, 
                  interval=30.0,  # Intervalle entre les envois en secondes
-                 dst_mac=b'\xFF\xFF\xFF\xFF\xFF\xFF',  # Broadcast par défaut
+                 dst_mac=BROADCAST_MAC,  # Broadcast par défaut
                  min_size=10,    # Taille minimum des données en octets
-                 max_size=100):  # Taille maximum des données en octets
+                 max_size=100,   # Taille maximum des données en octets
+                 msg_format=FORMAT_JSON):  # "json" ou "binary" (mesure compacte en 4 octets)
         gr.basic_block.__init__(
             self,
             name="app_simulator",
@@ -27,6 +29,7 @@ class app_simulator(gr.basic_block):
         self.dst_mac = dst_mac
         self.min_size = min_size
         self.max_size = max_size
+        self.msg_format = msg_format
         
         # Pour le timing
         self.last_tx = time.time()
@@ -47,6 +50,14 @@ class app_simulator(gr.basic_block):
         Traite les retours de la couche MAC (succès/échec des transmissions)
         """
         if pmt.is_pair(msg_pmt):
+            if pmt.is_dict(pmt.car(msg_pmt)):
+                # PDU binaire (meta, u8vector) des blocs MAC en mode binary_payloads
+                meta = pmt.to_python(pmt.car(msg_pmt))
+                data = u8vector_bytes(pmt.cdr(msg_pmt))
+                if self.msg_format == FORMAT_BINARY:
+                    data = "T{},H{}".format(*decode_reading(data))
+                print(f"[APP] Données reçues de {meta.get('src_mac')}: {data}")
+                return
             key = pmt.symbol_to_string(pmt.car(msg_pmt))
             if key == "tx_success":
                 print("[APP] Transmission réussie")
@@ -57,14 +68,21 @@ class app_simulator(gr.basic_block):
                 data_dict = pmt.to_python(pmt.cdr(msg_pmt))
                 print(f"[APP] Données reçues de {data_dict['src_mac']}: {data_dict['data']}")
     
+    def read_sensors(self):
+        """
+        Simule une mesure capteur (température, humidité)
+        """
+        temp = round(random.uniform(15, 30), 2)
+        humidity = round(random.uniform(30, 80), 2)
+        return temp, humidity
+
     def generate_random_data(self):
         """
         Génère des données aléatoires de taille variable
         """
         size = random.randint(self.min_size, self.max_size)
         # Simuler des données de capteur (température, humidité, etc.)
-        temp = round(random.uniform(15, 30), 2)
-        humidity = round(random.uniform(30, 80), 2)
+        temp, humidity = self.read_sensors()
         data = f"T{temp},H{humidity}" #.encode('utf-8')
         return data
     
@@ -76,22 +94,18 @@ class app_simulator(gr.basic_block):
         
         # Vérifier si c'est le moment d'envoyer
         if (now - self.last_tx) >= self.interval:
-            # Générer des données
-            data = self.generate_random_data()
-            
-            # Créer le message pour la couche MAC
-            msg_dict = {
-                "dst_mac": self.dst_mac,
-                "priority": random.randint(0, 1),  # Priorité aléatoire
-                "data": data
-            }
-            msg_str = json.dumps(msg_dict)
+            # Générer des données (texte en JSON, mesure compacte en binaire)
+            if self.msg_format == FORMAT_BINARY:
+                data = encode_reading(*self.read_sensors())
+            else:
+                data = self.generate_random_data()
+            priority = random.randint(0, 1)  # Priorité aléatoire
             
-            # Convertir en PMT et envoyer
+            # Créer le message PMT pour la couche MAC et l'envoyer
             try:
                 self.message_port_pub(
                     pmt.intern("app_out"),
-                    pmt.cons(pmt.PMT_NIL, pmt.to_pmt(msg_str))
+                    make_app_pmt(self.dst_mac, priority, data, self.msg_format)
                 )
                 #print(f"[APP] Envoi de données: {data}")
             except Exception as e:
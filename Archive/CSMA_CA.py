@@ -1,40 +1,17 @@
-import struct
 import time
 import random
 import pmt
-import json
-from queue import Queue
 from gnuradio import gr
-
-def build_frame(src_mac, dst_mac, priority, data):
-    """
-    Construit la trame MAC :
-      - src_mac: 6 octets
-      - dst_mac: 6 octets
-      - priority: 1 octet (0 ou 1)
-      - length: 2 octets (taille des données)
-      - data: N octets
-    """
-    # s = string (bytes), B = unsigned char, H = unsigned short
-    length = len(data)
-    fmt_header = "!IIBH"  # ! = réseau (big-endian)
-    header = struct.pack(fmt_header, src_mac, dst_mac, priority, length)
-    print(header)
-    return header + data
-
-def parse_frame(frame_bytes):
-    """
-    Décode une trame MAC.
-    Retourne (src_mac, dst_mac, priority, data).
-    """
-    fmt_header = "!IIBH"
-    header_size = struct.calcsize(fmt_header)
-    header = frame_bytes[:header_size]
-    data = frame_bytes[header_size:]
-
-    src_mac, dst_mac, priority, length = struct.unpack(fmt_header, header)
-    payload = data[:length]
-    return src_mac, dst_mac, priority, payload
+from FrameCodec import (build_frame_array, parse_frame, parse_frame_flags, BROADCAST_MAC, ACK_PAYLOAD, is_block_ack, find_block_ack,
+                        SEQ_MODULO, ACK_BITMAP_BITS, pack_arq, is_arq, unpack_arq, is_arq_ack, unpack_arq_ack, arq_acked,
+                        pack_selective_ack, FLAG_ARQ, FLAG_ARQ_ACK)
+from TxQueue import TxQueue, TAIL_DROP
+from CarrierSense import CarrierSenseState
+from AppMessage import parse_app_pmt, to_u8vector, u8vector_bytes
+from MacMetrics import MacMetrics
+from DuplicateCache import DuplicateCache
+from Tracer import (Tracer, EV_ENQUEUE, EV_DROP, EV_TX, EV_TIMEOUT, EV_BACKOFF, EV_ACK, EV_FAIL, EV_RX,
+                    EV_ACK_SENT, EV_DUPLICATE)
 
 class csma_ca_mac_block(gr.basic_block):
     """
@@ -46,7 +23,17 @@ class csma_ca_mac_block(gr.basic_block):
                  cw_min_high=4,
                  cw_max=64,
                  ack_timeout=0.05,  # en secondes
-                 max_retries=3):
+                 max_retries=3,
+                 rng=None,          # Générateur aléatoire (random.Random) pour des tirages reproductibles
+                 queue_capacity=64, # Nombre max de paquets en attente
+                 drop_policy=TAIL_DROP, # tail_drop, drop_oldest ou drop_low_priority
+                 cs_state=None,     # État de canal partagé (CarrierSenseState ou nom), sinon cs_in seul
+                 cs_max_age=None,   # Âge max (s) de cet état avant de se rabattre sur cs_in
+                 binary_payloads=False, # app_out en PDU (meta, u8vector) au lieu du dict de compatibilité
+                 stats_interval=0.0, # Période (s) de publication sur stats_out, vérifiée à chaque tick (0 = jamais)
+                 tracer=None,       # Traceur d'événements (Tracer ou chemin de fichier partagé)
+                 dedup_capacity=4096, # Doublons (src, seq) mémorisés en réception (0 = pas de détection)
+                 dedup_ttl=None):   # Oubli d'une entrée non revue depuis dedup_ttl secondes (None = LRU seul)
         gr.basic_block.__init__(
             self,
             name="csma_ca_mac_block",
@@ -63,23 +50,42 @@ class csma_ca_mac_block(gr.basic_block):
         self.cw_max = cw_max
         self.ack_timeout = ack_timeout
         self.max_retries = max_retries
+        self.rng = rng if rng is not None else random
+        self.binary_payloads = binary_payloads
         
         # État interne
         self.state = "IDLE"
         self.current_frame = None
+        self.current_pmt = None  # PMT de la trame courante, réutilisé à chaque retransmission
         self.current_priority = 0
+        self.current_records = []  # Suivi du paquet porté par la trame courante
+        self.current_arq_seq = None  # Numéro de séquence de la trame courante (unicast)
+        self.tx_seq = {}  # Prochain numéro de séquence par destination
         self.cw = cw_min_low
         self.retries = 0
         
-        # File d'attente des paquets à transmettre
-        self.tx_queue = Queue() 
+        # File d'attente des paquets à transmettre (bornée, une FIFO par priorité)
+        self.tx_queue = TxQueue(capacity=queue_capacity, policy=drop_policy)
         
         # Canal occupé ?
         self.channel_busy = False
+        # Canal occupé, lu directement auprès du moniteur (optionnel)
+        self.cs_state = CarrierSenseState.resolve(cs_state)
+        self.cs_max_age = cs_max_age
         
         # Timer pour le backoff
         self.backoff_remaining = 0
         self.last_time = time.time()
+
+        # Réception : un doublon (ACK perdu) est réacquitté sans être remonté ;
+        # un recul au-delà de la fenêtre d'ACK signale le redémarrage de la source
+        self.dedup = DuplicateCache(dedup_capacity, dedup_ttl, window=ACK_BITMAP_BITS) if dedup_capacity > 0 else None
+
+        # Métriques par paquet et par bloc
+        self.mac_metrics = MacMetrics(time.time)
+        self.stats_interval = stats_interval
+        self.last_stats = time.time()
+        self.tracer = Tracer.resolve(tracer)
         
         # Ports de messages
         self.message_port_register_in(pmt.intern("app_in"))
@@ -87,6 +93,7 @@ class csma_ca_mac_block(gr.basic_block):
         self.message_port_register_in(pmt.intern("cs_in"))  # Carrier Sense input
         self.message_port_register_out(pmt.intern("phy_out"))
         self.message_port_register_out(pmt.intern("app_out"))
+        self.message_port_register_out(pmt.intern("stats_out"))
 
         # Pour la clock de work
         self.message_port_register_in(pmt.intern("clock"))
@@ -103,32 +110,54 @@ class csma_ca_mac_block(gr.basic_block):
         try:
             # Extraire les données du message PMT
             if pmt.is_pair(msg_pmt):
-                msg_str = pmt.to_python(pmt.cdr(msg_pmt))
-                msg_dict = json.loads(msg_str)
-                if isinstance(msg_dict, dict):
-                    dst_mac = msg_dict.get("dst_mac")
-                    priority = msg_dict.get("priority")
-                    data = msg_dict.get("data")
-                    
-                    # Construire la trame MAC
-                    #frame = build_frame(self.mac_addr, dst_mac, priority, data)
-                    
-                    # Mettre en file d'attente
-                    self.tx_queue.put((msg_str, priority))
-                    
-                    # Si on est IDLE, traiter immédiatement
-                    if self.state == "IDLE":
-                        self.process_next_packet()
+                # Binaire compact, PDU (meta, u8vector), JSON ou texte brut
+                dst_mac, priority, data = parse_app_pmt(msg_pmt, BROADCAST_MAC)
+                record = self.mac_metrics.new_packet(len(data))
+
+                # Unicast : numéro de séquence pour la détection des doublons
+                seq = None
+                flags = 0
+                if dst_mac != BROADCAST_MAC:
+                    seq = self.take_seq(dst_mac)
+                    data = pack_arq(seq, data)
+                    flags = FLAG_ARQ
+
+                # Construire la trame MAC (tableau NumPy, converti en u8vector à la transmission)
+                frame = build_frame_array(self.mac_addr, dst_mac, priority, data, flags)
+
+                # Mettre en file d'attente
+                self.trace(EV_ENQUEUE, record.seq, record.size)
+                if not self.tx_queue.put((frame, priority, record, seq), priority):
+                    self.trace(EV_DROP, record.seq)
+
+                # Si on est IDLE, traiter immédiatement
+                if self.state == "IDLE":
+                    self.process_next_packet()
         except Exception as e:
             print(f"Error in handle_msg_in: {e}")
     
-    def handle_new_frame(self, frame, priority):
+    def take_seq(self, dst_mac):
+        """
+        Numéro suivant vers dst_mac. Le premier est tiré au hasard : après un
+        redémarrage, le récepteur ne confond pas la nouvelle session avec des
+        retransmissions de l'ancienne.
+        """
+        seq = self.tx_seq.get(dst_mac)
+        if seq is None:
+            seq = self.rng.randrange(SEQ_MODULO)
+        self.tx_seq[dst_mac] = (seq + 1) % SEQ_MODULO
+        return seq
+
+    def handle_new_frame(self, frame, priority, record, seq=None):
         """
         Démarre la procédure de transmission pour une nouvelle trame
         """
         if self.state == "IDLE":
             self.current_frame = frame
+            self.current_pmt = pmt.cons(pmt.intern("frame"), to_u8vector(frame))
             self.current_priority = priority
+            self.current_records = [record]
+            self.current_arq_seq = seq
             self.retries = 0
             # Définir la CW initiale selon la priorité
             if priority == 1:
@@ -144,29 +173,41 @@ class csma_ca_mac_block(gr.basic_block):
         Démarre la procédure de backoff de manière asynchrone
         """
         # Déterminer le backoff en slots
-        slots = random.randint(0, self.cw - 1)
+        slots = self.rng.randint(0, self.cw - 1)
         self.backoff_remaining = slots * 0.001  # 1ms par slot
         self.last_time = time.time()
+        self.mac_metrics.on_backoff(self.current_records, self.last_time)
+        self.trace(EV_BACKOFF, self.current_seq(), self.backoff_remaining)
     
     def tx_frame(self):
         """
         Transmet une trame via le port PHY
         """
         try:
-            # Créer un vecteur PMT pour la trame
-            #blob = pmt.make_u8vector(len(self.current_frame), 0)
-            #for i, b in enumerate(self.current_frame):
-                #pmt.u8vector_set(blob, i, b)
-            
-            # Envoyer la trame
-            self.message_port_pub(
-                pmt.intern("phy_out"),
-                pmt.cons(pmt.intern("frame"), pmt.to_pmt(self.current_frame))#pmt.cons(pmt.intern("frame"), blob)
-            )
-            
+            # Envoyer la trame (u8vector construit une seule fois par paquet)
+            self.message_port_pub(pmt.intern("phy_out"), self.current_pmt)
+
+            _, dst_mac, _, _ = parse_frame(self.current_frame)
+            if dst_mac == BROADCAST_MAC:
+                # Pas d'ACK en broadcast : émission unique, succès dès l'envoi
+                self.mac_metrics.on_tx(self.current_records, time.time())
+                self.trace(EV_TX, self.current_seq(), 1)
+                self.state = "IDLE"
+                self.current_frame = None
+                self.current_pmt = None
+                self.current_records = []
+                self.message_port_pub(
+                    pmt.intern("app_out"),
+                    pmt.cons(pmt.intern("tx_success"), pmt.PMT_NIL)
+                )
+                self.process_next_packet()
+                return
+
             # Passer en attente d'ACK
             self.state = "WAIT_ACK"
             self.wait_ack_start_time = time.time()
+            self.mac_metrics.on_tx(self.current_records, self.wait_ack_start_time)
+            self.trace(EV_TX, self.current_seq(), self.retries + 1)
             
         except Exception as e:
             print(f"Error in tx_frame: {e}")
@@ -181,30 +222,89 @@ class csma_ca_mac_block(gr.basic_block):
             if pmt.is_pair(msg_pmt):
                 blob = pmt.cdr(msg_pmt)
                 if pmt.is_u8vector(blob):
-                    # Convertir le PMT en bytes
-                    frame_bytes = bytes(pmt.u8vector_elements(blob))
+                    # u8vector -> bytes (copie), puis payload en memoryview sur ces octets
+                    frame = u8vector_bytes(blob)
                     
                     # Parser la trame
-                    src_mac, dst_mac, priority, payload = parse_frame(frame_bytes)
+                    src_mac, dst_mac, priority, flags, payload = parse_frame_flags(frame)
                     
                     # Vérifier si c'est un ACK pour nous
-                    if payload == b'ACK' and dst_mac == self.mac_addr:
+                    if not flags and payload == ACK_PAYLOAD and dst_mac == self.mac_addr:
                         self.handle_rx_ack(src_mac)
-                    elif dst_mac == self.mac_addr or dst_mac == b'\xFF\xFF\xFF\xFF\xFF\xFF':
+                    elif is_arq_ack(flags, payload) and dst_mac == self.mac_addr:
+                        # ACK numéroté : il doit couvrir la trame courante
+                        if self.is_current_acked(*unpack_arq_ack(payload)):
+                            self.handle_rx_ack(src_mac)
+                    elif dst_mac == BROADCAST_MAC and is_block_ack(flags, payload):
+                        # Block-ACK de la passerelle : acquitté si on y a une entrée
+                        entry = find_block_ack(payload, self.mac_addr)
+                        if entry is not None and self.is_current_acked(*entry):
+                            self.handle_rx_ack(src_mac)
+                    elif dst_mac == self.mac_addr or dst_mac == BROADCAST_MAC:
                         # Trame de données pour nous ou broadcast
+                        self.mac_metrics.on_rx(len(payload))
+                        self.trace(EV_RX, 0, len(payload))
+                        seq = None
+                        if is_arq(flags):
+                            seq, payload = unpack_arq(payload)
+                        if dst_mac == self.mac_addr:
+                            self.send_ack(src_mac, priority, seq)
+                            if seq is not None and self.dedup is not None and self.dedup.seen(src_mac, seq):
+                                # Retransmission après perte de l'ACK : déjà remontée
+                                self.mac_metrics.on_duplicate()
+                                self.trace(EV_DUPLICATE, seq)
+                                return
                         # Remonter à la couche application
-                        msg_dict = {
-                            "src_mac": src_mac,
-                            "priority": priority,
-                            "data": payload
-                        }
-                        self.message_port_pub(
-                            pmt.intern("app_out"),
-                            pmt.cons(pmt.intern("rx_frame"), pmt.to_pmt(msg_dict))
-                        )
+                        self.publish_rx(src_mac, priority, payload)
         except Exception as e:
             print(f"Error in handle_phy_in: {e}")
     
+    def is_current_acked(self, cumulative, bitmap):
+        """
+        Un ACK numéroté (ou une entrée de block-ACK) couvre-t-il la trame courante ?
+        """
+        if self.current_arq_seq is None:
+            return True
+        return arq_acked(self.current_arq_seq, cumulative, bitmap)
+
+    def send_ack(self, src_mac, priority, seq=None):
+        """
+        Acquitte une trame unicast reçue : ACK numéroté si elle porte un seq
+        """
+        try:
+            if seq is not None:
+                ack = build_frame_array(self.mac_addr, src_mac, priority, pack_selective_ack(seq), FLAG_ARQ_ACK)
+            else:
+                ack = build_frame_array(self.mac_addr, src_mac, priority, ACK_PAYLOAD)
+            self.message_port_pub(pmt.intern("phy_out"),
+                                  pmt.cons(pmt.intern("frame"), to_u8vector(ack)))
+            self.mac_metrics.on_ack_sent()
+            self.trace(EV_ACK_SENT, seq or 0)
+        except Exception as e:
+            print(f"Error in send_ack: {e}")
+
+    def publish_rx(self, src_mac, priority, data):
+        """
+        Remonte un payload reçu à l'application
+        """
+        if self.binary_payloads:
+            # PDU : métadonnées + u8vector des octets du payload
+            meta = pmt.to_pmt({"src_mac": src_mac, "priority": priority})
+            self.message_port_pub(
+                pmt.intern("app_out"),
+                pmt.cons(meta, to_u8vector(data))
+            )
+        else:
+            msg_dict = {
+                "src_mac": src_mac,
+                "priority": priority,
+                "data": bytes(data)
+            }
+            self.message_port_pub(
+                pmt.intern("app_out"),
+                pmt.cons(pmt.intern("rx_frame"), pmt.to_pmt(msg_dict))
+            )
+
     def handle_rx_ack(self, ack_src_mac):
         """
         Traitement quand on reçoit un ACK
@@ -217,11 +317,18 @@ class csma_ca_mac_block(gr.basic_block):
             if ack_src_mac == dst_mac:
                 self.state = "IDLE"
                 self.current_frame = None
+                self.mac_metrics.on_ack(self.current_records)
+                if self.current_records:
+                    record = self.current_records[0]
+                    self.trace(EV_ACK, record.seq, record.ack_time - record.enqueue_time)
+                self.current_records = []
                 # Notifier le succès
                 self.message_port_pub(
                     pmt.intern("app_out"),
                     pmt.cons(pmt.intern("tx_success"), pmt.PMT_NIL)
                 )
+                # Traiter le paquet suivant dans la file
+                self.process_next_packet()
             else:
                 # If ACK came from wrong source, treat it as no ACK received
                 print(f"Received ACK from unexpected source: {ack_src_mac}")
@@ -233,6 +340,9 @@ class csma_ca_mac_block(gr.basic_block):
                 else:
                     self.state = "IDLE"
                     self.current_frame = None
+                    self.mac_metrics.on_fail(self.current_records)
+                    self.trace(EV_FAIL, self.current_seq())
+                    self.current_records = []
                     # Notifier l'échec
                     self.message_port_pub(
                         pmt.intern("app_out"),
@@ -248,6 +358,17 @@ class csma_ca_mac_block(gr.basic_block):
         if pmt.is_bool(msg_pmt):
             self.channel_busy = pmt.to_bool(msg_pmt)
     
+    def is_channel_busy(self):
+        """
+        État du canal à cet instant : lecture synchrone de l'état partagé s'il
+        est configuré et assez récent, sinon dernier état reçu sur cs_in.
+        """
+        if self.cs_state is not None:
+            busy, timestamp = self.cs_state.read()
+            if self.cs_max_age is None or time.time() - timestamp <= self.cs_max_age:
+                return busy
+        return self.channel_busy
+
     def general_work(self, clk):
         """
         Méthode appelée régulièrement par le scheduler de GNU Radio
@@ -255,17 +376,23 @@ class csma_ca_mac_block(gr.basic_block):
         now = time.time()
         dt = now - self.last_time
         self.last_time = now
+
+        if self.stats_interval > 0 and now - self.last_stats >= self.stats_interval:
+            self.last_stats = now
+            self.publish_stats()
         
         if self.state == "BACKOFF":
-            if not self.channel_busy:
+            if not self.is_channel_busy():
                 self.backoff_remaining -= dt
-                if self.backoff_remaining <= 0:
+                if self.backoff_remaining <= 0 and not self.is_channel_busy():
                     self.state = "TX"
                     self.tx_frame()
         
         elif self.state == "WAIT_ACK":
             if (now - self.wait_ack_start_time) > self.ack_timeout:
                 self.retries += 1
+                self.mac_metrics.on_timeout()
+                self.trace(EV_TIMEOUT, self.current_seq())
                 if self.retries < self.max_retries:
                     self.cw = min(self.cw * 2, self.cw_max)
                     self.state = "BACKOFF"
@@ -273,6 +400,9 @@ class csma_ca_mac_block(gr.basic_block):
                 else:
                     self.state = "IDLE"
                     self.current_frame = None
+                    self.mac_metrics.on_fail(self.current_records)
+                    self.trace(EV_FAIL, self.current_seq())
+                    self.current_records = []
                     # Notifier l'échec
                     self.message_port_pub(
                         pmt.intern("app_out"),
@@ -288,13 +418,48 @@ class csma_ca_mac_block(gr.basic_block):
         Traite le prochain paquet dans la file d'attente
         """
         if not self.tx_queue.empty() and self.state == "IDLE":
-            frame, priority = self.tx_queue.get()
-            self.handle_new_frame(frame, priority)
+            frame, priority, record, seq = self.tx_queue.get()
+            self.handle_new_frame(frame, priority, record, seq)
+
+    def current_seq(self):
+        return self.current_records[0].seq if self.current_records else 0
+
+    def trace(self, event, seq=0, value=0.0):
+        """
+        Événement vers le traceur (si configuré)
+        """
+        if self.tracer is not None:
+            self.tracer.record(self.mac_addr, event, seq, value)
+
+    def metrics(self):
+        """
+        Compteurs, histogrammes de latence et état de la file d'émission
+        """
+        stats = self.mac_metrics.snapshot()
+        stats["queue"] = self.tx_queue.stats()
+        stats["state"] = self.state
+        if self.dedup is not None:
+            stats["dedup"] = self.dedup.stats()
+        return stats
+
+    def publish_stats(self):
+        """
+        Publie metrics() sur stats_out
+        """
+        try:
+            self.message_port_pub(
+                pmt.intern("stats_out"),
+                pmt.cons(pmt.intern("mac_stats"), pmt.to_pmt(self.metrics()))
+            )
+        except Exception as e:
+            print(f"Error in publish_stats: {e}")
 
     def stop(self):
         """
         Nettoie les ressources à l'arrêt du flowgraph.
         """
+        if self.tracer is not None:
+            self.tracer.release()
         return super().stop()
 
 print("fichier présent")
\ No newline at end of file
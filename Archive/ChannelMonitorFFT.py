@@ -3,15 +3,31 @@
 
 from gnuradio import gr
 import numpy as np
+from CarrierSense import CarrierSenseState
 
 class ChannelMonitor(gr.sync_block):
-    def __init__(self, frequency_mhz=0, bandwidth_hz=3000, sample_rate=32000, threshold=0.1):
+    def __init__(self, frequency_mhz=0, bandwidth_hz=3000, sample_rate=32000, threshold=0.1,
+                 fft_size=256, overlap=0.5, alpha=0.2, free_threshold=None, detector="fft",
+                 cs_state=None):
         """
         Initialize the Channel Monitor block.
         :param frequency_mhz: Center frequency in MHz to monitor for energy detection.
         :param bandwidth_hz: Bandwidth in Hz to average energy over.
         :param sample_rate: Sampling rate of the input signal.
-        :param threshold: Energy threshold to determine if the channel is busy.
+        :param threshold: Energy threshold above which the channel becomes busy.
+        :param fft_size: Fixed FFT length, independent of the scheduler's buffer sizes.
+        :param overlap: Fraction of each FFT frame shared with the previous one (0 <= overlap < 1).
+        :param alpha: Exponential averaging factor of the band energy (1 = no averaging).
+        :param free_threshold: Energy below which a busy channel becomes free again
+                               (hysteresis). Defaults to threshold.
+        :param detector: "fft" (windowed FFT, band bins averaged) or "mixdown" (cheaper:
+                         mix the band down to DC, decimate with an integrate-and-dump
+                         low-pass and integrate the power). The mixdown energy is scaled
+                         to match the FFT one for noise-like signals, so the same
+                         thresholds apply. Its band edges are softer (sinc response of
+                         the integrate-and-dump), so strong adjacent signals leak in.
+        :param cs_state: Optional CarrierSenseState (or shared instance name) updated with
+                         every decision, for MAC blocks that read the channel state directly.
         """
         gr.sync_block.__init__(
             self,
@@ -24,6 +40,135 @@ class ChannelMonitor(gr.sync_block):
         self.bandwidth_hz = bandwidth_hz
         self.sample_rate = sample_rate
         self.threshold = threshold
+        self.free_threshold = threshold if free_threshold is None else free_threshold
+        self.alpha = alpha
+
+        if not (0 <= overlap < 1):
+            raise ValueError(f"Overlap must be in [0, 1), got {overlap}")
+        if detector not in ("fft", "mixdown"):
+            raise ValueError(f"Unknown detector: {detector}")
+        self.detector = detector
+        self.fft_size = fft_size
+        self.hop = max(int(round(fft_size * (1 - overlap))), 1)
+        self.frame_len = fft_size  # Samples per decision frame (overridden by mixdown)
+
+        # Band bins, computed once for the fixed FFT size
+        center_frequency_hz = self.frequency_mhz * 1e6
+        if not (0 <= center_frequency_hz <= self.sample_rate / 2):
+            raise ValueError(f"Frequency {self.frequency_mhz} MHz is out of range for the sample rate {self.sample_rate} Hz")
+
+        half_bandwidth_bins = int((self.bandwidth_hz / 2) / (self.sample_rate / fft_size))
+        center_bin = min(int((center_frequency_hz / self.sample_rate) * fft_size), fft_size - 1)
+        start_bin = max(center_bin - half_bandwidth_bins, 0)
+        end_bin = min(center_bin + half_bandwidth_bins, fft_size - 1)
+        self.band = slice(start_bin, end_bin + 1)
+
+        # Hann window, scaled so that its mean is 1 (same energy scale as no window)
+        window = np.hanning(fft_size).astype(np.float32)
+        self.window = window * (fft_size / window.sum())
+
+        if detector == "mixdown":
+            # Integrate-and-dump over `decim` samples: noise bandwidth sample_rate / decim
+            self.decim = max(int(round(self.sample_rate / self.bandwidth_hz)), 1)
+            # Non-overlapping frames of about one hop, a whole number of decimated outputs
+            self.frame_len = max(int(round(self.hop / self.decim)), 1) * self.decim
+            self.hop = self.frame_len
+            # For white noise, mean |FFT bin| = sqrt(pi/4 * sum(w^2) * sigma^2) and
+            # sigma^2 = decim * mean|y|^2 : same energy scale as the FFT detector
+            self.mixdown_scale = np.pi / 4 * float(np.sum(self.window.astype(np.float64) ** 2)) * self.decim
+            # Oscillator and integrate-and-dump folded into one `decim`-tap kernel:
+            # each decimated output is a dot product of `decim` samples with it
+            lo_freq = center_frequency_hz / self.sample_rate  # Cycles per sample
+            self.kernel = (np.exp(-2j * np.pi * lo_freq * np.arange(self.decim)) / self.decim).astype(np.complex64)
+            self.decimated = np.zeros(0, dtype=np.complex64)  # Grown on demand, then reused
+            self.power = np.zeros(0, dtype=np.float32)
+
+        # Streaming state: samples not yet consumed by a full hop are carried over to the next call
+        self.stream = np.zeros(fft_size, dtype=np.complex64)  # Grown on demand, then reused
+        self.fill = 0
+        self.frames = np.zeros((0, fft_size), dtype=np.complex64)
+
+        self.avg_energy = 0.0
+        self.busy = False
+        self.cs_state = CarrierSenseState.resolve(cs_state)
+
+    def process(self, samples):
+        """
+        Push samples through the streaming detector.
+        :return: (completion index of each FFT frame within `samples`, busy state after each frame)
+        """
+        n = len(samples)
+        needed = self.fill + n
+        if len(self.stream) < needed:
+            grown = np.zeros(needed, dtype=np.complex64)
+            grown[:self.fill] = self.stream[:self.fill]
+            self.stream = grown
+        self.stream[self.fill:needed] = samples
+
+        n_frames = 0 if needed < self.frame_len else (needed - self.frame_len) // self.hop + 1
+        if n_frames == 0:
+            self.fill = needed
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+
+        if self.detector == "mixdown":
+            energies = self.mixdown_energies(n_frames)
+        else:
+            energies = self.fft_energies(needed, n_frames)
+
+        # Exponential averaging and hysteresis, frame by frame
+        states = np.empty(n_frames, dtype=bool)
+        avg, busy = self.avg_energy, self.busy
+        for i, energy in enumerate(energies):
+            avg += self.alpha * (energy - avg)
+            if busy:
+                busy = avg >= self.free_threshold
+            else:
+                busy = avg >= self.threshold
+            states[i] = busy
+        self.avg_energy, self.busy = avg, busy
+
+        # Keep the overlap (and any incomplete frame) for the next call
+        consumed = n_frames * self.hop
+        remaining = needed - consumed
+        self.stream[:remaining] = self.stream[consumed:needed]
+        self.fill = remaining
+
+        ends = np.arange(n_frames) * self.hop + self.frame_len - 1 - (needed - n)
+        return ends, states
+
+    def fft_energies(self, needed, n_frames):
+        """
+        Mean FFT magnitude in the monitored band, one value per overlapping frame.
+        """
+        # Windowed frames in a reused buffer (strided view, no copy of the stream)
+        if len(self.frames) < n_frames:
+            self.frames = np.zeros((n_frames, self.fft_size), dtype=np.complex64)
+        frames = self.frames[:n_frames]
+        windows = np.lib.stride_tricks.sliding_window_view(self.stream[:needed], self.fft_size)[::self.hop][:n_frames]
+        np.multiply(windows, self.window, out=frames)
+
+        # Mean magnitude in the monitored band only
+        return np.abs(np.fft.fft(frames, axis=1)[:, self.band]).mean(axis=1)
+
+    def mixdown_energies(self, n_frames):
+        """
+        Band energy in the time domain, one value per non-overlapping frame:
+        mix down to DC, integrate-and-dump over `decim` samples, average the power.
+        The oscillator phase at the start of each block only rotates its output,
+        so the power is computed with the fixed kernel (one dot product per block).
+        """
+        n_blocks = n_frames * self.frame_len // self.decim
+        if len(self.decimated) < n_blocks:
+            self.decimated = np.zeros(n_blocks, dtype=np.complex64)
+            self.power = np.zeros(n_blocks, dtype=np.float32)
+        decimated = self.decimated[:n_blocks]
+        power = self.power[:n_blocks]
+
+        blocks = self.stream[:n_blocks * self.decim].reshape(n_blocks, self.decim)
+        np.dot(blocks, self.kernel, out=decimated)
+        np.abs(decimated, out=power)
+        power *= power
+        return np.sqrt(self.mixdown_scale * power.reshape(n_frames, -1).mean(axis=1))
 
     def work(self, input_items, output_items):
         """
@@ -38,36 +183,18 @@ class ChannelMonitor(gr.sync_block):
         if len(input_signal) == 0:
             raise ValueError("Input signal is empty!")
 
-        # Compute the FFT and magnitude
-        fft_size = len(input_signal)  # Use the length of the input signal
-        energy = np.abs(np.fft.fft(input_signal))
-        freqs = np.fft.fftfreq(fft_size, d=1 / self.sample_rate)
-
-        # Calculate the bin index for the target frequency and bandwidth
-        center_frequency_hz = self.frequency_mhz * 1e6
-        if not (0 <= center_frequency_hz <= self.sample_rate / 2):
-            raise ValueError(f"Frequency {self.frequency_mhz} MHz is out of range for the sample rate {self.sample_rate} Hz")
-
-        half_bandwidth_bins = int((self.bandwidth_hz / 2) / (self.sample_rate / fft_size))
-        center_bin = int((center_frequency_hz / self.sample_rate) * fft_size)
+        busy_before = self.busy
+        ends, states = self.process(input_signal)
 
-        # Ensure center_bin is within bounds
-        if center_bin >= fft_size:
-            center_bin = fft_size - 1
+        # Shared state: written directly, readers see it without message passing
+        if self.cs_state is not None and len(states):
+            self.cs_state.update(self.busy)
 
-        # Determine the range of bins to average over
-        start_bin = max(center_bin - half_bandwidth_bins, 0)
-        end_bin = min(center_bin + half_bandwidth_bins, fft_size - 1)
-
-        # Compute the average energy in the specified bandwidth
-        avg_energy = np.mean(energy[start_bin:end_bin + 1])
-
-        # Determine if the channel is free
-        if avg_energy < self.threshold:
-            #print(f"[ChannelMonitor] Channel at {self.frequency_mhz} MHz (±{self.bandwidth_hz/2} Hz) is FREE. Average Energy: {avg_energy}")
-            output_signal[:] = 1.0  # Channel is free
-        else:
-            #print(f"[ChannelMonitor] Channel at {self.frequency_mhz} MHz (±{self.bandwidth_hz/2} Hz) is BUSY. Average Energy: {avg_energy}")
-            output_signal[:] = 0.0  # Channel is busy
+        # Each output sample reflects the decision of the last FFT frame completed up to it;
+        # only state changes need to be written
+        output_signal[:] = 0.0 if busy_before else 1.0
+        changes = np.flatnonzero(states != np.concatenate(([busy_before], states[:-1])))
+        for i in changes:
+            output_signal[max(ends[i], 0):] = 0.0 if states[i] else 1.0
 
         return len(output_signal)
@@ -5,33 +5,71 @@ import numpy as np
 class float_to_bool_msg(gr.basic_block):
     """
     Convertit un flux float32 (0 ou 1) en messages booléens (False ou True).
+    En mode edge_triggered, un message n'est publié qu'aux changements d'état
+    (occupé <-> libre), éventuellement après un temps de maintien min_dwell.
     """
-    def __init__(self):
+    def __init__(self, edge_triggered=False, min_dwell=0):
         gr.basic_block.__init__(
             self,
             name="float_to_bool_msg",
             in_sig=[np.float32],  # un canal d'entrée float32
             out_sig=[]                  # pas de flux de sortie
         )
-        
+
+        self.edge_triggered = edge_triggered
+        self.min_dwell = min_dwell  # Nb d'échantillons minimum avant de signaler un nouvel état
+
+        # État du mode front : dernier état publié et plage en cours (valeur, longueur)
+        self.reported = None
+        self.run_state = None
+        self.run_len = 0
+
         # On déclare un port de sortie de message
         self.message_port_register_out(pmt.intern("state_out"))
 
     def general_work(self, input_items, output_items):
         in0 = input_items[0]
         n = len(in0)
-        
+
+        if self.edge_triggered:
+            if n > 0:
+                self.publish_transitions(in0 < 0.5)
+            self.consume(0, n)
+            return 0
+
         # Pour chaque échantillon, on envoie un message
         for val in in0:
             if val >= 0.5:  # ou > 0.0 selon votre logique
                 msg = pmt.from_bool(False)
             else:
                 msg = pmt.from_bool(True)
-            
+
             # Publier le message
             self.message_port_pub(pmt.intern("state_out"), msg)
-        
+
         # Consommer tous les échantillons
         self.consume(0, n)
-        
-        return 0
\ No newline at end of file
+
+        return 0
+
+    def publish_transitions(self, busy):
+        """
+        Publie les changements d'état d'un buffer booléen (True = occupé).
+        Les plages sont trouvées en vectoriel (np.diff) ; seule la boucle sur
+        les plages reste en Python, et il y en a peu.
+        """
+        n = len(busy)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(busy.view(np.int8))) + 1))
+        lengths = np.diff(np.concatenate((starts, [n])))
+
+        for i, (start, length) in enumerate(zip(starts, lengths)):
+            value = bool(busy[start])
+            if i == 0 and value == self.run_state:
+                length += self.run_len  # La plage continue celle du buffer précédent
+            if value != self.reported and length >= self.min_dwell:
+                self.reported = value
+                self.message_port_pub(pmt.intern("state_out"), pmt.from_bool(value))
+
+        # La dernière plage peut se poursuivre dans le buffer suivant
+        self.run_state = value
+        self.run_len = int(length)
@@ -2,6 +2,10 @@ from gnuradio import gr
 import pmt
 import numpy as np
 import json
+from FrameCodec import HEADER, HEADER_SIZE, SYNC_WORD
+from AppMessage import to_u8vector
+from RingBuffer import RingBuffer
+from Tracer import Tracer, EV_DEFRAME
 
 
 class ichar_to_pmt(gr.sync_block):
@@ -42,3 +46,82 @@ class ichar_to_pmt(gr.sync_block):
             print(f"Erreur lors du décodage ou de l'envoi : {e}")
 
         return len(in_data)
+
+
+class ichar_deframer(gr.sync_block):
+    """
+    Bloc GNU Radio qui retrouve les trames MAC dans un flux d'octets (int8) :
+    mot de synchro, puis en-tête MAC dont le champ length donne la taille.
+    Les octets s'accumulent d'un appel de work à l'autre dans un buffer
+    circulaire de taille fixe ; chaque trame complète est recopiée une seule
+    fois du buffer vers le u8vector publié.
+    """
+
+    def __init__(self, sync_word=SYNC_WORD, capacity=65536, tracer=None, node=0):
+        gr.sync_block.__init__(
+            self,
+            name="Ichar Deframer",
+            in_sig=[np.int8],
+            out_sig=[],
+        )
+        self.message_port_register_out(pmt.intern("out"))
+        self.sync_word = bytes(sync_word)
+        self.ring = RingBuffer(capacity)
+
+        # Compteurs
+        self.frames_out = 0
+        self.bytes_dropped = 0  # Octets sacrifiés faute de place (resynchronisation ensuite)
+
+        # Traceur d'événements optionnel (Tracer ou chemin de fichier partagé)
+        self.tracer = Tracer.resolve(tracer)
+        self.node = node
+
+    def stop(self):
+        if self.tracer is not None:
+            self.tracer.release()
+        return super().stop()
+
+    def work(self, input_items, output_items):
+        in_data = input_items[0]
+
+        # Par morceaux si le buffer du scheduler dépasse la capacité de l'anneau
+        data = in_data.view(np.uint8)
+        offset = 0
+        while offset < len(data):
+            written = self.ring.write(data[offset:])
+            offset += written
+            self.extract_frames()
+            if written == 0:
+                self.ring.skip(1) # Anneau plein sans trame complète : on sacrifie un octet
+                self.bytes_dropped += 1
+
+        return len(in_data)
+
+    def extract_frames(self):
+        sync_len = len(self.sync_word)
+        while True:
+            pos = self.ring.find(self.sync_word)
+            if pos < 0:
+                # On garde juste de quoi compléter un mot de synchro coupé
+                self.ring.skip(max(0, len(self.ring) - (sync_len - 1)))
+                return
+            self.ring.skip(pos)
+
+            if len(self.ring) < sync_len + HEADER_SIZE:
+                return # En-tête pas encore arrivé
+            header = self.ring.peek(HEADER_SIZE, sync_len)
+            length = HEADER.unpack(header.tobytes())[3]
+            frame_size = HEADER_SIZE + length
+            if sync_len + frame_size > self.ring.capacity:
+                self.ring.skip(1) # Fausse synchro : longueur impossible
+                continue
+            if len(self.ring) < sync_len + frame_size:
+                return # Trame incomplète, suite au prochain appel
+
+            # Vue sur le buffer (ou copie s'il reboucle) : to_u8vector recopie avant le skip
+            msg = pmt.cons(pmt.PMT_NIL, to_u8vector(self.ring.peek(frame_size, sync_len)))
+            self.ring.skip(sync_len + frame_size)
+            self.frames_out += 1
+            if self.tracer is not None:
+                self.tracer.record(self.node, EV_DEFRAME, self.frames_out, frame_size)
+            self.message_port_pub(pmt.intern("out"), msg)
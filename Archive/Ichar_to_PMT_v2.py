@@ -1,14 +1,26 @@
 from gnuradio import gr
 import pmt
 import numpy as np
+import time
+from AppMessage import to_u8vector
 
 
 class ichar_to_pmt(gr.sync_block):
     """
     Bloc GNU Radio pour transformer un flux de caractères signés (int8) en un message PMT
+    (sonde de debug vers blocks_message_debug).
     """
 
-    def __init__(self):
+    def __init__(self, output="pdu", sample_every=1, min_interval=0.0, max_bytes=0):
+        """
+        :param output: "pdu" (cons(NIL, u8vector) des octets bruts : rien n'est interné,
+                       le port print_pdu de blocks_message_debug affiche l'hexa lui-même)
+                       ou "symbol" (chaîne hexadécimale internée, comportement historique :
+                       chaque message ajoute un symbole jamais libéré à la table de pmt).
+        :param sample_every: Ne publie qu'un appel de work sur N.
+        :param min_interval: Intervalle minimum (s) entre deux messages.
+        :param max_bytes: Nombre max d'octets publiés par message (0 = tout).
+        """
         # Initialisation du bloc
         gr.sync_block.__init__(
             self,
@@ -18,8 +30,18 @@ class ichar_to_pmt(gr.sync_block):
         )
         # Enregistrement d'une porte de sortie pour envoyer des messages PMT
         self.message_port_register_out(pmt.intern("out"))
-        # Initialisation du tampon avec une chaîne binaire vide
-        self.data_buffer = bytearray()  # Utilisation de bytearray pour gérer les données binaires
+
+        if output not in ("symbol", "pdu"):
+            raise ValueError(f"Unknown output mode: {output}")
+        self.output = output
+        self.sample_every = max(int(sample_every), 1)
+        self.min_interval = min_interval
+        self.max_bytes = max_bytes
+
+        # Échantillonnage / limitation de débit
+        self.calls = 0
+        self.last_pub = 0.0
+        self.msgs_skipped = 0
 
     def work(self, input_items, output_items):
         """
@@ -27,30 +49,37 @@ class ichar_to_pmt(gr.sync_block):
         """
         # Lire les données d'entrée
         in_data = input_items[0]
+        if len(in_data) == 0:
+            return 0
 
-        # Convertir les entiers signés (-128 à 127) en valeurs non signées (0 à 255)
-        unsigned_data = (in_data.astype(np.uint8))
-
-        # Ajouter les données converties au tampon
-        self.data_buffer.extend(unsigned_data)
-
-        # Si le tampon contient des données, envoyer un message PMT
-        if len(self.data_buffer) > 0:
-            try:
-                # Convertir en représentation hexadécimale pour les données binaires
-                hex_data = ' '.join([f'{x:02x}' for x in self.data_buffer])
-                #print(f"Converted hex data: {hex_data}")
-
-                # Créer un message PMT contenant les données hexadécimales
-                msg_pmt = pmt.intern(hex_data)
-                
-                # Envoyer le message via la porte de sortie
-                self.message_port_pub(pmt.intern("out"), msg_pmt)
-                
-                # Réinitialiser le tampon après l'envoi
-                self.data_buffer = bytearray()
-            except Exception as e:
-                print(f"Erreur lors du décodage ou de l'envoi du message : {e}")
+        # 1 appel sur N, et pas plus d'un message par min_interval
+        self.calls += 1
+        if self.calls % self.sample_every != 0:
+            self.msgs_skipped += 1
+            return len(in_data)
+        if self.min_interval > 0:
+            now = time.time()
+            if now - self.last_pub < self.min_interval:
+                self.msgs_skipped += 1
+                return len(in_data)
+            self.last_pub = now
 
-        return len(in_data)
+        # Les entiers signés (-128 à 127) vus comme octets non signés (0 à 255), sans copie
+        data = in_data.view(np.uint8)
+        if self.max_bytes:
+            data = data[:self.max_bytes]
+
+        try:
+            if self.output == "pdu":
+                # Octets bruts en u8vector : pas de rendu texte, rien d'interné
+                msg_pmt = pmt.cons(pmt.PMT_NIL, to_u8vector(data))
+            else:
+                # Représentation hexadécimale rendue en C (bytes.hex) plutôt qu'octet par octet
+                msg_pmt = pmt.intern(data.tobytes().hex(' '))
 
+            # Envoyer le message via la porte de sortie
+            self.message_port_pub(pmt.intern("out"), msg_pmt)
+        except Exception as e:
+            print(f"Erreur lors du décodage ou de l'envoi du message : {e}")
+
+        return len(in_data)
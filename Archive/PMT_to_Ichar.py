@@ -1,6 +1,9 @@
 from gnuradio import gr
 import pmt
 import numpy as np
+from FrameCodec import SYNC_WORD
+from RingBuffer import RingBuffer
+from AppMessage import u8vector_bytes
 
 
 class pmt_to_ichar(gr.sync_block):
@@ -8,7 +11,7 @@ class pmt_to_ichar(gr.sync_block):
     Bloc GNU Radio pour transformer un message PMT en un flux d'entiers (int8)
     """
 
-    def __init__(self):
+    def __init__(self, capacity=65536, framed=False):
         gr.sync_block.__init__(
             self,
             name="PMT to Ichar",
@@ -17,21 +20,43 @@ class pmt_to_ichar(gr.sync_block):
         )
         self.message_port_register_in(pmt.intern("in"))
         self.set_msg_handler(pmt.intern("in"), self.handle_msg)
-        self.data_queue = bytearray()
+
+        # File d'octets circulaire de taille fixe (pas de recopie du reste à chaque work)
+        self.data_queue = RingBuffer(capacity)
+        # Ajoute le mot de synchro devant chaque message (pour ichar_deframer)
+        self.framed = framed
+
+        # Compteurs : message entier rejeté si l'anneau n'a pas la place
+        self.msgs_dropped = 0
+        self.bytes_dropped = 0
 
     def handle_msg(self, msg_pmt):
         try:
-            # Vérifier si le message PMT contient une chaîne
+            # Données du message : u8vector (tel quel), bytes ou chaîne
             if pmt.is_pair(msg_pmt):
-                msg_str = pmt.to_python(pmt.cdr(msg_pmt))
-                if isinstance(msg_str, str):
-                    self.data_queue.extend(msg_str.encode("utf-8"))
+                # u8vector -> bytes (pmt.to_python passerait aussi par une liste d'entiers)
+                blob = pmt.cdr(msg_pmt)
+                data = u8vector_bytes(blob) if pmt.is_u8vector(blob) else pmt.to_python(blob)
+                if isinstance(data, str):
+                    data = data.encode("utf-8")
+                elif not isinstance(data, (bytes, bytearray, memoryview, np.ndarray)):
+                    return
+                self.push(data)
         except Exception as e:
             print(f"Erreur dans handle_msg : {e}")
 
+    def push(self, data):
+        """ Ajoute un message complet, ou le rejette s'il ne tient pas """
+        size = len(data) + (len(SYNC_WORD) if self.framed else 0)
+        if size > self.data_queue.free():
+            self.msgs_dropped += 1
+            self.bytes_dropped += size
+            return False
+        if self.framed:
+            self.data_queue.write(SYNC_WORD)
+        self.data_queue.write(data)
+        return True
+
     def work(self, input_items, output_items):
         out = output_items[0]
-        length = min(len(out), len(self.data_queue))
-        out[:length] = np.frombuffer(self.data_queue[:length], dtype=np.int8)
-        self.data_queue = self.data_queue[length:]
-        return length
+        return self.data_queue.read_into(out.view(np.uint8))
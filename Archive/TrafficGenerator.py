@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+import time
+import struct
+import pmt
+import numpy as np
+from gnuradio import gr
+from AppMessage import make_app_pmt, FORMAT_BINARY
+from FrameCodec import BROADCAST_MAC
+from EventScheduler import RealTimeScheduler
+
+# Processus d'arrivée
+POISSON = "poisson"    # Inter-arrivées exponentielles
+PERIODIC = "periodic"  # Période fixe + gigue uniforme
+ONOFF = "onoff"        # Rafales : Poisson pendant ON, silence pendant OFF (durées exponentielles)
+TRACE = "trace"        # Rejeu d'instants relevés
+
+# Début de payload : numéro de séquence et instant de génération (mesure de latence)
+PAYLOAD_STAMP = struct.Struct("!Id")
+
+
+def load_trace(trace):
+    """ Instants (s) d'une trace : séquence, fichier .npy ou texte (une valeur par ligne) """
+    if isinstance(trace, str):
+        times = np.load(trace) if trace.endswith(".npy") else np.loadtxt(trace, ndmin=1)
+    else:
+        times = np.asarray(trace, dtype=float)
+    times = np.sort(times.astype(float))
+    return times - times[0] if len(times) else times
+
+
+class ArrivalProcess:
+    """
+    Instants d'arrivée (s, relatifs au départ) tirés par lots vectorisés.
+    next_batch(n) prolonge la séquence : les lots successifs s'enchaînent.
+    """
+    def __init__(self, process=POISSON, rate=100.0, jitter=0.0, on_time=1.0, off_time=1.0,
+                 trace=None, loop=False, seed=None):
+        if process not in (POISSON, PERIODIC, ONOFF, TRACE):
+            raise ValueError(f"Unknown arrival process: {process}")
+        if process != TRACE and rate <= 0:
+            raise ValueError("rate must be positive")
+        if process == PERIODIC and not 0 <= jitter < 0.5 / rate:
+            # Au-delà, deux arrivées voisines (éventuellement de lots différents) peuvent s'inverser
+            raise ValueError(f"jitter must be in [0, {0.5 / rate}) (half the period)")
+        self.process = process
+        self.rate = rate
+        self.jitter = jitter
+        self.on_time = on_time
+        self.off_time = off_time
+        self.loop = loop
+        self.rng = np.random.default_rng(seed)
+
+        self.last = 0.0   # Dernier instant émis (Poisson), ou base du prochain lot
+        self.count = 0    # Nombre d'arrivées déjà tirées (périodique, trace)
+
+        # ON/OFF : horloge "active" (temps cumulé passé en ON) et périodes ON en cours
+        self.active = 0.0
+        self.on_ends = np.zeros(0)     # Fin de chaque période ON, en temps actif cumulé
+        self.off_before = np.zeros(0)  # Temps OFF cumulé avant chaque période ON
+        self.next_active = 0.0         # Fin (temps actif) de la dernière période tirée
+        self.total_off = 0.0           # Temps OFF cumulé jusque-là
+
+        if process == TRACE:
+            self.trace = load_trace(trace if trace is not None else [])
+            # Durée d'un tour de trace (rejeu en boucle) : dernière valeur + écart moyen
+            gap = self.trace[-1] / (len(self.trace) - 1) if len(self.trace) > 1 else 1.0
+            self.trace_period = self.trace[-1] + gap if len(self.trace) else 0.0
+
+    def next_batch(self, n):
+        """ n instants suivants (tableau trié, éventuellement plus court en fin de trace) """
+        if self.process == POISSON:
+            times = self.last + np.cumsum(self.rng.exponential(1.0 / self.rate, n))
+            self.last = times[-1]
+            return times
+
+        if self.process == PERIODIC:
+            k = np.arange(self.count, self.count + n)
+            self.count += n
+            times = (k + 1) / self.rate
+            if self.jitter > 0:
+                # Gigue < demi-période : chaque arrivée reste dans son créneau, la
+                # séquence reste croissante d'un lot à l'autre sans tri
+                times += self.rng.uniform(-self.jitter, self.jitter, n)
+            return times
+
+        if self.process == ONOFF:
+            # Arrivées de Poisson en temps actif, puis décalées des silences OFF qui précèdent
+            active = self.active + np.cumsum(self.rng.exponential(1.0 / self.rate, n))
+            self.active = active[-1]
+            self.extend_periods(self.active)
+            idx = np.searchsorted(self.on_ends, active, side="right")
+            times = active + self.off_before[idx]
+            # On oublie les périodes déjà dépassées
+            self.on_ends = self.on_ends[idx[-1]:]
+            self.off_before = self.off_before[idx[-1]:]
+            return times
+
+        # TRACE
+        total = len(self.trace)
+        if total == 0:
+            return np.zeros(0)
+        if not self.loop:
+            times = self.trace[self.count:self.count + n]
+            self.count += len(times)
+            return times
+        k = np.arange(self.count, self.count + n)
+        self.count += n
+        return self.trace[k % total] + (k // total) * self.trace_period
+
+    def extend_periods(self, active_until):
+        """ Tire des périodes ON/OFF jusqu'à couvrir `active_until` (temps actif) """
+        while not len(self.on_ends) or self.on_ends[-1] <= active_until:
+            m = max(16, int((active_until - self.next_active) / max(self.on_time, 1e-9)) + 1)
+            on = self.rng.exponential(self.on_time, m)
+            off = self.rng.exponential(self.off_time, m)
+            ends = self.next_active + np.cumsum(on)
+            # Le premier silence précède la première période ON (départ en OFF)
+            offs = self.total_off + np.cumsum(off)
+            self.on_ends = np.concatenate((self.on_ends, ends))
+            self.off_before = np.concatenate((self.off_before, offs))
+            self.next_active = ends[-1]
+            self.total_off = offs[-1]
+
+
+class traffic_source(gr.basic_block):
+    """
+    Source de trafic synthétique à haut débit pour charger les blocs MAC
+    (jusqu'à plusieurs milliers de paquets/s). Les instants d'arrivée sont
+    précalculés par lots ; chaque passage publie d'un coup tous les paquets
+    échus, au même format app_out que l'app_simulator.
+    """
+    def __init__(self,
+                 process=POISSON,   # poisson, periodic, onoff ou trace
+                 rate=1000.0,       # Débit moyen (paquets/s), pendant ON en mode onoff
+                 jitter=0.0,        # Gigue max (s) en mode periodic (< demi-période)
+                 on_time=0.1,       # Durée moyenne ON (s)
+                 off_time=0.9,      # Durée moyenne OFF (s)
+                 trace=None,        # Instants à rejouer : fichier ou séquence
+                 loop=False,        # Rejoue la trace en boucle
+                 seed=None,         # Graine propre à la source
+                 dst_mac=BROADCAST_MAC,
+                 payload_size=20,   # Octets par paquet (au moins PAYLOAD_STAMP.size)
+                 high_priority_ratio=0.0, # Proportion de paquets en priorité 1
+                 msg_format=FORMAT_BINARY,
+                 max_packets=0,     # Arrêt après N paquets (0 = illimité)
+                 batch_size=1024,   # Instants tirés par lot
+                 event_timers=False, # Envois armés sur un ordonnanceur au lieu du polling 'clock'
+                 scheduler=None):
+        gr.basic_block.__init__(
+            self,
+            name="traffic_source",
+            in_sig=None,
+            out_sig=None
+        )
+
+        self.arrivals = ArrivalProcess(process, rate, jitter, on_time, off_time, trace, loop, seed)
+        self.rng = self.arrivals.rng
+        self.dst_mac = dst_mac
+        self.payload_size = max(payload_size, PAYLOAD_STAMP.size)
+        self.high_priority_ratio = high_priority_ratio
+        self.msg_format = msg_format
+        self.max_packets = max_packets
+        self.batch_size = batch_size
+
+        # Lot courant : instants, priorités, et position du prochain paquet
+        self.times = np.zeros(0)
+        self.prios = np.zeros(0, dtype=np.uint8)
+        self.idx = 0
+        self.exhausted = False
+
+        # Payload : gabarit réutilisé, seuls la séquence et l'horodatage changent
+        self.payload = bytearray(self.payload_size)
+        self.seq = 0
+        self.sent = 0
+
+        if scheduler is None and event_timers:
+            scheduler = RealTimeScheduler.shared()
+        self.scheduler = scheduler
+        self.clock = scheduler.now if scheduler is not None else time.time
+        self.start_time = None
+        self.timer_event = None
+
+        self.message_port_register_out(pmt.intern("app_out"))
+
+        # Clock (mode polling)
+        self.message_port_register_in(pmt.intern("clock"))
+        self.set_msg_handler(pmt.intern("clock"), self.general_work)
+
+        # Échéances de l'ordonnanceur, repostées dans le thread du bloc
+        self.message_port_register_in(pmt.intern("timer"))
+        self.set_msg_handler(pmt.intern("timer"), self.handle_timer)
+
+        if self.scheduler is not None and not self.scheduler.threaded:
+            # Simulation : on démarre tout de suite sur l'horloge virtuelle
+            self.begin()
+
+    def start(self):
+        if self.scheduler is not None:
+            self.begin()
+        return super().start()
+
+    def begin(self):
+        """ Origine des instants d'arrivée, puis première échéance """
+        if self.start_time is None:
+            self.start_time = self.clock()
+            self.arm_next()
+
+    def refill(self):
+        """ Tire le lot suivant d'instants et de priorités """
+        times = self.arrivals.next_batch(self.batch_size)
+        if len(times) == 0:
+            self.exhausted = True
+        self.times = self.start_time + times
+        self.prios = (self.rng.random(len(times)) < self.high_priority_ratio).astype(np.uint8)
+        self.idx = 0
+
+    def done(self):
+        return self.exhausted or (self.max_packets and self.sent >= self.max_packets)
+
+    def publish_due(self, now):
+        """ Publie tous les paquets dont l'instant est passé """
+        while not self.done():
+            if self.idx >= len(self.times):
+                self.refill()
+                continue
+            end = int(np.searchsorted(self.times, now, side="right"))
+            if self.max_packets:
+                end = min(end, self.idx + self.max_packets - self.sent)
+            for i in range(self.idx, end):
+                self.publish(self.times[i], int(self.prios[i]))
+            self.idx = max(end, self.idx)
+            if self.idx < len(self.times):
+                break
+
+    def publish(self, when, priority):
+        PAYLOAD_STAMP.pack_into(self.payload, 0, self.seq, when)
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        self.sent += 1
+        if self.msg_format == FORMAT_BINARY:
+            data = self.payload
+        else:
+            data = self.payload.hex()
+        try:
+            self.message_port_pub(pmt.intern("app_out"),
+                                  make_app_pmt(self.dst_mac, priority, data, self.msg_format))
+        except Exception as e:
+            print(f"Error in traffic_source publish: {e}")
+
+    def next_time(self):
+        if self.done():
+            return None
+        if self.idx >= len(self.times):
+            self.refill()
+            if self.done():
+                return None
+        return self.times[self.idx]
+
+    def arm_next(self):
+        """ Une seule échéance armée : l'instant du prochain paquet """
+        when = self.next_time()
+        if when is not None:
+            self.timer_event = self.scheduler.schedule_at(when, self.post_timer)
+
+    def post_timer(self):
+        if self.scheduler.threaded:
+            self._post(pmt.intern("timer"), pmt.PMT_NIL)
+        else:
+            self.fire_timer()
+
+    def handle_timer(self, msg_pmt):
+        self.fire_timer()
+
+    def fire_timer(self):
+        self.timer_event = None
+        self.publish_due(self.clock())
+        self.arm_next()
+
+    def general_work(self, clk):
+        """ Mode polling : chaque tick publie le retard accumulé """
+        if self.scheduler is not None:
+            return
+        if self.start_time is None:
+            self.start_time = self.clock()
+        self.publish_due(self.clock())
+
+    def stats(self):
+        elapsed = self.clock() - self.start_time if self.start_time is not None else 0.0
+        return {
+            "sent": self.sent,
+            "elapsed": elapsed,
+            "rate": self.sent / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def stop(self):
+        if self.timer_event is not None:
+            self.scheduler.cancel(self.timer_event)
+            self.timer_event = None
+        return super().stop()
+
+
+if __name__ == "__main__":
+    # Débit et forme des rafales mesurés sur l'horloge virtuelle
+    from EventScheduler import EventScheduler
+
+    for process in (POISSON, PERIODIC, ONOFF):
+        sched = EventScheduler()
+        src = traffic_source(process=process, rate=2000.0, jitter=0.0001, seed=1, scheduler=sched)
+        counts = []
+        src.message_port_pub = lambda port, msg: counts.append(sched.now())
+        sched.run(until=10.0)
+        per_second = np.bincount(np.asarray(counts, dtype=int), minlength=10)[:10]
+        print(f"{process:9s} {len(counts) / 10.0:8.1f} pkt/s  par seconde: {per_second.tolist()}")
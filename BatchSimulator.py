@@ -0,0 +1,509 @@
+import time
+import numpy as np
+
+from FrameCodec import HEADER_SIZE, ACK_PAYLOAD, ARQ_HEADER, ARQ_ACK
+from ChannelSimulator import percentile
+
+# Codes d'état des nœuds (un octet par nœud)
+IDLE = 0
+BACKOFF = 1   # Émission prévue (ALOHA : à deadline, CSMA : quand le compteur atteint target)
+WAIT_ACK = 2
+
+# Types de trame sur le canal
+DATA = 0
+ACK = 1
+
+NO_TIME = np.inf
+
+
+class PoissonArrivals:
+    """
+    Arrivées de Poisson de `rate` paquets/s sur chacun des n_nodes nœuds :
+    un seul processus de taux n_nodes * rate dont chaque arrivée est attribuée
+    à un nœud tiré uniformément. Générées par tranches de `chunk`.
+    """
+    def __init__(self, n_nodes, rate, rng, chunk=65536):
+        self.n_nodes = n_nodes
+        self.total_rate = n_nodes * rate
+        self.rng = rng
+        self.chunk = chunk
+        self.times = np.empty(0)
+        self.nodes = np.empty(0, dtype=np.int64)
+        self.pos = 0
+        self.last = 0.0
+
+    def refill(self):
+        times = self.last + np.cumsum(self.rng.exponential(1.0 / self.total_rate, self.chunk))
+        nodes = self.rng.integers(0, self.n_nodes, self.chunk)
+        self.times = np.concatenate((self.times[self.pos:], times))
+        self.nodes = np.concatenate((self.nodes[self.pos:], nodes))
+        self.pos = 0
+        self.last = times[-1]
+
+    def peek(self):
+        """ Date de la prochaine arrivée """
+        if self.total_rate <= 0:
+            return NO_TIME
+        if self.pos >= len(self.times):
+            self.refill()
+        return self.times[self.pos]
+
+    def take(self, until):
+        """ Arrivées de date < until, dans l'ordre chronologique : (dates, nœuds) """
+        if self.total_rate <= 0:
+            return self.times[:0], self.nodes[:0]
+        while self.last < until:
+            self.refill()
+        end = np.searchsorted(self.times, until, side="left")
+        times, nodes = self.times[self.pos:end], self.nodes[self.pos:end]
+        self.pos = end
+        return times, nodes
+
+
+class NodeArrays:
+    """
+    État de tous les nœuds en tableaux parallèles (struct-of-arrays) : le
+    nœud i est la colonne i de chaque tableau. Les files d'émission sont des
+    anneaux de dates de mise en file, une ligne de queue_capacity par nœud.
+    """
+    def __init__(self, n_nodes, queue_capacity=64):
+        self.n_nodes = n_nodes
+        self.capacity = queue_capacity
+
+        self.state = np.zeros(n_nodes, dtype=np.int8)
+        self.retries = np.zeros(n_nodes, dtype=np.int16)
+        self.deadline = np.full(n_nodes, NO_TIME)  # Émission (BACKOFF) ou timeout (WAIT_ACK)
+        self.current = np.zeros(n_nodes)           # Date de mise en file du paquet courant
+
+        # Files (tail-drop comme TxQueue)
+        self.q_time = np.zeros((n_nodes, queue_capacity))
+        self.q_head = np.zeros(n_nodes, dtype=np.int64)
+        self.q_len = np.zeros(n_nodes, dtype=np.int64)
+
+    def enqueue(self, times, nodes):
+        """ Met en file des arrivées (dates croissantes) ; retourne le nombre de paquets rejetés """
+        if len(nodes) == 0:
+            return 0
+        # Rang de chaque arrivée parmi celles de son nœud (tri stable : l'ordre des dates est conservé)
+        order = np.argsort(nodes, kind="stable")
+        nodes, times = nodes[order], times[order]
+        rank = np.zeros(len(nodes), dtype=np.int64)
+        if len(nodes) > 1:
+            starts = np.flatnonzero(np.concatenate(([True], nodes[1:] != nodes[:-1])))
+            sizes = np.diff(np.append(starts, len(nodes)))
+            rank = np.arange(len(nodes)) - np.repeat(starts, sizes)
+
+        accepted = self.q_len[nodes] + rank < self.capacity
+        nodes, times, rank = nodes[accepted], times[accepted], rank[accepted]
+        slot = (self.q_head[nodes] + self.q_len[nodes] + rank) % self.capacity
+        self.q_time[nodes, slot] = times
+        np.add.at(self.q_len, nodes, 1)
+        return int(len(accepted) - accepted.sum())
+
+    def pop(self, nodes):
+        """ Retire la tête de file de nœuds distincts ; retourne leurs dates de mise en file """
+        times = self.q_time[nodes, self.q_head[nodes]]
+        self.q_head[nodes] = (self.q_head[nodes] + 1) % self.capacity
+        self.q_len[nodes] -= 1
+        return times
+
+
+class BatchChannel:
+    """
+    Canal partagé du moteur vectorisé : les trames en cours ou récentes sont
+    des tableaux parallèles, et deux trames qui se chevauchent sont toutes deux
+    perdues (même modèle que SharedChannel). Une trame n'est résolue qu'une
+    fois connues toutes les trames qui démarrent avant sa fin.
+    """
+    def __init__(self):
+        self.start = np.empty(0)
+        self.end = np.empty(0)
+        self.node = np.empty(0, dtype=np.int64)
+        self.kind = np.empty(0, dtype=np.int8)
+        self.collided = np.empty(0, dtype=bool)
+        self.resolved = np.empty(0, dtype=bool)
+
+        # Statistiques
+        self.frames_sent = 0
+        self.frames_collided = 0
+        self.frames_delivered = 0
+        self.data_delivered = 0
+        self.airtime_sent = 0.0
+        self.airtime_delivered = 0.0
+
+    def add(self, starts, duration, nodes, kind):
+        """ Début d'émission de trames de même durée (nodes : nœud émetteur ou destinataire de l'ACK) """
+        count = len(starts)
+        if count == 0:
+            return
+        ends = starts + duration
+        old = len(self.start)
+        all_start = np.concatenate((self.start, starts))
+        all_end = np.concatenate((self.end, ends))
+
+        # Chevauchements des nouvelles trames avec toutes les autres (quelques dizaines au plus)
+        hit = (starts[:, None] < all_end[None, :]) & (all_start[None, :] < ends[:, None])
+        hit[np.arange(count), old + np.arange(count)] = False
+        collided = np.concatenate((self.collided, hit.any(axis=1)))
+        collided |= hit.any(axis=0)
+
+        self.start, self.end, self.collided = all_start, all_end, collided
+        self.node = np.concatenate((self.node, nodes))
+        self.kind = np.concatenate((self.kind, np.full(count, kind, dtype=np.int8)))
+        self.resolved = np.concatenate((self.resolved, np.zeros(count, dtype=bool)))
+        self.frames_sent += count
+        self.airtime_sent += count * duration
+
+    def resolve(self, until, inclusive=False):
+        """
+        Trames terminées (fin < until, ou <= until) : retourne (nœuds, fins) des
+        trames de données intactes puis des ACK intacts.
+        """
+        empty = self.node[:0], self.end[:0]
+        if len(self.end) == 0:
+            return empty, empty
+        done = (self.end <= until) if inclusive else (self.end < until)
+        done &= ~self.resolved
+        if not done.any():
+            return empty, empty
+        self.resolved |= done
+        clean = done & ~self.collided
+        data = clean & (self.kind == DATA)
+        acks = clean & (self.kind == ACK)
+
+        self.frames_collided += int((done & self.collided).sum())
+        self.frames_delivered += int(clean.sum())
+        self.data_delivered += int(data.sum())
+        self.airtime_delivered += float((self.end[data] - self.start[data]).sum())
+        return (self.node[data], self.end[data]), (self.node[acks], self.end[acks])
+
+    def prune(self, before):
+        """ Oublie les trames résolues terminées avant `before` (plus rien ne peut les chevaucher) """
+        if not self.resolved.any():
+            return
+        keep = ~self.resolved | (self.end > before)
+        if not keep.all():
+            self.start, self.end = self.start[keep], self.end[keep]
+            self.node, self.kind = self.node[keep], self.kind[keep]
+            self.collided, self.resolved = self.collided[keep], self.resolved[keep]
+
+    def pending_end(self):
+        """ Fin la plus proche parmi les trames non résolues """
+        pending = self.end[~self.resolved]
+        return pending.min() if len(pending) else NO_TIME
+
+    def busy(self, t):
+        return bool(((self.start <= t) & (t < self.end)).any())
+
+    def stats(self, duration):
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_collided": self.frames_collided,
+            "frames_delivered": self.frames_delivered,
+            "data_delivered": self.data_delivered,
+            "offered_load": self.airtime_sent / duration,
+            "throughput": self.airtime_delivered / duration,
+        }
+
+
+class Outcome:
+    """ Bilan de bout en bout, comme le suivi de run_aloha_network """
+    def __init__(self):
+        self.offered = 0
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.retries = 0
+        self.latencies = []
+
+    def summary(self, channel, duration):
+        latencies = np.sort(np.concatenate(self.latencies)) if self.latencies else np.empty(0)
+        stats = channel.stats(duration)
+        stats.update({"offered": self.offered, "delivered": self.delivered, "failed": self.failed,
+                      "dropped": self.dropped, "retries": self.retries})
+        stats["delivery_ratio"] = self.delivered / self.offered if self.offered else float("nan")
+        for q in (50, 90, 99):
+            stats[f"latency_p{q}"] = float(percentile(latencies, q))
+        return stats
+
+
+def run_aloha_batch(n_nodes=100, rate=0.01, duration=1000.0, payload_size=20,
+                    bitrate=32000, ack_timeout=0.05, max_retries=2,
+                    min_backoff=0.5, max_backoff=1.5, slot_time=0.0, backoff_slots=0,
+                    queue_capacity=64, seed=None):
+    """
+    Équivalent vectorisé de run_aloha_network (n_nodes capteurs vers une
+    passerelle qui acquitte chaque trame reçue intacte), pour 10^4 à 10^5 nœuds.
+    Machine d'état du bloc simulé de run_aloha_network (aloha_mac_block de
+    SimMac) : émission immédiate (ou au prochain slot), timeout d'ACK, puis
+    backoff uniforme dans [min_backoff, max_backoff] (ou de 1 à backoff_slots
+    slots) tant que retries <= max_retries, abandon au-delà. Le bloc ALOHA.py
+    abandonne dès retries == max_retries et tire son backoff dans
+    [0.1, max_backoff] : pour le reproduire, passer max_retries - 1 et
+    min_backoff=0.1.
+
+    Le temps avance par fenêtres de durée W <= min(trame, ACK, min_backoff,
+    slot) : à l'intérieur d'une fenêtre aucune décision ne dépend d'une autre
+    décision de la même fenêtre, donc tous les nœuds concernés sont traités
+    ensemble. Les fenêtres sans activité sont sautées.
+    """
+    rng = np.random.default_rng(seed)
+    t_data = (HEADER_SIZE + payload_size) * 8.0 / bitrate
+    t_ack = (HEADER_SIZE + len(ACK_PAYLOAD)) * 8.0 / bitrate
+    window = min(t_data, t_ack)
+    if min_backoff > 0:
+        window = min(window, min_backoff)
+    if slot_time > 0:
+        window = min(window, slot_time)
+        backoff_slots = backoff_slots or max(1, int(round(max_backoff / slot_time)))
+    if ack_timeout < t_data + t_ack + window:
+        raise ValueError(f"ack_timeout must cover a frame and its ACK ({t_data + t_ack + window:.4f}s)")
+
+    nodes = NodeArrays(n_nodes, queue_capacity)
+    last_slot = np.full(n_nodes, -1, dtype=np.int64)
+    channel = BatchChannel()
+    arrivals = PoissonArrivals(n_nodes, rate, rng)
+    outcome = Outcome()
+
+    def slot_start(idx, now, slots):
+        """ slot_delay vectorisé : début du slot `slots` après le prochain, un slot par trame et par nœud """
+        index = np.ceil(now / slot_time - 1e-9).astype(np.int64) + slots
+        index = np.maximum(index, last_slot[idx] + 1)
+        last_slot[idx] = index
+        return index * slot_time
+
+    def start_next(idx, now):
+        """ process_next_packet : paquet suivant ou IDLE """
+        if len(idx) == 0:
+            return
+        has = nodes.q_len[idx] > 0
+        idle = idx[~has]
+        nodes.state[idle] = IDLE
+        nodes.deadline[idle] = NO_TIME
+        idx, now = idx[has], now[has]
+        enqueued = nodes.pop(idx)
+        nodes.current[idx] = enqueued
+        nodes.retries[idx] = 0
+        at = np.maximum(now, enqueued)
+        if slot_time > 0:
+            at = slot_start(idx, at, 0)
+        nodes.state[idx] = BACKOFF
+        nodes.deadline[idx] = at
+
+    def transmit(idx):
+        """ tx_frame : émission à deadline, puis attente de l'ACK """
+        if len(idx) == 0:
+            return
+        starts = nodes.deadline[idx]
+        nodes.state[idx] = WAIT_ACK
+        nodes.deadline[idx] = starts + ack_timeout
+        channel.add(starts, t_data, idx, DATA)
+
+    t = 0.0
+    while t < duration:
+        t_end = min(t + window, duration)
+
+        # 1. Arrivées : mise en file, départ immédiat des nœuds inactifs
+        times, idx = arrivals.take(t_end)
+        if len(idx):
+            outcome.offered += len(idx)
+            outcome.dropped += nodes.enqueue(times, idx)
+            idle = np.unique(idx[nodes.state[idx] == IDLE])
+            start_next(idle, np.full(len(idle), t))
+
+        due = np.flatnonzero(nodes.deadline < t_end)
+
+        # 2. Timeouts : handle_tx_failure
+        timeout = due[nodes.state[due] == WAIT_ACK]
+        if len(timeout):
+            now = nodes.deadline[timeout]
+            nodes.retries[timeout] += 1
+            retry = nodes.retries[timeout] <= max_retries
+            again, at = timeout[retry], now[retry]
+            if slot_time > 0:
+                at = slot_start(again, at, rng.integers(1, backoff_slots + 1, len(again)))
+            else:
+                at = at + rng.uniform(min_backoff, max_backoff, len(again))
+            nodes.state[again] = BACKOFF
+            nodes.deadline[again] = at
+
+            failed = timeout[~retry]
+            outcome.failed += len(failed)
+            outcome.retries += int(nodes.retries[failed].sum())
+            start_next(failed, now[~retry])
+
+        # 3. Émissions prévues dans la fenêtre (y compris après un abandon)
+        due = due[(nodes.state[due] == BACKOFF) & (nodes.deadline[due] < t_end)]
+        transmit(due)
+
+        # 4. Trames terminées : ACK de la passerelle, succès chez l'émetteur
+        (data_nodes, data_ends), (ack_nodes, ack_ends) = channel.resolve(t_end)
+        channel.add(data_ends, t_ack, data_nodes, ACK)
+        if len(ack_nodes):
+            ok = (nodes.state[ack_nodes] == WAIT_ACK) & (ack_ends <= nodes.deadline[ack_nodes])
+            ack_nodes, ack_ends = ack_nodes[ok], ack_ends[ok]
+            outcome.delivered += len(ack_nodes)
+            outcome.retries += int(nodes.retries[ack_nodes].sum())
+            outcome.latencies.append(ack_ends - nodes.current[ack_nodes])
+            start_next(ack_nodes, ack_ends)
+            transmit(ack_nodes[(nodes.state[ack_nodes] == BACKOFF) & (nodes.deadline[ack_nodes] < t_end)])
+        channel.prune(t_end)
+
+        # Fenêtre suivante : saut direct au prochain événement si le canal est libre
+        t = t_end
+        if channel.pending_end() == NO_TIME:
+            t = max(t, min(arrivals.peek(), nodes.deadline.min()))
+
+    return outcome.summary(channel, duration)
+
+
+def run_csma_batch(n_nodes=100, rate=0.01, duration=1000.0, payload_size=20,
+                   bitrate=32000, ack_timeout=0.05, max_retries=3,
+                   cw_min_low=8, cw_min_high=4, cw_max=64, priority=0, slot=0.001,
+                   queue_capacity=64, seed=None):
+    """
+    Équivalent vectorisé d'un réseau de csma_ca_mac_block vers une passerelle
+    qui acquitte chaque trame reçue intacte (ACK numéroté, émis sans écoute).
+    Machine d'état de general_work, appelé toutes les `slot` secondes :
+    le backoff (randint(0, cw-1) slots) ne décompte que si le canal est libre
+    au tick, timeout d'ACK vérifié aux ticks, cw doublée (bornée à cw_max)
+    tant que retries < max_retries, abandon au-delà.
+
+    Un compteur global de ticks libres remplace les décomptes individuels :
+    un nœud émet quand ce compteur atteint sa cible, fixée à l'entrée en backoff.
+    """
+    rng = np.random.default_rng(seed)
+    t_data = (HEADER_SIZE + ARQ_HEADER.size + payload_size) * 8.0 / bitrate
+    t_ack = (HEADER_SIZE + ARQ_ACK.size) * 8.0 / bitrate
+    if slot > t_ack:
+        raise ValueError(f"slot must not exceed the ACK airtime ({t_ack:.4f}s)")
+    if ack_timeout < t_data + t_ack:
+        raise ValueError(f"ack_timeout must cover a frame and its ACK ({t_data + t_ack:.4f}s)")
+    timeout_ticks = int(ack_timeout / slot) + 1  # now - wait_ack_start > ack_timeout
+    cw_start = cw_min_high if priority == 1 else cw_min_low
+
+    nodes = NodeArrays(n_nodes, queue_capacity)
+    cw = np.full(n_nodes, cw_start, dtype=np.int64)
+    slots = np.zeros(n_nodes, dtype=np.int64)   # Tirage du backoff en cours
+    target = np.full(n_nodes, NO_TIME)          # Valeur du compteur de ticks libres qui déclenche l'émission
+    timeout_tick = np.full(n_nodes, NO_TIME)
+    channel = BatchChannel()
+    arrivals = PoissonArrivals(n_nodes, rate, rng)
+    outcome = Outcome()
+    idle_ticks = 0
+
+    def start_backoff(idx):
+        """ Tirage du backoff ; la cible est fixée au premier tick qui suit """
+        slots[idx] = rng.integers(0, cw[idx])
+        nodes.state[idx] = BACKOFF
+        target[idx] = NO_TIME
+        timeout_tick[idx] = NO_TIME
+
+    def start_next(idx):
+        """ process_next_packet + handle_new_frame """
+        has = nodes.q_len[idx] > 0
+        idle = idx[~has]
+        nodes.state[idle] = IDLE
+        target[idle] = NO_TIME
+        timeout_tick[idle] = NO_TIME
+        idx = idx[has]
+        if len(idx) == 0:
+            return idx
+        nodes.current[idx] = nodes.pop(idx)
+        nodes.retries[idx] = 0
+        cw[idx] = cw_start
+        start_backoff(idx)
+        return idx
+
+    k = 0
+    entering = []  # Nœuds entrés en backoff entre deux ticks
+    while k * slot < duration:
+        tau = k * slot
+
+        # 1. Trames terminées depuis le tick précédent
+        (data_nodes, data_ends), (ack_nodes, ack_ends) = channel.resolve(tau, inclusive=True)
+        channel.add(data_ends, t_ack, data_nodes, ACK)
+        if len(ack_nodes):
+            ok = nodes.state[ack_nodes] == WAIT_ACK
+            ack_nodes, ack_ends = ack_nodes[ok], ack_ends[ok]
+            outcome.delivered += len(ack_nodes)
+            outcome.retries += int(nodes.retries[ack_nodes].sum())
+            outcome.latencies.append(ack_ends - nodes.current[ack_nodes])
+            entering.append(start_next(ack_nodes))
+
+        # 2. Arrivées depuis le tick précédent
+        times, idx = arrivals.take(tau)
+        if len(idx):
+            outcome.offered += len(idx)
+            outcome.dropped += nodes.enqueue(times, idx)
+            entering.append(start_next(np.unique(idx[nodes.state[idx] == IDLE])))
+
+        # 3. Tick : décompte si le canal est libre
+        busy = channel.busy(tau)
+        if not busy:
+            idle_ticks += 1
+        if entering:
+            # Premier tick d'un backoff commencé entre deux ticks : 0 slot émet tout de suite
+            first = np.concatenate(entering)
+            entering = []
+            target[first] = idle_ticks + np.maximum(slots[first], 1)
+            if not busy:
+                target[first[slots[first] == 0]] = idle_ticks
+        if not busy:
+            fire = np.flatnonzero(target <= idle_ticks)
+            nodes.state[fire] = WAIT_ACK
+            target[fire] = NO_TIME
+            timeout_tick[fire] = k + timeout_ticks
+            channel.add(np.full(len(fire), tau), t_data, fire, DATA)
+
+        # 4. Timeouts d'ACK
+        timeout = np.flatnonzero(timeout_tick <= k)
+        if len(timeout):
+            nodes.retries[timeout] += 1
+            retry = nodes.retries[timeout] < max_retries
+            again = timeout[retry]
+            cw[again] = np.minimum(cw[again] * 2, cw_max)
+            start_backoff(again)
+            failed = timeout[~retry]
+            outcome.failed += len(failed)
+            outcome.retries += int(nodes.retries[failed].sum())
+            restarted = np.concatenate((again, start_next(failed)))
+            # Backoff commencé sur un tick : décompte dès le tick suivant
+            target[restarted] = idle_ticks + np.maximum(slots[restarted], 1)
+        channel.prune(tau)
+
+        # Tick suivant : saut direct au prochain événement
+        next_k = min(np.ceil(arrivals.peek() / slot), timeout_tick.min())
+        pending_end = channel.pending_end()
+        if pending_end != NO_TIME:
+            # Canal occupé jusqu'à la prochaine fin de trame : aucun décompte
+            next_k = min(next_k, np.ceil(pending_end / slot))
+        else:
+            # Canal libre : chaque tick sauté est un tick libre
+            next_k = min(next_k, k + target.min() - idle_ticks)
+        next_k = max(k + 1, next_k)
+        if next_k == NO_TIME:
+            break
+        next_k = int(next_k)
+        if pending_end == NO_TIME:
+            idle_ticks += next_k - k - 1
+        k = next_k
+
+    return outcome.summary(channel, duration)
+
+
+if __name__ == "__main__":
+    from ChannelSimulator import run_aloha_network
+
+    # Même scénario : simulateur à événements (un objet par nœud) et moteur vectorisé
+    for n in (50, 100, 200):
+        ref = run_aloha_network(n_nodes=n, rate=0.05, duration=300.0, seed=1)
+        vec = run_aloha_batch(n_nodes=n, rate=0.05, duration=300.0, seed=1)
+        print(f"N={n:4d} événements S={ref['throughput']:.3f} PDR={ref['delivery_ratio']:.3f}  "
+              f"vectorisé S={vec['throughput']:.3f} PDR={vec['delivery_ratio']:.3f}")
+
+    for run in (run_aloha_batch, run_csma_batch):
+        t0 = time.perf_counter()
+        s = run(n_nodes=100000, rate=0.0005, duration=100.0, seed=1)
+        print(f"{run.__name__} N=100000 : {time.perf_counter() - t0:.1f}s  "
+              f"S={s['throughput']:.3f} PDR={s['delivery_ratio']:.3f} p99={s['latency_p99']:.3f}s")
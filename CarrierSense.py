@@ -0,0 +1,53 @@
+import threading
+import time
+
+
+class CarrierSenseState:
+    """
+    État du canal partagé en mémoire entre un moniteur (écrivain) et un ou
+    plusieurs blocs MAC (lecteurs) du même processus.
+    Sans verrou : l'état est un tuple (busy, timestamp) remplacé d'un bloc,
+    l'affectation d'un attribut étant atomique sous le GIL. Un lecteur voit
+    donc toujours un couple cohérent, jamais un état à moitié mis à jour.
+    """
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, busy=False):
+        self._value = (bool(busy), time.time())
+
+    @classmethod
+    def shared(cls, name="default"):
+        """
+        Instance partagée désignée par un nom (utilisable depuis les
+        paramètres d'un bloc GRC, qui ne peuvent pas passer d'objet).
+        """
+        with cls._registry_lock:
+            if name not in cls._registry:
+                cls._registry[name] = cls()
+            return cls._registry[name]
+
+    @classmethod
+    def resolve(cls, cs_state):
+        """ Accepte une instance, un nom d'instance partagée, ou None/"" """
+        if not cs_state:
+            return None
+        if isinstance(cs_state, str):
+            return cls.shared(cs_state)
+        return cs_state
+
+    def update(self, busy, timestamp=None):
+        """ Écriture par le moniteur de canal """
+        self._value = (bool(busy), time.time() if timestamp is None else timestamp)
+
+    def read(self):
+        """ Retourne (busy, timestamp de la dernière mise à jour) """
+        return self._value
+
+    @property
+    def busy(self):
+        return self._value[0]
+
+    def age(self, now=None):
+        """ Ancienneté (s) de la dernière mise à jour """
+        return (time.time() if now is None else now) - self._value[1]
@@ -0,0 +1,237 @@
+import random
+
+from EventScheduler import EventScheduler
+from FrameCodec import BROADCAST_MAC, HEADER_SIZE
+from SimMac import aloha_mac_block
+
+
+class SimPacket(str):
+    """
+    Payload simulé portant sa date de mise en file : la MAC le rend tel quel
+    dans tx_success / tx_failed, quel que soit le paquet évincé entre-temps.
+    """
+    def __new__(cls, data, enqueued_at):
+        packet = super().__new__(cls, data)
+        packet.enqueued_at = enqueued_at
+        return packet
+
+
+def frame_size(frame):
+    """
+    Taille en octets d'une trame simulée (src, dst, type, data, seq).
+    """
+    data = frame[3]
+    if isinstance(data, str):
+        return HEADER_SIZE + len(data.encode("utf-8"))
+    return HEADER_SIZE + len(data)
+
+
+class Transmission:
+    """
+    Une trame sur le canal : intervalle [start, end[ et état de collision.
+    """
+    __slots__ = ("sender", "frame", "start", "end", "collided")
+
+    def __init__(self, sender, frame, start, end):
+        self.sender = sender
+        self.frame = frame
+        self.start = start
+        self.end = end
+        self.collided = False
+
+
+class SharedChannel:
+    """
+    Médium radio partagé entre N blocs aloha_mac_block (mock de SimMac).
+    Chaque trame occupe le canal pendant sa durée d'émission ; deux trames dont
+    les intervalles se chevauchent sont toutes deux perdues. Seules les trames
+    sans collision sont remises au destinataire à la fin de leur émission.
+
+    Index d'intervalles : les émissions démarrent dans l'ordre chronologique
+    (temps virtuel monotone), donc une nouvelle trame chevauche une trame
+    précédente si et seulement si elle démarre avant la fin la plus tardive
+    déjà vue (busy_until). Parmi les trames actives, une seule au plus n'est
+    pas encore marquée en collision : le test est en O(1) par trame.
+    """
+    def __init__(self, scheduler, bitrate=32000, frame_size=frame_size):
+        self.scheduler = scheduler
+        self.bitrate = bitrate  # bits/s
+        self.frame_size = frame_size
+
+        self.nodes_by_name = {}
+        self.nodes_by_mac = {}
+        self.app_listener = None  # Optionnel : f(node, msg) pour les messages app_out
+
+        # Index des émissions en cours
+        self.busy_until = 0.0
+        self.last_clean = None  # Dernière émission encore intacte
+
+        # Statistiques
+        self.frames_sent = 0
+        self.frames_collided = 0
+        self.frames_delivered = 0
+        self.data_delivered = 0
+        self.airtime_sent = 0.0
+        self.airtime_delivered = 0.0
+
+    def attach(self, node):
+        """ Branche un bloc sur le canal (via son simulator_callback) """
+        self.nodes_by_name[node.name] = node
+        self.nodes_by_mac[node.mac_addr] = node
+        node.simulator_callback = self.on_publish
+        return node
+
+    def airtime(self, frame):
+        return self.frame_size(frame) * 8.0 / self.bitrate
+
+    def on_publish(self, sender_name, port, msg):
+        if port == "phy_out":
+            self.transmit(self.nodes_by_name[sender_name], msg)
+        elif port == "app_out" and self.app_listener is not None:
+            self.app_listener(self.nodes_by_name[sender_name], msg)
+
+    def transmit(self, sender, frame):
+        """ Début d'émission d'une trame à l'instant courant """
+        now = self.scheduler.now()
+        duration = self.airtime(frame)
+        tx = Transmission(sender, frame, now, now + duration)
+
+        if now < self.busy_until:
+            # Chevauchement avec au moins une émission en cours
+            tx.collided = True
+            if self.last_clean is not None and self.last_clean.end > now:
+                self.last_clean.collided = True
+            self.last_clean = None
+        else:
+            self.last_clean = tx
+
+        if tx.end > self.busy_until:
+            self.busy_until = tx.end
+
+        self.frames_sent += 1
+        self.airtime_sent += duration
+        self.scheduler.schedule_at(tx.end, self.end_of_transmission, tx)
+        return tx
+
+    def end_of_transmission(self, tx):
+        if tx is self.last_clean:
+            self.last_clean = None
+        if tx.collided:
+            self.frames_collided += 1
+            return
+
+        self.frames_delivered += 1
+        if tx.frame[2] == 0:
+            self.data_delivered += 1
+            self.airtime_delivered += tx.end - tx.start
+
+        dst = tx.frame[1]
+        if dst == BROADCAST_MAC:
+            for node in self.nodes_by_mac.values():
+                if node is not tx.sender:
+                    node._handler_phy_in(tx.frame)
+        else:
+            node = self.nodes_by_mac.get(dst)
+            if node is not None:
+                node._handler_phy_in(tx.frame)
+
+    def stats(self, duration):
+        """
+        Bilan de la simulation (charge offerte G et débit utile S normalisés).
+        """
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_collided": self.frames_collided,
+            "frames_delivered": self.frames_delivered,
+            "data_delivered": self.data_delivered,
+            "offered_load": self.airtime_sent / duration,
+            "throughput": self.airtime_delivered / duration,
+        }
+
+
+def percentile(sorted_values, q):
+    """ Percentile (q entre 0 et 100) d'une liste (ou d'un tableau NumPy) déjà triée """
+    if len(sorted_values) == 0:
+        return float("nan")
+    index = min(int(round(q / 100.0 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def slot_time_for(payload_size, bitrate=32000):
+    """ Slot minimal : une trame de données puis son ACK """
+    data = frame_size((0, 0, 0, "x" * payload_size, 0))
+    ack = frame_size((0, 0, 1, "ACK", 0))
+    return (data + ack) * 8.0 / bitrate
+
+
+def run_aloha_network(n_nodes=100, rate=0.01, duration=1000.0, payload_size=20,
+                      bitrate=32000, ack_timeout=0.05, max_retries=2,
+                      min_backoff=0.5, max_backoff=1.5, slot_time=0.0, backoff_slots=0,
+                      block_ack_delay=0.0, seed=None):
+    """
+    Simule n_nodes capteurs ALOHA envoyant vers une passerelle (MAC 0),
+    avec des arrivées de Poisson de `rate` paquets/s par nœud.
+    slot_time > 0 : slotted ALOHA sur l'horloge virtuelle (voir slot_time_for).
+    block_ack_delay > 0 : la passerelle regroupe ses ACK (à garder sous ack_timeout).
+    Tous les tirages aléatoires dérivent de `seed` : même graine, même résultat.
+    """
+    rng = random.Random(seed)
+    scheduler = EventScheduler()
+    channel = SharedChannel(scheduler, bitrate=bitrate)
+
+    params = dict(scheduler=scheduler, ack_timeout=ack_timeout, max_retries=max_retries,
+                  min_backoff=min_backoff, max_backoff=max_backoff, rng=rng, verbose=False,
+                  slot_time=slot_time, backoff_slots=backoff_slots, block_ack_delay=block_ack_delay)
+    gateway = channel.attach(aloha_mac_block(name="Gateway", mac_addr=0, **params))
+    nodes = [channel.attach(aloha_mac_block(name=f"Node_{i}", mac_addr=i, dst_mac=0, **params))
+             for i in range(1, n_nodes + 1)]
+
+    payload = "x" * payload_size
+
+    outcome = {"offered": 0, "delivered": 0, "failed": 0, "dropped": 0, "retries": 0}
+    latencies = []
+
+    def arrival(node):
+        outcome["offered"] += 1
+        dropped = node.tx_queue.dropped
+        # Date de mise en file portée par le paquet : rien à corriger quand la
+        # file évince un paquet (le nouveau ou un plus ancien, selon la politique)
+        node._handler_app_in(SimPacket(payload, scheduler.now()))
+        outcome["dropped"] += node.tx_queue.dropped - dropped
+        scheduler.schedule(rng.expovariate(rate), arrival, node)
+
+    def on_app_out(node, msg):
+        key = msg[0]
+        if key not in ("tx_success", "tx_failed"):
+            return
+        outcome["retries"] += node.retries
+        if key == "tx_success":
+            outcome["delivered"] += 1
+            latencies.append(scheduler.now() - msg[1].enqueued_at)
+        else:
+            outcome["failed"] += 1
+
+    channel.app_listener = on_app_out
+    for node in nodes:
+        scheduler.schedule(rng.expovariate(rate), arrival, node)
+
+    scheduler.run(until=duration)
+
+    latencies.sort()
+    stats = channel.stats(duration)
+    stats.update(outcome)
+    stats["duplicates"] = gateway.dedup.duplicates  # Retransmissions après perte d'ACK
+    stats["delivery_ratio"] = outcome["delivered"] / outcome["offered"] if outcome["offered"] else float("nan")
+    stats["latency_p50"] = percentile(latencies, 50)
+    stats["latency_p90"] = percentile(latencies, 90)
+    stats["latency_p99"] = percentile(latencies, 99)
+    return stats
+
+
+if __name__ == "__main__":
+    slot = slot_time_for(20)
+    for n in (10, 50, 100, 200, 500):
+        for label, slot_time in (("pur", 0.0), ("slotted", slot)):
+            s = run_aloha_network(n_nodes=n, rate=0.05, duration=1000.0, slot_time=slot_time, seed=1)
+            print(f"N={n:4d} {label:8s} G={s['offered_load']:.3f}  S={s['throughput']:.3f}  "
+                  f"collisions={s['frames_collided']}/{s['frames_sent']}")
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+
+from FrameCodec import seq_diff
+
+
+class DuplicateCache:
+    """
+    Détection des doublons côté réception, par clé (src_mac, seq).
+    Dictionnaire ordonné utilisé en LRU : recherche, insertion et éviction
+    en O(1). La mémoire reste bornée à `capacity` entrées quel que soit le
+    nombre de sources ; avec `ttl`, une entrée non revue depuis ttl secondes
+    est oubliée (les numéros de séquence finissent par reboucler).
+    Avec `window`, un numéro qui recule de plus de window derrière le plus
+    récent de sa source signale un redémarrage de l'émetteur : les entrées
+    de cette source sont oubliées au lieu de rejeter la nouvelle session.
+    """
+    def __init__(self, capacity=4096, ttl=None, clock=time.time, window=None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self.window = window
+        self.entries = OrderedDict()  # (src_mac, seq) -> instant de dernière réception
+        self.newest = OrderedDict()   # src_mac -> numéro le plus récent (LRU, même borne)
+
+        # Compteurs
+        self.duplicates = 0
+        self.evicted = 0
+        self.expired = 0
+        self.restarts = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def seen(self, src_mac, seq):
+        """
+        Enregistre (src_mac, seq) et retourne True si c'est un doublon.
+        """
+        key = (src_mac, seq)
+        now = self.clock()
+        if self.ttl is not None:
+            self.expire(now)
+        if self.window is not None:
+            self.track(src_mac, seq)
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.entries[key] = now
+            self.duplicates += 1
+            return True
+
+        self.entries[key] = now
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evicted += 1
+        return False
+
+    def track(self, src_mac, seq):
+        """ Suit le numéro le plus récent de src_mac et détecte un redémarrage """
+        newest = self.newest.get(src_mac)
+        if newest is not None and seq_diff(seq, newest) < -self.window:
+            self.forget(src_mac)
+            self.restarts += 1
+            newest = None
+        if newest is None or seq_diff(seq, newest) > 0:
+            self.newest[src_mac] = seq
+        self.newest.move_to_end(src_mac)
+        if len(self.newest) > self.capacity:
+            self.newest.popitem(last=False)
+
+    def forget(self, src_mac):
+        """ Oublie toutes les entrées de src_mac (parcours complet, événement rare) """
+        for key in [key for key in self.entries if key[0] == src_mac]:
+            del self.entries[key]
+        self.newest.pop(src_mac, None)
+
+    def expire(self, now):
+        """
+        Oublie les entrées trop anciennes : l'ordre LRU est aussi celui des
+        dates de dernière réception, elles sont donc en tête (coût amorti O(1)).
+        """
+        while self.entries:
+            key, last_seen = next(iter(self.entries.items()))
+            if now - last_seen <= self.ttl:
+                break
+            del self.entries[key]
+            self.expired += 1
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "duplicates": self.duplicates,
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "restarts": self.restarts,
+        }
@@ -0,0 +1,182 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class Event:
+    """
+    Évènement planifié : une fonction à appeler à un instant donné.
+    """
+    __slots__ = ("time", "callback", "args", "cancelled")
+
+    def __init__(self, time, callback, args):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """ Annule l'évènement (il sera ignoré au dépilage) """
+        self.cancelled = True
+
+
+class EventScheduler:
+    """
+    Ordonnanceur à évènements discrets avec horloge virtuelle.
+    Les évènements sont rangés dans un tas (heapq) trié par date ; le temps
+    saute directement d'un évènement au suivant, sans attente réelle.
+    Interface utilisée par les blocs MAC : now(), schedule(), cancel().
+    """
+    threaded = False  # Les callbacks s'exécutent dans le thread appelant run()
+
+    def __init__(self, start_time=0.0):
+        self._now = start_time
+        self._heap = []
+        self._counter = itertools.count()  # Départage les évènements simultanés (FIFO)
+        self.events_processed = 0
+
+    def now(self):
+        """ Temps virtuel courant (en secondes) """
+        return self._now
+
+    def schedule(self, delay, callback, *args):
+        """ Planifie callback(*args) dans `delay` secondes. Retourne l'Event. """
+        return self.schedule_at(self._now + max(delay, 0.0), callback, *args)
+
+    def schedule_at(self, when, callback, *args):
+        """ Planifie callback(*args) à la date absolue `when` """
+        event = Event(max(when, self._now), callback, args)
+        heapq.heappush(self._heap, (event.time, next(self._counter), event))
+        return event
+
+    def cancel(self, event):
+        """ Annulation paresseuse : l'évènement reste dans le tas mais est ignoré """
+        if event is not None:
+            event.cancel()
+
+    def pending(self):
+        """ Nombre d'évènements encore dans le tas (annulés compris) """
+        return len(self._heap)
+
+    def step(self):
+        """
+        Exécute le prochain évènement non annulé.
+        Retourne False si la file est vide.
+        """
+        while self._heap:
+            when, _, event = heapq.heappop(self._heap)
+            if event.cancelled:
+                continue
+            self._now = when
+            self.events_processed += 1
+            event.callback(*event.args)
+            return True
+        return False
+
+    def run(self, until=None, max_events=None):
+        """
+        Fait avancer la simulation jusqu'à `until` (temps virtuel) ou
+        jusqu'à épuisement des évènements / de `max_events`.
+        """
+        count = 0
+        while self._heap:
+            if max_events is not None and count >= max_events:
+                break
+            when, _, event = self._heap[0]
+            if until is not None and when > until:
+                break
+            heapq.heappop(self._heap)
+            if event.cancelled:
+                continue
+            self._now = when
+            self.events_processed += 1
+            event.callback(*event.args)
+            count += 1
+
+        if until is not None and self._now < until:
+            self._now = until
+        return count
+
+
+class RealTimeScheduler:
+    """
+    Ordonnanceur temps réel partagé (même interface que EventScheduler).
+    Un unique thread dort jusqu'à la prochaine échéance du tas : aucun travail
+    tant qu'aucun timer n'est armé, quel que soit le nombre de blocs abonnés.
+    Les callbacks s'exécutent dans ce thread : aux blocs de se resynchroniser.
+    """
+    threaded = True
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    @classmethod
+    def shared(cls):
+        """ Instance unique partagée par tous les blocs du processus """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def now(self):
+        return time.time()
+
+    def schedule(self, delay, callback, *args):
+        return self.schedule_at(self.now() + max(delay, 0.0), callback, *args)
+
+    def schedule_at(self, when, callback, *args):
+        event = Event(when, callback, args)
+        with self._cond:
+            heapq.heappush(self._heap, (when, next(self._counter), event))
+            if self._thread is None:
+                self._running = True
+                self._thread = threading.Thread(target=self._loop, name="RealTimeScheduler", daemon=True)
+                self._thread.start()
+            # Réveille le thread si cette échéance est désormais la plus proche
+            if self._heap[0][2] is event:
+                self._cond.notify()
+        return event
+
+    def cancel(self, event):
+        if event is not None:
+            event.cancel()
+
+    def stop(self):
+        """ Arrête le thread (les échéances en attente sont abandonnées) """
+        with self._cond:
+            self._running = False
+            self._heap.clear()
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - self.now()
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+                    _, _, event = heapq.heappop(self._heap)
+                    if not event.cancelled:
+                        break
+                else:
+                    return
+            # Callback hors verrou pour ne pas bloquer schedule()/cancel()
+            try:
+                event.callback(*event.args)
+            except Exception as e:
+                print(f"Error in timer callback: {e}")
@@ -0,0 +1,357 @@
+import struct
+import numpy as np
+
+# En-tête MAC : src (4 octets), dst (4 octets), priority (1 octet), length (2 octets)
+# ! = réseau (big-endian), I = unsigned int, B = unsigned char, H = unsigned short
+HEADER = struct.Struct("!IIBH")
+
+# Octet priority : priorité sur les 4 bits de poids faible, type de trame sur
+# les 4 bits de poids fort (0 = données ou ACK simple, comme les trames existantes).
+# Le payload n'est jamais interprété d'après son contenu : seuls ces bits comptent.
+PRIORITY_MASK = 0x0F
+FLAG_ARQ = 0x80      # Payload précédé du numéro de séquence (ARQ_HEADER)
+FLAG_ARQ_ACK = 0x40  # Payload = ACK ARQ (ARQ_ACK)
+FLAG_AGGREGATE = 0x20  # Payload = sous-trames agrégées (AGGREGATE_HEADER)
+FLAG_BLOCK_ACK = 0x10  # Payload = block-ACK de passerelle (BLOCK_ACK_HEADER)
+HEADER_SIZE = HEADER.size
+MAX_PAYLOAD = 0xFFFF
+BROADCAST_MAC = 0xFFFFFFFF
+ACK_PAYLOAD = b'ACK'
+
+# Mot de synchro placé devant chaque trame dans le flux d'octets vers/depuis la PHY
+SYNC_WORD = b'\x7e\xa5\x5a\x81'
+
+# Agrégation (trames marquées FLAG_AGGREGATE) : nombre de sous-trames,
+# puis pour chacune sa longueur (2 octets) et ses données
+AGGREGATE_HEADER = struct.Struct("!B")
+RECORD_HEADER = struct.Struct("!H")
+MAX_RECORDS = 0xFF
+
+# ARQ à fenêtre glissante (trames marquées FLAG_ARQ / FLAG_ARQ_ACK, l'en-tête
+# fixe !IIBH reste inchangé pour le deframer et les rafales)
+# Données : numéro de séquence (modulo 2^16) en tête de payload
+# ACK : ACK cumulatif (tout ce qui précède est reçu), bitmap sélectif
+ARQ_HEADER = struct.Struct("!H")
+ARQ_ACK = struct.Struct("!HI")
+SEQ_MODULO = 0x10000
+ACK_BITMAP_BITS = 32
+
+# Block-ACK de passerelle (trame broadcast marquée FLAG_BLOCK_ACK) : nombre
+# d'entrées, puis une entrée par nœud acquitté : adresse, ACK cumulatif et
+# bitmap ARQ (selective_ack_state(seq) pour un nœud en stop-and-wait)
+BLOCK_ACK_HEADER = struct.Struct("!B")
+BLOCK_ACK_ENTRY_DTYPE = np.dtype([("mac", ">u4"), ("cumulative", ">u2"), ("bitmap", ">u4")])
+MAX_BLOCK_ACK_ENTRIES = 0xFF
+
+# Même en-tête vu comme dtype structuré NumPy (big-endian, sans alignement)
+HEADER_DTYPE = np.dtype([
+    ("src_mac", ">u4"),
+    ("dst_mac", ">u4"),
+    ("priority", "u1"),
+    ("length", ">u2"),
+])
+
+
+def encode_frame_into(buf, offset, src_mac, dst_mac, priority, data, flags=0):
+    """
+    Écrit une trame (en-tête + données) dans `buf` à partir de `offset`,
+    sans objet intermédiaire. Retourne l'offset qui suit la trame.
+    """
+    length = len(data)
+    if length > MAX_PAYLOAD:
+        raise ValueError(f"Payload too large: {length} > {MAX_PAYLOAD}")
+    HEADER.pack_into(buf, offset, src_mac, dst_mac, (priority & PRIORITY_MASK) | flags, length)
+    start = offset + HEADER_SIZE
+    buf[start:start + length] = data
+    return start + length
+
+
+def build_frame(src_mac, dst_mac, priority, data, flags=0):
+    """
+    Construit la trame MAC et la retourne sous forme de bytes.
+    """
+    buf = bytearray(HEADER_SIZE + len(data))
+    encode_frame_into(buf, 0, src_mac, dst_mac, priority, data, flags)
+    return bytes(buf)
+
+
+def split_priority(value):
+    """ Octet priority de l'en-tête -> (priorité, type de trame) """
+    return value & PRIORITY_MASK, value & ~PRIORITY_MASK & 0xFF
+
+
+def parse_frame_flags(frame_bytes, offset=0):
+    """
+    Décode une trame MAC.
+    Retourne (src_mac, dst_mac, priority, flags, payload) où payload est une
+    memoryview sur le buffer d'origine (aucune copie).
+    """
+    src_mac, dst_mac, value, length = HEADER.unpack_from(frame_bytes, offset)
+    start = offset + HEADER_SIZE
+    payload = memoryview(frame_bytes)[start:start + length]
+    return (src_mac, dst_mac) + split_priority(value) + (payload,)
+
+
+def parse_frame(frame_bytes, offset=0):
+    """
+    Décode une trame MAC.
+    Retourne (src_mac, dst_mac, priority, payload) où payload est une
+    memoryview sur le buffer d'origine (aucune copie).
+    """
+    src_mac, dst_mac, priority, _, payload = parse_frame_flags(frame_bytes, offset)
+    return src_mac, dst_mac, priority, payload
+
+
+def build_frame_array(src_mac, dst_mac, priority, data, flags=0):
+    """
+    Construit la trame MAC dans un tableau NumPy uint8, à convertir en
+    u8vector avec AppMessage.to_u8vector (qui recopie les octets).
+    """
+    length = len(data)
+    if length > MAX_PAYLOAD:
+        raise ValueError(f"Payload too large: {length} > {MAX_PAYLOAD}")
+    frame = np.empty(HEADER_SIZE + length, dtype=np.uint8)
+    HEADER.pack_into(frame, 0, src_mac, dst_mac, (priority & PRIORITY_MASK) | flags, length)
+    frame[HEADER_SIZE:] = np.frombuffer(data, dtype=np.uint8)
+    return frame
+
+
+class FrameEncoder:
+    """
+    Encodeur réutilisable : les trames sont écrites dans un bytearray
+    préalloué une fois pour toutes (pas d'allocation par trame).
+    """
+    def __init__(self, max_payload=MAX_PAYLOAD):
+        self.buffer = bytearray(HEADER_SIZE + max_payload)
+        self.view = memoryview(self.buffer)
+
+    def encode(self, src_mac, dst_mac, priority, data):
+        """
+        Retourne une memoryview sur la trame encodée.
+        Attention : elle n'est valide que jusqu'au prochain appel à encode().
+        """
+        end = encode_frame_into(self.buffer, 0, src_mac, dst_mac, priority, data)
+        return self.view[:end]
+
+
+def encode_batch(frames, slot_size=None):
+    """
+    Encode une liste de trames (src, dst, priority, data) dans un seul buffer
+    contigu. Par défaut les trames sont mises bout à bout ; avec `slot_size`,
+    chaque trame occupe un emplacement fixe (complété par des zéros).
+    """
+    if slot_size is None:
+        total = sum(HEADER_SIZE + len(f[3]) for f in frames)
+    else:
+        total = slot_size * len(frames)
+    buf = bytearray(total)
+
+    offset = 0
+    for src_mac, dst_mac, priority, data in frames:
+        if slot_size is not None and HEADER_SIZE + len(data) > slot_size:
+            raise ValueError(f"Frame does not fit in slot of {slot_size} bytes")
+        end = encode_frame_into(buf, offset, src_mac, dst_mac, priority, data)
+        offset = offset + slot_size if slot_size is not None else end
+    return buf
+
+
+def iter_frames(buf, slot_size=None):
+    """
+    Parcourt les trames d'un buffer contigu produit par encode_batch().
+    Chaque payload est une memoryview sur `buf` (aucune copie).
+    """
+    view = memoryview(buf)
+    offset = 0
+    end = len(view)
+    while offset + HEADER_SIZE <= end:
+        src_mac, dst_mac, priority, length = HEADER.unpack_from(view, offset)
+        start = offset + HEADER_SIZE
+        yield src_mac, dst_mac, priority, view[start:start + length]
+        offset = offset + slot_size if slot_size is not None else start + length
+
+
+def decode_batch(buf, slot_size=None):
+    """ Liste de toutes les trames (src, dst, priority, payload) d'un buffer """
+    return list(iter_frames(buf, slot_size))
+
+
+def aggregate_size(sizes):
+    """ Taille du payload agrégé pour des sous-trames de tailles `sizes` """
+    return AGGREGATE_HEADER.size + sum(RECORD_HEADER.size + n for n in sizes)
+
+
+def pack_aggregate(payloads):
+    """
+    Regroupe plusieurs payloads dans un seul payload de trame
+    (liste de sous-trames préfixées par leur longueur), à émettre avec
+    FLAG_AGGREGATE.
+    """
+    if len(payloads) > MAX_RECORDS:
+        raise ValueError(f"Too many records: {len(payloads)} > {MAX_RECORDS}")
+    buf = bytearray(aggregate_size(len(p) for p in payloads))
+    AGGREGATE_HEADER.pack_into(buf, 0, len(payloads))
+    offset = AGGREGATE_HEADER.size
+    for data in payloads:
+        RECORD_HEADER.pack_into(buf, offset, len(data))
+        offset += RECORD_HEADER.size
+        buf[offset:offset + len(data)] = data
+        offset += len(data)
+    return bytes(buf)
+
+
+def is_aggregate(flags):
+    return bool(flags & FLAG_AGGREGATE)
+
+
+def unpack_aggregate(payload):
+    """
+    Sous-trames d'un payload agrégé, en memoryviews (aucune copie).
+    Lève ValueError si les longueurs ne correspondent pas à la taille du payload.
+    """
+    view = memoryview(payload)
+    if len(view) < AGGREGATE_HEADER.size:
+        raise ValueError("Aggregate too short")
+    (count,) = AGGREGATE_HEADER.unpack_from(view, 0)
+    offset = AGGREGATE_HEADER.size
+    records = []
+    for _ in range(count):
+        if offset + RECORD_HEADER.size > len(view):
+            raise ValueError(f"Aggregate truncated: {len(records)}/{count} records")
+        (length,) = RECORD_HEADER.unpack_from(view, offset)
+        offset += RECORD_HEADER.size
+        if offset + length > len(view):
+            raise ValueError(f"Aggregate record overflows payload: {length} bytes at {offset}")
+        records.append(view[offset:offset + length])
+        offset += length
+    if offset != len(view):
+        raise ValueError(f"Aggregate has {len(view) - offset} trailing bytes")
+    return records
+
+
+def slot_dtype(slot_size):
+    """
+    dtype d'un emplacement fixe : en-tête + payload de slot_size - HEADER_SIZE octets.
+    """
+    return np.dtype(HEADER_DTYPE.descr + [("payload", "u1", (slot_size - HEADER_SIZE,))])
+
+
+def view_slots(buf, slot_size):
+    """
+    Vue (sans copie) d'un buffer de trames à emplacements fixes comme tableau
+    structuré : frames["src_mac"], frames["dst_mac"], frames["length"]...
+    """
+    count = len(buf) // slot_size
+    return np.frombuffer(buf, dtype=slot_dtype(slot_size), count=count)
+
+
+_ACK_BYTES = np.frombuffer(ACK_PAYLOAD, dtype=np.uint8)
+
+
+def rx_masks(frames, mac_addr):
+    """
+    Tri vectorisé d'une rafale de trames reçues.
+    Retourne (data_mask, ack_mask) pour les trames adressées à mac_addr ou en broadcast.
+    """
+    dst = frames["dst_mac"]
+    for_me = (dst == mac_addr) | (dst == BROADCAST_MAC)
+    n = len(ACK_PAYLOAD)
+    is_ack = (frames["length"] == n) & np.all(frames["payload"][:, :n] == _ACK_BYTES, axis=1)
+    is_ack &= (frames["priority"] & (0xFF & ~PRIORITY_MASK)) == 0 # Masque en uint8 (numpy 2)
+    return for_me & ~is_ack, for_me & is_ack
+
+
+def seq_diff(a, b):
+    """ a - b modulo SEQ_MODULO, ramené dans [-SEQ_MODULO/2, SEQ_MODULO/2[ """
+    d = (a - b) % SEQ_MODULO
+    return d - SEQ_MODULO if d >= SEQ_MODULO // 2 else d
+
+
+def pack_arq(seq, data):
+    """ Payload d'une trame FLAG_ARQ : numéro de séquence + données """
+    buf = bytearray(ARQ_HEADER.size + len(data))
+    ARQ_HEADER.pack_into(buf, 0, seq % SEQ_MODULO)
+    buf[ARQ_HEADER.size:] = data
+    return bytes(buf)
+
+
+def is_arq(flags):
+    return bool(flags & FLAG_ARQ)
+
+
+def unpack_arq(payload):
+    """ Retourne (seq, données) ; les données sont une memoryview (aucune copie) """
+    if len(payload) < ARQ_HEADER.size:
+        raise ValueError(f"ARQ payload too short: {len(payload)} bytes")
+    (seq,) = ARQ_HEADER.unpack_from(payload, 0)
+    return seq, memoryview(payload)[ARQ_HEADER.size:]
+
+
+def pack_arq_ack(cumulative, bitmap):
+    """
+    ACK ARQ : toutes les trames de seq < cumulative sont reçues, et le bit i
+    de bitmap indique la réception de cumulative + i.
+    """
+    return ARQ_ACK.pack(cumulative % SEQ_MODULO, bitmap & 0xFFFFFFFF)
+
+
+def selective_ack_state(seq):
+    """
+    (cumulative, bitmap) qui acquitte la seule trame seq, pour un récepteur
+    sans fenêtre : le cumulatif est placé en bas d'une fenêtre qui se termine
+    sur seq, il ne couvre donc aucune trame encore en vol.
+    """
+    return (seq - ACK_BITMAP_BITS + 1) % SEQ_MODULO, 1 << (ACK_BITMAP_BITS - 1)
+
+
+def pack_selective_ack(seq):
+    """ ACK ARQ de la seule trame seq (voir selective_ack_state) """
+    return pack_arq_ack(*selective_ack_state(seq))
+
+
+def is_arq_ack(flags, payload):
+    return bool(flags & FLAG_ARQ_ACK) and len(payload) == ARQ_ACK.size
+
+
+def unpack_arq_ack(payload):
+    """ Retourne (cumulative, bitmap) """
+    return ARQ_ACK.unpack_from(payload, 0)
+
+
+def arq_acked(seq, cumulative, bitmap):
+    """ Vrai si l'ACK (cumulative, bitmap) couvre la trame seq """
+    d = seq_diff(seq, cumulative)
+    return d < 0 or (d < ACK_BITMAP_BITS and (bitmap >> d) & 1 == 1)
+
+
+def pack_block_ack(entries):
+    """ Payload de block-ACK pour une liste de (mac, cumulative, bitmap) """
+    entries = list(entries)
+    if len(entries) > MAX_BLOCK_ACK_ENTRIES:
+        raise ValueError(f"Too many block-ACK entries: {len(entries)} > {MAX_BLOCK_ACK_ENTRIES}")
+    buf = bytearray(BLOCK_ACK_HEADER.size + len(entries) * BLOCK_ACK_ENTRY_DTYPE.itemsize)
+    BLOCK_ACK_HEADER.pack_into(buf, 0, len(entries))
+    table = np.frombuffer(buf, dtype=BLOCK_ACK_ENTRY_DTYPE, offset=BLOCK_ACK_HEADER.size)
+    if entries:
+        table[:] = entries
+    return bytes(buf)
+
+
+def is_block_ack(flags, payload):
+    return (bool(flags & FLAG_BLOCK_ACK) and len(payload) >= BLOCK_ACK_HEADER.size
+            and len(payload) == BLOCK_ACK_HEADER.size + payload[0] * BLOCK_ACK_ENTRY_DTYPE.itemsize)
+
+
+def unpack_block_ack(payload):
+    """ Entrées d'un block-ACK, en tableau structuré (mac, cumulative, bitmap), sans copie """
+    count = payload[0]
+    return np.frombuffer(payload, dtype=BLOCK_ACK_ENTRY_DTYPE, count=count, offset=BLOCK_ACK_HEADER.size)
+
+
+def find_block_ack(payload, mac_addr):
+    """ (cumulative, bitmap) de l'entrée de mac_addr dans un block-ACK, ou None """
+    table = unpack_block_ack(payload)
+    idx = np.flatnonzero(table["mac"] == mac_addr)
+    if len(idx) == 0:
+        return None
+    entry = table[idx[0]]
+    return int(entry["cumulative"]), int(entry["bitmap"])
@@ -0,0 +1,201 @@
+import time
+
+
+class LatencyHistogram:
+    """
+    Histogramme de latences façon HDR : buckets log-linéaires sur des entiers
+    (microsecondes). Les valeurs < 2^precision ont un bucket chacune, au-delà
+    chaque puissance de 2 est coupée en 2^(precision-1) sous-buckets, soit une
+    erreur relative bornée par 2^-(precision-1) (~3 % pour precision=6).
+    L'enregistrement est en O(1) ; seuls les percentiles parcourent les buckets.
+    """
+    def __init__(self, precision=6, max_value_us=1 << 36):
+        self.precision = precision
+        self.sub_count = 1 << precision
+        self.half = self.sub_count >> 1
+        self.counts = [0] * (self.index(max_value_us) + 1)
+        self.max_index = len(self.counts) - 1
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def index(self, v):
+        """ Bucket d'une valeur entière positive """
+        if v < self.sub_count:
+            return v
+        shift = v.bit_length() - self.precision
+        return shift * self.half + (v >> shift)
+
+    def lower_bound(self, idx):
+        """ Plus petite valeur du bucket idx """
+        if idx < self.sub_count:
+            return idx
+        shift = idx // self.half - 1
+        return (idx - shift * self.half) << shift
+
+    def record(self, seconds):
+        v = max(int(seconds * 1e6), 0)
+        self.counts[min(self.index(v), self.max_index)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """ Valeur (s) sous laquelle se trouvent q % des échantillons """
+        if self.count == 0:
+            return None
+        target = max(1, int(round(q / 100.0 * self.count)))
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                # Milieu du bucket, borné par les extrêmes observés
+                low = self.lower_bound(idx)
+                high = self.lower_bound(idx + 1)
+                value = (low + high) / 2e6
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class PacketRecord:
+    """
+    Suivi d'un paquet de l'application, de la mise en file à l'issue.
+    seq numérote les paquets du bloc à partir de 1 (clé des traces).
+    """
+    __slots__ = ("seq", "size", "enqueue_time", "first_tx", "last_tx", "attempts",
+                 "backoff_time", "backoff_since", "ack_time")
+
+    def __init__(self, seq, size, enqueue_time):
+        self.seq = seq
+        self.size = size
+        self.enqueue_time = enqueue_time
+        self.first_tx = None
+        self.last_tx = None
+        self.attempts = 0
+        self.backoff_time = 0.0
+        self.backoff_since = None
+        self.ack_time = None
+
+
+class MacMetrics:
+    """
+    Compteurs et histogrammes d'un bloc MAC, mis à jour en O(1) par événement
+    (par paquet concerné pour une trame agrégée). Les méthodes on_* reçoivent
+    la liste des PacketRecord portés par la trame courante.
+    """
+    def __init__(self, clock=time.time, precision=6):
+        self.clock = clock
+        self.start_time = clock()
+
+        # Compteurs
+        self.offered = 0          # Paquets reçus de l'application
+        self.offered_bytes = 0
+        self.delivered = 0        # Paquets acquittés
+        self.delivered_bytes = 0
+        self.failed = 0           # Paquets abandonnés après max_retries
+        self.tx_frames = 0        # Émissions (retransmissions comprises)
+        self.timeouts = 0         # Timeouts d'ACK (collisions probables)
+        self.rx_frames = 0        # Trames de données reçues
+        self.rx_bytes = 0
+        self.acks_sent = 0
+        self.duplicates = 0       # Doublons reçus, non remontés
+
+        # Histogrammes
+        self.latency = LatencyHistogram(precision)     # Mise en file -> ACK
+        self.queue_delay = LatencyHistogram(precision) # Mise en file -> première émission
+        self.ack_delay = LatencyHistogram(precision)   # Dernière émission -> ACK
+        self.backoff = LatencyHistogram(precision)     # Temps total en backoff par paquet
+        self.attempts = [0] * 16                       # Émissions par paquet acquitté
+
+    def new_packet(self, size, now=None):
+        self.offered += 1
+        self.offered_bytes += size
+        return PacketRecord(self.offered, size, self.clock() if now is None else now)
+
+    def on_backoff(self, records, now=None):
+        """ Début d'une attente avant (ré)émission """
+        now = self.clock() if now is None else now
+        for rec in records:
+            rec.backoff_since = now
+
+    def on_tx(self, records, now=None):
+        now = self.clock() if now is None else now
+        self.tx_frames += 1
+        for rec in records:
+            if rec.backoff_since is not None:
+                rec.backoff_time += now - rec.backoff_since
+                rec.backoff_since = None
+            if rec.first_tx is None:
+                rec.first_tx = now
+                self.queue_delay.record(now - rec.enqueue_time)
+            rec.last_tx = now
+            rec.attempts += 1
+
+    def on_timeout(self):
+        self.timeouts += 1
+
+    def on_ack(self, records, now=None):
+        now = self.clock() if now is None else now
+        for rec in records:
+            rec.ack_time = now
+            self.delivered += 1
+            self.delivered_bytes += rec.size
+            self.latency.record(now - rec.enqueue_time)
+            if rec.last_tx is not None:
+                self.ack_delay.record(now - rec.last_tx)
+            self.backoff.record(rec.backoff_time)
+            self.attempts[min(rec.attempts, len(self.attempts) - 1)] += 1
+
+    def on_fail(self, records):
+        self.failed += len(records)
+
+    def on_rx(self, size):
+        self.rx_frames += 1
+        self.rx_bytes += size
+
+    def on_ack_sent(self):
+        self.acks_sent += 1
+
+    def on_duplicate(self):
+        self.duplicates += 1
+
+    def snapshot(self, now=None):
+        """ État courant : compteurs, débits moyens et résumés des histogrammes """
+        now = self.clock() if now is None else now
+        elapsed = now - self.start_time
+        return {
+            "elapsed": elapsed,
+            "offered": self.offered,
+            "offered_bytes": self.offered_bytes,
+            "delivered": self.delivered,
+            "delivered_bytes": self.delivered_bytes,
+            "failed": self.failed,
+            "tx_frames": self.tx_frames,
+            "timeouts": self.timeouts,
+            "rx_frames": self.rx_frames,
+            "rx_bytes": self.rx_bytes,
+            "acks_sent": self.acks_sent,
+            "duplicates": self.duplicates,
+            "offered_load": self.offered / elapsed if elapsed > 0 else 0.0,  # paquets/s
+            "goodput": self.delivered_bytes / elapsed if elapsed > 0 else 0.0,  # octets/s
+            "latency": self.latency.summary(),
+            "queue_delay": self.queue_delay.summary(),
+            "ack_delay": self.ack_delay.summary(),
+            "backoff": self.backoff.summary(),
+            "attempts": list(self.attempts),
+        }
@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    File d'octets circulaire de capacité fixe, stockée dans un tableau NumPy.
+    Un index de lecture et un compteur d'octets : écriture et lecture se font
+    en au plus deux copies de tranches (avant / après le rebouclage), sans
+    jamais recopier le reste de la file.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buf = np.zeros(capacity, dtype=np.uint8)
+        self.read_idx = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def free(self):
+        return self.capacity - self.count
+
+    def write(self, data):
+        """
+        Ajoute des octets (bytes, bytearray, memoryview ou tableau uint8).
+        Retourne le nombre d'octets réellement écrits (limité à la place libre).
+        """
+        data = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data.view(np.uint8)
+        n = min(len(data), self.free())
+        if n == 0:
+            return 0
+        write_idx = (self.read_idx + self.count) % self.capacity
+        first = min(n, self.capacity - write_idx)
+        self.buf[write_idx:write_idx + first] = data[:first]
+        if n > first:
+            self.buf[:n - first] = data[first:n]
+        self.count += n
+        return n
+
+    def peek(self, n, offset=0):
+        """
+        n octets à partir de `offset` sans les retirer.
+        Vue directe sur le tableau si la zone est contiguë, copie sinon.
+        """
+        n = min(n, self.count - offset)
+        start = (self.read_idx + offset) % self.capacity
+        if start + n <= self.capacity:
+            return self.buf[start:start + n]
+        first = self.capacity - start
+        return np.concatenate((self.buf[start:], self.buf[:n - first]))
+
+    def read_into(self, out):
+        """
+        Copie jusqu'à len(out) octets dans `out` (deux tranches au plus) et
+        les retire de la file. Retourne le nombre d'octets copiés.
+        """
+        n = min(len(out), self.count)
+        first = min(n, self.capacity - self.read_idx)
+        out[:first] = self.buf[self.read_idx:self.read_idx + first]
+        if n > first:
+            out[first:n] = self.buf[:n - first]
+        self.skip(n)
+        return n
+
+    def skip(self, n):
+        """ Retire n octets sans les lire (borné à [0, count]) """
+        n = max(0, min(n, self.count))
+        self.read_idx = (self.read_idx + n) % self.capacity
+        self.count -= n
+        if self.count == 0:
+            self.read_idx = 0  # Garde les écritures suivantes contiguës
+
+    def find(self, pattern):
+        """
+        Position (relative à la lecture) de la première occurrence de
+        `pattern`, ou -1. Recherche vectorisée : candidats sur le premier
+        octet, puis vérification des octets suivants en masque.
+        """
+        p = np.frombuffer(pattern, dtype=np.uint8)
+        if self.count < len(p):
+            return -1
+        data = self.peek(self.count)
+        candidates = np.flatnonzero(data[:len(data) - len(p) + 1] == p[0])
+        for j in range(1, len(p)):
+            if len(candidates) == 0:
+                break
+            candidates = candidates[data[candidates + j] == p[j]]
+        return int(candidates[0]) if len(candidates) else -1
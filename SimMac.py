@@ -0,0 +1,306 @@
+import time
+import random
+from TxQueue import TxQueue
+from SlotClock import SlotClock
+from DuplicateCache import DuplicateCache
+from FrameCodec import (BROADCAST_MAC, pack_block_ack, find_block_ack, MAX_BLOCK_ACK_ENTRIES,
+                        selective_ack_state, arq_acked)
+from Tracer import (Tracer, EV_ENQUEUE, EV_DROP, EV_TX, EV_TIMEOUT, EV_BACKOFF, EV_ACK, EV_FAIL,
+                    EV_RX, EV_ACK_SENT, EV_DUPLICATE)
+
+# =============================================================================
+# 1. LA DOUBLURE (MOCK) - Pour remplacer GNU Radio
+# =============================================================================
+class MockPMT:
+    """Imite le comportement de la librairie PMT de GNU Radio"""
+    def intern(self, s): return s
+    def to_pmt(self, x): return x
+    def from_bool(self, x): return x
+    def to_python(self, x): return x
+    def cons(self, a, b): return (a, b) # Une paire devient un tuple
+    def cdr(self, x): return x[1] if isinstance(x, tuple) else x
+    def is_pair(self, x): return isinstance(x, tuple)
+    def PMT_NIL(self): return None
+
+class MockGR:
+    """Imite le bloc de base GNU Radio"""
+    class basic_block:
+        def __init__(self, name="", in_sig=None, out_sig=None):
+            self.name = name
+            self.verbose = True
+            # Simulation des ports de messages (dictionnaire de queues)
+            self.msg_ports_out = {} 
+            
+        def message_port_register_in(self, port_name):
+            pass # On ne fait rien de spécial ici pour la simu
+            
+        def message_port_register_out(self, port_name):
+            self.msg_ports_out[port_name] = [] # Liste des abonnés
+            
+        def log(self, text):
+            """Trace console, désactivable pour les grosses simulations"""
+            if self.verbose:
+                print(text)
+
+        def set_msg_handler(self, port, handler):
+            # On stocke le handler pour pouvoir l'appeler manuellement
+            setattr(self, f"_handler_{port}", handler)
+            
+        def message_port_pub(self, port, msg):
+            """Quand le bloc publie un message, on l'affiche et on le transmet"""
+            self.log(f"   [{self.name}] >> OUTPUT sur '{port}': {msg}")
+            # Dans une vraie simu, on enverrait ça au bloc connecté
+            # Ici, géré par le 'Simulator' plus bas
+            if hasattr(self, 'simulator_callback'):
+                self.simulator_callback(self.name, port, msg)
+
+        
+# On instancie les faux modules
+pmt = MockPMT()
+gr = MockGR()
+
+class aloha_mac_block(gr.basic_block):
+    def __init__(self, name="ALOHA_NODE", mac_addr=1, ack_timeout=2.0, max_retries=2, scheduler=None,
+                 dst_mac=2, verbose=True, min_backoff=0.5, max_backoff=1.5, rng=None,
+                 queue_capacity=64, tracer=None, slot_time=0.0, backoff_slots=0, block_ack_delay=0.0,
+                 dedup_capacity=4096):
+        gr.basic_block.__init__(self, name=name)
+        self.verbose = verbose
+        
+        self.mac_addr = mac_addr
+        self.ack_timeout = ack_timeout
+        self.max_retries = max_retries
+        self.dst_mac = dst_mac
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        # Générateur aléatoire propre au bloc (reproductibilité des simulations)
+        self.rng = rng if rng is not None else random
+        
+        self.state = "IDLE"
+        self.current_payload = None
+        self.retries = 0
+        self.tx_seq = 0 # Numéro du paquet courant, porté par la trame et son ACK
+        
+        self.tx_queue = TxQueue(capacity=queue_capacity)
+        self.timer_start = 0
+        self.backoff_duration = 0
+
+        # Horloge : virtuelle si un ordonnanceur est fourni, sinon temps réel (tick)
+        self.scheduler = scheduler
+        self.clock = scheduler.now if scheduler is not None else time.time
+        self.timer_event = None
+
+        # Slotted ALOHA : émissions alignées sur les slots de l'horloge (virtuelle en simulation)
+        self.slot_clock = SlotClock(slot_time, 0.0, self.clock) if slot_time > 0 else None
+        self.backoff_slots = backoff_slots or (max(1, int(round(max_backoff / slot_time))) if slot_time > 0 else 0)
+        self.last_slot = None
+
+        # Block-ACK : sources à acquitter dans la prochaine trame groupée
+        if block_ack_delay > 0 and block_ack_delay >= ack_timeout:
+            raise ValueError(f"block_ack_delay ({block_ack_delay}) must be < ack_timeout ({ack_timeout})")
+        self.block_ack_delay = block_ack_delay
+        self.pending_acks = {}
+        self.block_ack_deadline = None
+        self.block_ack_event = None
+
+        # Doublons (src, seq) : réacquittés mais pas remontés
+        self.dedup = DuplicateCache(dedup_capacity, clock=self.clock) if dedup_capacity > 0 else None
+
+        # Traceur binaire : remplace avantageusement log() pour les grosses simulations
+        self.tracer = Tracer.resolve(tracer)
+        
+        # Ports
+        self.message_port_register_in(pmt.intern("app_in"))
+        self.message_port_register_in(pmt.intern("phy_in"))
+        self.message_port_register_out(pmt.intern("phy_out"))
+        self.message_port_register_out(pmt.intern("app_out"))
+        
+        # Handlers
+        self.set_msg_handler(pmt.intern("app_in"), self.handle_msg_in)
+        self.set_msg_handler(pmt.intern("phy_in"), self.handle_phy_in)
+
+    def handle_msg_in(self, msg):
+        """Reçoit une demande d'envoi de l'application"""
+        self.log(f"[{self.name}] Reçu de APP: {msg}")
+        self.trace(EV_ENQUEUE, self.tx_queue.enqueued + 1)
+        if not self.tx_queue.put(msg):
+            self.trace(EV_DROP, self.tx_queue.enqueued + 1)
+        if self.state == "IDLE":
+            self.process_next_packet()
+
+    def process_next_packet(self):
+        if not self.tx_queue.empty():
+            self.current_payload = self.tx_queue.get()
+            self.retries = 0
+            self.tx_seq += 1
+            if self.slot_clock is not None:
+                self.wait(self.slot_delay(0)) # Début du prochain slot
+            else:
+                self.tx_frame()
+
+    def slot_delay(self, slots):
+        """Délai jusqu'au slot `slots` après le prochain (un slot par trame et par nœud)"""
+        now = self.clock()
+        index = self.slot_clock.next_index(now) + slots
+        if self.last_slot is not None and index <= self.last_slot:
+            index = self.last_slot + 1
+        self.last_slot = index
+        return max(self.slot_clock.boundary(index) - now, 0.0)
+
+    def wait(self, duration):
+        """Passage en BACKOFF pour `duration` secondes"""
+        self.backoff_duration = duration
+        self.state = "BACKOFF"
+        self.timer_start = self.clock()
+        self.arm_timer(duration)
+
+    def tx_frame(self):
+        """Envoi Physique"""
+        self.log(f"[{self.name}] ** TX ** Envoi trame (Essai {self.retries + 1})")
+        # Structure simple simulée : (src, dst, type, data, seq)
+        # Type: 0 = Data, 1 = ACK, 2 = Block-ACK
+        frame = (self.mac_addr, self.dst_mac, 0, self.current_payload, self.tx_seq)
+        
+        self.message_port_pub(pmt.intern("phy_out"), frame)
+        self.trace(EV_TX, self.tx_queue.dequeued, self.retries + 1)
+        
+        self.state = "WAIT_ACK"
+        self.timer_start = self.clock()
+        self.arm_timer(self.ack_timeout)
+
+    def handle_phy_in(self, msg):
+        """Réception Physique"""
+        # msg est un tuple (src, dst, type, payload, seq)
+        src, dst, mtype, data, seq = msg
+
+        if mtype == 2 and dst == BROADCAST_MAC: # Block-ACK : une entrée par nœud acquitté
+            # L'entrée doit couvrir notre trame courante, pas une précédente
+            entry = find_block_ack(data, self.mac_addr)
+            if entry is not None and arq_acked(self.tx_seq, *entry):
+                self.handle_ack(src)
+            return
+        
+        if dst != self.mac_addr: return # Pas pour moi
+
+        if mtype == 1: # C'est un ACK
+            # Il doit porter le numéro de la trame courante : un ACK retardé
+            # d'une trame précédente ne l'acquitte pas
+            if seq == self.tx_seq:
+                self.handle_ack(src)
+            else:
+                self.log(f"[{self.name}] ACK périmé {seq} de {src} ignoré")
+        
+        elif mtype == 0: # C'est des DATA
+            # Un doublon (ACK perdu) est réacquitté, mais pas remonté une seconde fois
+            if self.dedup is not None and self.dedup.seen(src, seq):
+                self.log(f"[{self.name}] Doublon {seq} de {src} ignoré")
+                self.trace(EV_DUPLICATE, seq)
+            else:
+                self.log(f"[{self.name}] ** RX ** Données reçues : {data}")
+                self.trace(EV_RX, seq)
+            if self.block_ack_delay > 0:
+                # ACK différé, regroupé avec ceux des autres sources
+                self.pending_acks[src] = seq
+                if len(self.pending_acks) >= MAX_BLOCK_ACK_ENTRIES:
+                    self.flush_acks()
+                elif self.block_ack_deadline is None:
+                    self.block_ack_deadline = self.clock() + self.block_ack_delay
+                    if self.scheduler is not None:
+                        self.block_ack_event = self.scheduler.schedule(self.block_ack_delay, self.flush_acks)
+                return
+            # On renvoie un ACK
+            ack_frame = (self.mac_addr, src, 1, "ACK", seq)
+            self.log(f"[{self.name}] Envoi de l'ACK vers {src}")
+            self.message_port_pub(pmt.intern("phy_out"), ack_frame)
+            self.trace(EV_ACK_SENT, seq)
+
+    def handle_ack(self, src):
+        if self.state == "WAIT_ACK":
+            self.log(f"[{self.name}] ** RX ** ACK reçu de {src} ! Succès.")
+            self.cancel_timer()
+            self.state = "IDLE"
+            self.trace(EV_ACK, self.tx_queue.dequeued)
+            self.message_port_pub(pmt.intern("app_out"), pmt.cons(pmt.intern("tx_success"), self.current_payload))
+            self.process_next_packet()
+
+    def flush_acks(self):
+        """Émet un block-ACK pour toutes les sources en attente"""
+        if self.block_ack_event is not None:
+            # Vidage anticipé (block-ACK plein) : l'échéance armée n'a plus lieu d'être
+            self.scheduler.cancel(self.block_ack_event)
+            self.block_ack_event = None
+        self.block_ack_deadline = None
+        if not self.pending_acks:
+            return
+        if len(self.pending_acks) == 1:
+            # Une seule source : l'ACK simple est plus court que le block-ACK
+            src, seq = self.pending_acks.popitem()
+            self.message_port_pub(pmt.intern("phy_out"), (self.mac_addr, src, 1, "ACK", seq))
+            self.trace(EV_ACK_SENT)
+            return
+        self.log(f"[{self.name}] Envoi d'un block-ACK pour {list(self.pending_acks)}")
+        payload = pack_block_ack((src, *selective_ack_state(seq)) for src, seq in self.pending_acks.items())
+        self.pending_acks.clear()
+        self.message_port_pub(pmt.intern("phy_out"), (self.mac_addr, BROADCAST_MAC, 2, payload, 0))
+        self.trace(EV_ACK_SENT)
+
+    def trace(self, event, seq=0, value=0.0):
+        """Événement vers le traceur (horloge du bloc, virtuelle en simulation)"""
+        if self.tracer is not None:
+            self.tracer.record(self.mac_addr, event, seq, value, self.clock())
+
+    def arm_timer(self, delay):
+        """Arme l'unique échéance (ACK ou backoff) auprès de l'ordonnanceur"""
+        if self.scheduler is None:
+            return # Mode polling : c'est tick() qui surveille l'échéance
+        self.cancel_timer()
+        self.timer_event = self.scheduler.schedule(delay, self.on_timer)
+
+    def cancel_timer(self):
+        if self.timer_event is not None:
+            self.scheduler.cancel(self.timer_event)
+            self.timer_event = None
+
+    def on_timer(self):
+        """Échéance atteinte : timeout d'ACK ou fin de backoff"""
+        self.timer_event = None
+        if self.state == "WAIT_ACK":
+            self.log(f"[{self.name}] !! TIMEOUT !! Pas d'ACK reçu.")
+            self.trace(EV_TIMEOUT, self.tx_queue.dequeued)
+            self.handle_tx_failure()
+
+        elif self.state == "BACKOFF":
+            self.log(f"[{self.name}] Fin du Backoff. Retransmission...")
+            self.tx_frame()
+
+    def tick(self):
+        """Fonction appelée régulièrement pour simuler le temps (Clock)"""
+        now = self.clock()
+
+        if self.block_ack_deadline is not None and now >= self.block_ack_deadline:
+            self.flush_acks()
+        
+        if self.state == "WAIT_ACK":
+            if (now - self.timer_start) > self.ack_timeout:
+                self.on_timer()
+
+        elif self.state == "BACKOFF":
+            if (now - self.timer_start) > self.backoff_duration:
+                self.on_timer()
+
+    def handle_tx_failure(self):
+        self.retries += 1
+        if self.retries <= self.max_retries:
+            if self.slot_clock is not None:
+                duration = self.slot_delay(self.rng.randint(1, self.backoff_slots))
+            else:
+                duration = self.rng.uniform(self.min_backoff, self.max_backoff)
+            self.log(f"[{self.name}] Passage en BACKOFF pour {duration:.2f}s")
+            self.trace(EV_BACKOFF, self.tx_queue.dequeued, duration)
+            self.wait(duration)
+        else:
+            self.log(f"[{self.name}] ÉCHEC DÉFINITIF. Abandon du paquet.")
+            self.trace(EV_FAIL, self.tx_queue.dequeued)
+            self.state = "IDLE"
+            self.message_port_pub(pmt.intern("app_out"), pmt.cons(pmt.intern("tx_failed"), self.current_payload))
+            self.process_next_packet()
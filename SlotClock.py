@@ -0,0 +1,35 @@
+import math
+import time
+
+
+class SlotClock:
+    """
+    Base de temps commune du mode slotted : les slots commencent à
+    epoch + k * slot_time. En simulation l'horloge est celle de l'ordonnanceur
+    virtuel ; dans un flowgraph, epoch est convenu à l'avance ou recalé sur
+    une balise (resync).
+    """
+    def __init__(self, slot_time, epoch=0.0, clock=time.time):
+        if slot_time <= 0:
+            raise ValueError("slot_time must be positive")
+        self.slot_time = slot_time
+        self.epoch = epoch
+        self.clock = clock
+
+    def slot_index(self, now=None):
+        """ Slot en cours """
+        now = self.clock() if now is None else now
+        return math.floor((now - self.epoch) / self.slot_time)
+
+    def next_index(self, now=None):
+        """ Premier slot qui commence à partir de now (le slot courant si now est pile sur sa frontière) """
+        now = self.clock() if now is None else now
+        return math.ceil((now - self.epoch) / self.slot_time - 1e-9)
+
+    def boundary(self, index):
+        """ Début du slot index """
+        return self.epoch + index * self.slot_time
+
+    def resync(self, beacon_time=None):
+        """ Balise reçue : un slot commence à beacon_time (maintenant par défaut) """
+        self.epoch = self.clock() if beacon_time is None else beacon_time
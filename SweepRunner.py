@@ -0,0 +1,137 @@
+import csv
+import hashlib
+import importlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Scénarios disponibles : nom -> "module:fonction"
+# La fonction reçoit les paramètres de la grille + seed et retourne un dict de métriques.
+SCENARIOS = {
+    "aloha": "ChannelSimulator:run_aloha_network",
+    "aloha_batch": "BatchSimulator:run_aloha_batch",  # Moteur vectorisé, mêmes paramètres (sans block-ACK)
+    "csma_batch": "BatchSimulator:run_csma_batch",
+}
+
+# Colonnes de métriques écrites dans le fichier de résultats
+METRICS = ["throughput", "delivery_ratio", "retries", "latency_p50", "latency_p90", "latency_p99"]
+
+
+def expand_grid(grid):
+    """
+    Produit cartésien d'une grille {param: [valeurs]} -> liste de dicts.
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def run_id(scenario, params, seed):
+    """
+    Identifiant stable d'un run (sert à la reprise après interruption).
+    """
+    key = json.dumps({"scenario": scenario, "params": params, "seed": seed}, sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def drop_partial_row(results_path, chunk_size=65536):
+    """
+    Coupe une dernière ligne incomplète (écriture interrompue) : sinon le
+    run suivant serait ajouté à sa suite, sur la même ligne.
+    """
+    with open(results_path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(pos - chunk_size, 0)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            newline = chunk.rfind(b"\n")
+            if newline >= 0:
+                cut = start + newline + 1
+                break
+            pos = start
+        else:
+            cut = 0
+        if cut < end:
+            f.truncate(cut)
+            print(f"[SWEEP] Ligne incomplète retirée de {results_path} ({end - cut} octets)")
+
+
+def load_done(results_path, columns=None):
+    """
+    Identifiants des runs déjà présents dans le fichier de résultats.
+    Lève ValueError si l'en-tête ne correspond pas à `columns` (autre grille
+    ou autres métriques : les lignes ajoutées seraient décalées).
+    """
+    if not os.path.exists(results_path):
+        return set()
+    drop_partial_row(results_path)
+    with open(results_path, newline="") as f:
+        reader = csv.DictReader(f)
+        if columns is not None and reader.fieldnames is not None and reader.fieldnames != columns:
+            raise ValueError(f"{results_path} has columns {reader.fieldnames}, expected {columns}")
+        return {row["run_id"] for row in reader}
+
+
+def resolve(scenario):
+    module_name, func_name = SCENARIOS.get(scenario, scenario).split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def run_one(scenario, params, seed):
+    """
+    Exécuté dans un processus du pool : un run, une graine, un générateur dédié.
+    """
+    stats = resolve(scenario)(seed=seed, **params)
+    return params, seed, {m: stats.get(m) for m in METRICS}
+
+
+def run_sweep(scenario, grid, seeds, results_path, workers=None):
+    """
+    Lance tous les couples (paramètres, graine) d'une grille dans un pool de
+    processus (un par cœur par défaut) et ajoute une ligne par run au fichier
+    CSV `results_path` (une colonne par paramètre et par métrique).
+    Les runs déjà présents dans le fichier sont sautés : relancer la même
+    commande après une interruption reprend là où on s'était arrêté (une
+    ligne coupée par l'interruption est retirée, le run est relancé).
+    """
+    param_names = sorted(grid)
+    columns = ["run_id", "scenario"] + param_names + ["seed"] + METRICS
+
+    done = load_done(results_path, columns)
+    pending = [(params, seed) for params in expand_grid(grid) for seed in seeds
+               if run_id(scenario, params, seed) not in done]
+    print(f"[SWEEP] {len(done)} runs déjà faits, {len(pending)} à lancer")
+    if not pending:
+        return 0
+
+    new_file = not os.path.exists(results_path) or os.path.getsize(results_path) == 0
+    with open(results_path, "a", newline="") as f, ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        if new_file:
+            writer.writeheader()
+
+        futures = [pool.submit(run_one, scenario, params, seed) for params, seed in pending]
+        for count, future in enumerate(as_completed(futures), 1):
+            params, seed, metrics = future.result()
+            row = {"run_id": run_id(scenario, params, seed), "scenario": scenario, "seed": seed}
+            row.update(params)
+            row.update(metrics)
+            writer.writerow(row)
+            f.flush()  # Chaque run terminé est acquis, même en cas d'interruption
+            print(f"[SWEEP] {count}/{len(pending)} {params} seed={seed}")
+
+    return len(pending)
+
+
+if __name__ == "__main__":
+    grid = {
+        "n_nodes": [50, 100, 200],
+        "rate": [0.05],
+        "duration": [300.0],
+        "ack_timeout": [0.05, 0.1],
+        "max_retries": [2, 3],
+        "max_backoff": [0.5, 1.5],
+    }
+    run_sweep("aloha", grid, seeds=[1, 2, 3], results_path="sweep_results.csv")
@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+import numpy as np
+
+# Enregistrement de taille fixe (28 octets, petit-boutiste)
+TRACE_DTYPE = np.dtype([
+    ("time", "<f8"),   # Horodatage (s), horloge du bloc (réelle ou virtuelle)
+    ("value", "<f8"),  # Valeur associée (durée, taille...)
+    ("node", "<u4"),   # Adresse MAC ou identifiant du bloc
+    ("seq", "<u4"),    # Numéro de paquet
+    ("event", "<u2"),  # Code d'événement
+    ("flags", "<u2"),  # Réservé
+])
+
+# En-tête du fichier : magique, version, taille d'enregistrement (16 octets)
+TRACE_MAGIC = b"MACTRACE"
+TRACE_VERSION = 1
+TRACE_HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4")])
+
+# Codes d'événements
+EV_ENQUEUE = 1    # Paquet reçu de l'application (value = taille)
+EV_DROP = 2       # Paquet rejeté par la file
+EV_TX = 3         # Émission d'une trame (value = numéro d'essai)
+EV_TIMEOUT = 4    # Pas d'ACK à temps
+EV_BACKOFF = 5    # Début de backoff (value = durée prévue)
+EV_ACK = 6        # ACK reçu (value = latence depuis la mise en file)
+EV_FAIL = 7       # Abandon après max_retries
+EV_RX = 8         # Trame de données reçue (value = taille)
+EV_ACK_SENT = 9   # ACK émis
+EV_DEFRAME = 10   # Trame extraite du flux d'octets (value = taille)
+EV_DUPLICATE = 11 # Doublon (src, seq) réacquitté sans être remonté
+
+EVENT_NAMES = {
+    EV_ENQUEUE: "enqueue", EV_DROP: "drop", EV_TX: "tx", EV_TIMEOUT: "timeout",
+    EV_BACKOFF: "backoff", EV_ACK: "ack", EV_FAIL: "fail", EV_RX: "rx",
+    EV_ACK_SENT: "ack_sent", EV_DEFRAME: "deframe", EV_DUPLICATE: "duplicate",
+}
+
+
+class Tracer:
+    """
+    Traceur d'événements MAC/PHY à coût constant.
+    record() écrit un enregistrement dans un anneau NumPy préalloué ; un
+    thread d'écriture vide l'anneau vers le fichier par tranches. Si
+    l'anneau est plein (écriture trop lente), l'événement est compté comme
+    perdu plutôt que de bloquer le thread du bloc.
+    Sans fichier, l'anneau garde les `capacity` derniers événements.
+    """
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path=None, capacity=65536, flush_interval=0.2, clock=time.time):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.clock = clock
+
+        self.ring = np.zeros(capacity, dtype=TRACE_DTYPE)
+        self.head = 0     # Enregistrements écrits depuis le début
+        self.flushed = 0  # Enregistrements déjà vidés vers le fichier
+        self.lost = 0
+        self.lock = threading.Lock()  # Plusieurs blocs peuvent partager un traceur
+
+        self.file = None
+        self.thread = None
+        self.wakeup = threading.Event()
+        self.running = False
+        self.users = 0  # Blocs utilisant le traceur partagé (voir shared / release)
+        if path is not None:
+            self.open(path)
+
+    @classmethod
+    def shared(cls, path):
+        """
+        Traceur partagé par chemin de fichier (paramètre de bloc GRC).
+        Chaque appel compte un utilisateur, à rendre par release().
+        """
+        with cls._registry_lock:
+            tracer = cls._registry.get(path)
+            if tracer is None:
+                tracer = cls._registry[path] = cls(path)
+            tracer.users += 1
+            return tracer
+
+    @classmethod
+    def resolve(cls, tracer):
+        """
+        Accepte une instance (fermée par l'appelant), un chemin de fichier
+        partagé, ou None/""
+        """
+        if not tracer:
+            return None
+        if isinstance(tracer, str):
+            return cls.shared(tracer)
+        return tracer
+
+    def release(self):
+        """
+        Fin d'utilisation par un bloc (à son stop). Un traceur partagé n'est
+        fermé qu'au départ de son dernier utilisateur ; une instance passée
+        directement aux blocs reste à fermer par son propriétaire.
+        """
+        with self._registry_lock:
+            if self._registry.get(self.path) is not self:
+                return
+            self.users -= 1
+            if self.users > 0:
+                return
+            del self._registry[self.path]
+        self.close()
+
+    def open(self, path):
+        self.file = open(path, "wb")
+        header = np.zeros(1, dtype=TRACE_HEADER)
+        header[0] = (TRACE_MAGIC, TRACE_VERSION, TRACE_DTYPE.itemsize)
+        self.file.write(header.tobytes())
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, name="trace-writer", daemon=True)
+        self.thread.start()
+
+    def record(self, node, event, seq=0, value=0.0, timestamp=None):
+        """ Ajoute un événement (quelques microsecondes, sans E/S) """
+        with self.lock:
+            if self.file is not None and self.head - self.flushed >= self.capacity:
+                self.lost += 1
+                return
+            self.ring[self.head % self.capacity] = (
+                self.clock() if timestamp is None else timestamp, value, node, seq, event, 0)
+            self.head += 1
+            if self.head - self.flushed == self.capacity // 2:
+                self.wakeup.set()  # Anneau à moitié plein : vidage anticipé
+
+    def _loop(self):
+        while self.running:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """ Écrit les enregistrements en attente (au plus deux tranches de l'anneau) """
+        if self.file is None:
+            return
+        head = self.head
+        start = self.flushed
+        while start < head:
+            i = start % self.capacity
+            n = min(head - start, self.capacity - i)
+            self.file.write(self.ring[i:i + n].tobytes())
+            start += n
+        self.file.flush()
+        self.flushed = head
+
+    def records(self):
+        """ Événements encore présents dans l'anneau, du plus ancien au plus récent """
+        start = max(self.head - self.capacity, 0)
+        idx = np.arange(start, self.head) % self.capacity
+        return self.ring[idx]
+
+    def close(self):
+        """ Arrête le thread d'écriture après un dernier vidage """
+        if self.file is None:
+            return
+        self.running = False
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+        self.file.close()
+        self.file = None
+
+
+def load_trace(path):
+    """
+    Charge une trace en tableau structuré (colonnes time, value, node, seq,
+    event), projeté en mémoire : rien n'est lu avant d'être utilisé.
+    """
+    header = np.fromfile(path, dtype=TRACE_HEADER, count=1)
+    if len(header) == 0 or header[0]["magic"] != TRACE_MAGIC:
+        raise ValueError(f"Not a trace file: {path}")
+    if header[0]["record_size"] != TRACE_DTYPE.itemsize:
+        raise ValueError(f"Unsupported record size: {header[0]['record_size']}")
+    count = (os.path.getsize(path) - TRACE_HEADER.itemsize) // TRACE_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode="r", offset=TRACE_HEADER.itemsize, shape=(count,))
+
+
+def event_counts(records):
+    """ Nombre d'événements par nom """
+    counts = np.bincount(records["event"], minlength=max(EVENT_NAMES) + 1)
+    return {name: int(counts[code]) for code, name in EVENT_NAMES.items() if counts[code]}
+
+
+if __name__ == "__main__":
+    # Coût par événement et relecture
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(), "trace.bin")
+    tracer = Tracer(path)
+    n = 200000
+    t0 = time.perf_counter()
+    for i in range(n):
+        tracer.record(1, EV_TX, i, 0.0)
+    elapsed = time.perf_counter() - t0
+    tracer.close()
+    trace = load_trace(path)
+    print(f"{elapsed / n * 1e6:.2f} us/événement, {len(trace)} relus, {tracer.lost} perdus")
+    print(event_counts(trace))
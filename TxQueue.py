@@ -0,0 +1,134 @@
+from collections import deque
+
+# Politiques de rejet quand la file est pleine
+TAIL_DROP = "tail_drop"                  # Le nouveau paquet est rejeté
+DROP_OLDEST = "drop_oldest"              # Le plus ancien paquet (toutes priorités) est évincé
+DROP_LOW_PRIORITY = "drop_low_priority"  # Le plus récent paquet de plus basse priorité est évincé
+
+POLICIES = (TAIL_DROP, DROP_OLDEST, DROP_LOW_PRIORITY)
+
+
+class TxQueue:
+    """
+    File d'émission bornée à priorités pour les blocs MAC.
+    Une FIFO (collections.deque) par niveau de priorité, la plus haute servie
+    en premier. Pas de verrou : les handlers de messages d'un bloc s'exécutent
+    tous dans le même thread.
+    Interface compatible avec l'usage de queue.Queue dans les blocs :
+    put(), get(), empty().
+    """
+    def __init__(self, capacity=64, levels=2, policy=TAIL_DROP):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.capacity = capacity  # None = non bornée
+        self.levels = levels
+        self.policy = policy
+
+        # Chaque entrée est (numéro d'ordre, item) pour retrouver la plus ancienne
+        self.queues = [deque() for _ in range(levels)]
+        self.size = 0
+        self.seq = 0
+
+        # Compteurs
+        self.enqueued = 0
+        self.dequeued = 0
+        self.dropped = 0
+        self.dropped_by_level = [0] * levels
+        self.max_occupancy = 0
+
+    def __len__(self):
+        return self.size
+
+    def empty(self):
+        return self.size == 0
+
+    def full(self):
+        return self.capacity is not None and self.size >= self.capacity
+
+    def level(self, priority):
+        """ Niveau de priorité borné à [0, levels - 1] (plus grand = plus prioritaire) """
+        try:
+            priority = int(priority)
+        except (TypeError, ValueError):
+            return 0
+        return min(max(priority, 0), self.levels - 1)
+
+    def put(self, item, priority=0):
+        """
+        Ajoute un item. Retourne False si c'est lui qui a été rejeté.
+        """
+        level = self.level(priority)
+
+        if self.full() and not self.make_room(level):
+            self.count_drop(level)
+            return False
+
+        self.queues[level].append((self.seq, item))
+        self.seq += 1
+        self.size += 1
+        self.enqueued += 1
+        if self.size > self.max_occupancy:
+            self.max_occupancy = self.size
+        return True
+
+    def make_room(self, level):
+        """ Évince un item selon la politique. False si le nouvel item doit être rejeté. """
+        if self.policy == DROP_OLDEST:
+            levels = [i for i, q in enumerate(self.queues) if q]
+            if not levels:
+                return False # capacity=0 : rien à évincer, le nouvel item est rejeté
+            # Niveau (et non deque) retenu : deux deques égales ne se confondent pas
+            oldest = min(levels, key=lambda i: self.queues[i][0][0])
+            self.queues[oldest].popleft()
+            self.evicted(oldest)
+            return True
+
+        if self.policy == DROP_LOW_PRIORITY:
+            for lower in range(level):
+                if self.queues[lower]:
+                    self.queues[lower].pop()
+                    self.evicted(lower)
+                    return True
+
+        return False
+
+    def evicted(self, level):
+        self.size -= 1
+        self.count_drop(level)
+
+    def count_drop(self, level):
+        self.dropped += 1
+        self.dropped_by_level[level] += 1
+
+    def __iter__(self):
+        """ Items dans l'ordre où get() les rendrait (sans les retirer) """
+        for q in reversed(self.queues):
+            for _, item in q:
+                yield item
+
+    def peek(self):
+        """ Prochain item que rendrait get(), sans le retirer """
+        for q in reversed(self.queues):
+            if q:
+                return q[0][1]
+        raise IndexError("peek from an empty TxQueue")
+
+    def get(self):
+        """ Retire l'item le plus ancien du niveau de priorité le plus haut """
+        for q in reversed(self.queues):
+            if q:
+                self.size -= 1
+                self.dequeued += 1
+                return q.popleft()[1]
+        raise IndexError("get from an empty TxQueue")
+
+    def stats(self):
+        return {
+            "occupancy": self.size,
+            "occupancy_by_level": [len(q) for q in self.queues],
+            "max_occupancy": self.max_occupancy,
+            "enqueued": self.enqueued,
+            "dequeued": self.dequeued,
+            "dropped": self.dropped,
+            "dropped_by_level": list(self.dropped_by_level),
+        }
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+pytest.importorskip("gnuradio")
+import pmt
+
+from ALOHA import aloha_mac_block
+from AppMessage import to_u8vector
+from EventScheduler import EventScheduler
+from FrameCodec import ACK_PAYLOAD, FLAG_ARQ_ACK, encode_frame_into, pack_selective_ack
+
+
+def make_link(gateway=True, **kwargs):
+    """ Nœud 1 -> passerelle 100 (absente si gateway=False) : notifications et trames émises par le nœud """
+    scheduler = EventScheduler()
+    node = aloha_mac_block(mac_addr=1, scheduler=scheduler, dst_mac=100, ack_timeout=0.05, max_retries=2,
+                           max_backoff=0.05, rng=random.Random(1), **kwargs)
+    peer = aloha_mac_block(mac_addr=100, scheduler=scheduler) if gateway else None
+    events = []
+    frames = []
+
+    def wire(block, other, app):
+        def pub(port, msg):
+            if str(port) == "phy_out":
+                if block is node:
+                    frames.append(msg)
+                if other is not None:
+                    scheduler.schedule(0.001, other.handle_phy_in, msg)
+            elif str(port) == "app_out" and app is not None and pmt.is_symbol(pmt.car(msg)):
+                app.append(pmt.symbol_to_string(pmt.car(msg)))
+        block.message_port_pub = pub
+
+    wire(node, peer, events)
+    if peer is not None:
+        wire(peer, node, None)
+    return scheduler, node, events, frames
+
+
+@pytest.mark.parametrize("arq_window", [0, 1])
+@pytest.mark.parametrize("gateway, status", [(True, "tx_success"), (False, "tx_failed")])
+def test_aggregate_notifies_each_packet(arq_window, gateway, status):
+    scheduler, node, events, frames = make_link(gateway, aggregation=True, aggregation_delay=0.01, arq_window=arq_window)
+    for i in range(3):
+        node.handle_msg_in(pmt.cons(pmt.PMT_NIL, pmt.to_pmt(f"p{i}")))
+    scheduler.run(until=2.0)
+    # Fenêtre ARQ : le premier paquet part seul, les deux suivants attendent
+    # la fin de la fenêtre et sont regroupés
+    n_frames = 1 if arq_window == 0 else 2
+    assert len(frames) == n_frames * (1 if gateway else node.max_retries)
+    assert events == [status] * 3
+
+
+def rx_batch(node, frames):
+    """ Rafale (src, dst, data, flags) à emplacements fixes, comme sur phy_batch_in """
+    buf = bytearray(node.rx_slot_size * len(frames))
+    for i, (src, dst, data, flags) in enumerate(frames):
+        encode_frame_into(buf, i * node.rx_slot_size, src, dst, 0, data, flags)
+    node.handle_phy_batch(pmt.cons(pmt.PMT_NIL, to_u8vector(buf)))
+
+
+def test_batch_ack_after_other_source():
+    # L'ACK attendu n'est pas le premier de la rafale
+    scheduler, node, events, frames = make_link(gateway=False)
+    node.handle_msg_in(pmt.cons(pmt.PMT_NIL, pmt.to_pmt("a")))
+    node.handle_msg_in(pmt.cons(pmt.PMT_NIL, pmt.to_pmt("b")))
+    rx_batch(node, [(7, 1, ACK_PAYLOAD, 0), (100, 1, ACK_PAYLOAD, 0), (100, 1, ACK_PAYLOAD, 0)])
+    # Un seul paquet acquitté : le second ACK ne couvre pas la trame suivante
+    assert events == ["tx_success"]
+    assert node.state == "WAIT_ACK"
+
+
+def test_batch_acks_every_window_entry():
+    scheduler, node, events, frames = make_link(gateway=False, arq_window=4)
+    for i in range(3):
+        node.handle_msg_in(pmt.cons(pmt.PMT_NIL, pmt.to_pmt(f"p{i}")))
+    seqs = sorted(seq for dst, seq in node.window)
+    rx_batch(node, [(100, 1, pack_selective_ack(seq), FLAG_ARQ_ACK) for seq in seqs])
+    assert events == ["tx_success"] * 3
+    assert not node.window
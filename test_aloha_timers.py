@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+pytest.importorskip("gnuradio")
+import pmt
+
+from ALOHA import aloha_mac_block
+from AppMessage import to_u8vector
+from EventScheduler import EventScheduler
+from FrameCodec import build_frame
+
+
+def make_node(**kwargs):
+    scheduler = EventScheduler()
+    node = aloha_mac_block(mac_addr=1, scheduler=scheduler, dst_mac=100, ack_timeout=0.05,
+                           max_retries=2, max_backoff=0.05, rng=random.Random(1), **kwargs)
+    events = []
+
+    def pub(port, msg):
+        if str(port) == "app_out" and pmt.is_symbol(pmt.car(msg)):
+            events.append(pmt.symbol_to_string(pmt.car(msg)))
+    node.message_port_pub = pub
+    return scheduler, node, events
+
+
+def rx_frame(node, src, payload):
+    node.handle_phy_in(pmt.cons(pmt.PMT_NIL, to_u8vector(build_frame(src, node.mac_addr, 0, payload))))
+
+
+def test_block_ack_does_not_cancel_ack_timeout():
+    # Régression : armer le block-ACK invalidait l'échéance WAIT_ACK du nœud
+    scheduler, node, events = make_node(block_ack_delay=0.01)
+    node.handle_msg_in(pmt.cons(pmt.PMT_NIL, pmt.to_pmt("hello")))
+    assert node.state == "WAIT_ACK"
+    scheduler.schedule(0.005, rx_frame, node, 100, b"data")
+    scheduler.run(until=2.0)
+    assert node.state == "IDLE"
+    assert events.count("tx_failed") == 1
+    assert node.metrics()["acks_sent"] == 1
+
+
+def test_late_block_ack_expiry_is_dropped():
+    # Mode threadé : l'échéance postée après un vidage anticipé est ignorée
+    scheduler, node, events = make_node(block_ack_delay=0.01)
+    node.handle_msg_in(pmt.cons(pmt.PMT_NIL, pmt.to_pmt("hello")))
+    rx_frame(node, 100, b"data")
+    gen = node.block_ack_gen
+    node.flush_block_ack()
+    node.fire_timer("block_ack", gen)
+    assert node.state == "WAIT_ACK"
+    assert "tx_failed" not in events
+    assert node.metrics()["acks_sent"] == 1
+
+
+def test_rearmed_main_timer_ignores_stale_expiry():
+    scheduler, node, events = make_node()
+    node.handle_msg_in(pmt.cons(pmt.PMT_NIL, pmt.to_pmt("hello")))
+    stale = node.timer_gen
+    node.arm_timer(node.ack_timeout)
+    node.fire_timer("main", stale)
+    assert node.state == "WAIT_ACK" and node.retries == 0
+    node.fire_timer("main", node.timer_gen)
+    assert node.state == "BACKOFF"
+
+
+def test_arq_and_main_generations_are_independent():
+    scheduler, node, events = make_node(arq_window=2)
+    for text in ("a", "b"):
+        node.handle_msg_in(pmt.cons(pmt.PMT_NIL, pmt.to_pmt(text)))
+    gens = sorted(node.arq_timers)
+    assert len(gens) == 2
+    # Une échéance principale du même numéro ne touche pas aux trames ARQ
+    node.fire_timer("main", gens[0])
+    assert len(node.arq_timers) == 2
+    node.fire_timer("arq", gens[0])
+    # Première trame en backoff, sous une nouvelle génération
+    assert gens[0] not in node.arq_timers and gens[1] in node.arq_timers
+    assert [entry.state for entry in node.window.values()].count("BACKOFF") == 1
@@ -0,0 +1,50 @@
+import numpy as np
+
+from BatchSimulator import ACK, DATA, BatchChannel, NodeArrays, PoissonArrivals, run_aloha_batch, run_csma_batch
+
+
+def test_poisson_arrivals_in_order():
+    arrivals = PoissonArrivals(10, 1.0, np.random.default_rng(1), chunk=64)
+    times, nodes = arrivals.take(100.0)
+    assert np.all(np.diff(times) >= 0) and times[-1] <= 100.0
+    assert np.all((nodes >= 0) & (nodes < 10))
+    # 10 nœuds à 1 paquet/s pendant 100 s
+    assert 850 < len(times) < 1150
+
+
+def test_node_queues_tail_drop():
+    nodes = NodeArrays(3, queue_capacity=2)
+    dropped = nodes.enqueue(np.array([1.0, 2.0, 3.0, 4.0]), np.array([0, 1, 0, 0]))
+    assert dropped == 1
+    assert nodes.q_len.tolist() == [2, 1, 0]
+    assert nodes.pop(np.array([0, 1])).tolist() == [1.0, 2.0]
+    assert nodes.pop(np.array([0])).tolist() == [3.0]
+
+
+def test_channel_overlapping_frames_collide():
+    channel = BatchChannel()
+    channel.add(np.array([0.0, 0.5]), 1.0, np.array([1, 2]), DATA)
+    channel.add(np.array([3.0]), 1.0, np.array([1]), ACK)
+    assert channel.busy(0.7) and not channel.busy(2.0)
+    (data_nodes, _), (ack_nodes, _) = channel.resolve(10.0)
+    assert len(data_nodes) == 0
+    assert ack_nodes.tolist() == [1]
+    assert channel.frames_collided == 2
+    channel.prune(10.0)
+    assert channel.pending_end() == np.inf
+
+
+def test_aloha_batch_reproducible_and_light_load_delivers():
+    a = run_aloha_batch(n_nodes=20, rate=0.01, duration=200.0, seed=3)
+    b = run_aloha_batch(n_nodes=20, rate=0.01, duration=200.0, seed=3)
+    assert a == b
+    assert a["offered"] > 0
+    assert a["delivery_ratio"] > 0.95
+    assert a["delivered"] + a["failed"] + a["dropped"] <= a["offered"]
+
+
+def test_csma_batch_light_load_delivers():
+    stats = run_csma_batch(n_nodes=20, rate=0.01, duration=200.0, seed=3)
+    assert stats["offered"] > 0
+    assert stats["delivery_ratio"] > 0.95
+    assert 0.0 < stats["throughput"] <= stats["offered_load"]
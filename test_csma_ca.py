@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("gnuradio")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Archive"))
+import pmt
+
+from AppMessage import make_app_pmt
+from FrameCodec import BROADCAST_MAC
+
+
+def send_all(node):
+    """ Fin de backoff immédiate : émet la trame courante (et les suivantes) """
+    while node.state == "BACKOFF":
+        node.backoff_remaining = 0.0
+        node.general_work(None)
+
+
+def test_broadcast_sent_once_without_ack():
+    from CSMA_CA import csma_ca_mac_block
+
+    node = csma_ca_mac_block(mac_addr=1)
+    out = []
+    node.message_port_pub = lambda port, msg: out.append((str(port), msg))
+    node.handle_msg_in(make_app_pmt(BROADCAST_MAC, 0, "a"))
+    node.handle_msg_in(make_app_pmt(BROADCAST_MAC, 0, "b"))
+    send_all(node)
+    assert node.state == "IDLE"
+    assert [port for port, msg in out] == ["phy_out", "app_out", "phy_out", "app_out"]
+    assert all(pmt.symbol_to_string(pmt.car(msg)) == "tx_success" for port, msg in out if port == "app_out")
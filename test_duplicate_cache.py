@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from DuplicateCache import DuplicateCache
+from FrameCodec import ACK_BITMAP_BITS, SEQ_MODULO
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_duplicate_detection_per_source():
+    cache = DuplicateCache()
+    assert not cache.seen(1, 7)
+    assert not cache.seen(2, 7)
+    assert cache.seen(1, 7)
+    assert cache.stats()["duplicates"] == 1
+
+
+def test_lru_eviction():
+    cache = DuplicateCache(capacity=2)
+    cache.seen(1, 1)
+    cache.seen(1, 2)
+    cache.seen(1, 1)  # Revue : devient la plus récente
+    cache.seen(1, 3)
+    assert (1, 2) not in cache
+    assert (1, 1) in cache
+    assert len(cache) == 2 and cache.evicted == 1
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = DuplicateCache(ttl=1.0, clock=clock)
+    cache.seen(1, 1)
+    clock.now = 0.5
+    cache.seen(1, 2)
+    clock.now = 1.2
+    assert not cache.seen(1, 1)  # Oubliée : plus d'une seconde sans être revue
+    assert cache.seen(1, 2)
+    assert cache.expired == 1
+
+
+def test_source_restart_forgets_entries():
+    cache = DuplicateCache(window=ACK_BITMAP_BITS)
+    for seq in range(500, 510):
+        assert not cache.seen(1, seq)
+    assert cache.seen(1, 505)
+    # Redémarrage de la source : numérotation repartie de 0
+    assert not cache.seen(1, 0)
+    assert cache.restarts == 1
+    assert (1, 505) not in cache
+    assert cache.seen(1, 0)
+
+
+def test_retransmission_within_window_is_duplicate():
+    cache = DuplicateCache(window=ACK_BITMAP_BITS)
+    for seq in range(SEQ_MODULO - 10, SEQ_MODULO + 20):
+        cache.seen(2, seq % SEQ_MODULO)
+    # Après rebouclage : SEQ_MODULO - 5 est à 24 derrière le plus récent (19)
+    assert cache.seen(2, SEQ_MODULO - 5)
+    assert cache.restarts == 0
+
+
+def test_aloha_delivers_after_sender_reboot():
+    pytest.importorskip("gnuradio")
+    import pmt
+    from ALOHA import aloha_mac_block
+    from EventScheduler import EventScheduler
+
+    scheduler = EventScheduler()
+    gateway = aloha_mac_block(mac_addr=100, scheduler=scheduler)
+    delivered = []
+    results = []
+
+    def boot():
+        node = aloha_mac_block(mac_addr=1, scheduler=scheduler, dst_mac=100, rng=random.Random(1))
+        node.tx_seq[100] = 0 # Pire cas : la nouvelle session rejoue les numéros
+        wire(node, gateway, results)
+        wire(gateway, node, delivered)
+        return node
+
+    def wire(block, peer, app):
+        def pub(port, msg):
+            if str(port) == "phy_out":
+                scheduler.schedule(0.001, peer.handle_phy_in, msg)
+            elif str(port) == "app_out":
+                app.append(msg)
+        block.message_port_pub = pub
+
+    node = boot()
+    for i in range(ACK_BITMAP_BITS + 8):
+        node.handle_msg_in(pmt.cons(pmt.PMT_NIL, pmt.to_pmt(f"a{i}")))
+    scheduler.run(until=scheduler.now() + 5.0)
+    assert len(delivered) == ACK_BITMAP_BITS + 8
+
+    node.stop()
+    node = boot()
+    node.handle_msg_in(pmt.cons(pmt.PMT_NIL, pmt.to_pmt("b0")))
+    scheduler.run(until=scheduler.now() + 5.0)
+    assert len(delivered) == ACK_BITMAP_BITS + 9
+    assert gateway.dedup.restarts == 1
@@ -0,0 +1,55 @@
+from EventScheduler import EventScheduler
+
+
+def test_events_run_in_time_then_fifo_order():
+    scheduler = EventScheduler()
+    order = []
+    scheduler.schedule(2.0, order.append, "late")
+    scheduler.schedule(1.0, order.append, "first")
+    scheduler.schedule(1.0, order.append, "second")
+    scheduler.schedule(-1.0, order.append, "now")
+    assert scheduler.run() == 4
+    assert order == ["now", "first", "second", "late"]
+    assert scheduler.now() == 2.0
+
+
+def test_cancel_is_lazy():
+    scheduler = EventScheduler()
+    order = []
+    event = scheduler.schedule(1.0, order.append, "cancelled")
+    scheduler.schedule(2.0, order.append, "kept")
+    scheduler.cancel(event)
+    scheduler.cancel(None)
+    assert scheduler.pending() == 2
+    assert scheduler.step()
+    assert order == ["kept"]
+    assert not scheduler.step()
+
+
+def test_run_until_advances_clock():
+    scheduler = EventScheduler(start_time=10.0)
+    order = []
+    scheduler.schedule(1.0, order.append, 1)
+    scheduler.schedule(5.0, order.append, 5)
+    scheduler.run(until=12.0)
+    assert order == [1]
+    assert scheduler.now() == 12.0
+    # schedule_at dans le passé : exécuté tout de suite, sans reculer l'horloge
+    scheduler.schedule_at(0.0, order.append, 0)
+    scheduler.run(max_events=1)
+    assert order == [1, 0] and scheduler.now() == 12.0
+
+
+def test_callbacks_can_reschedule():
+    scheduler = EventScheduler()
+    ticks = []
+
+    def tick():
+        ticks.append(scheduler.now())
+        if len(ticks) < 3:
+            scheduler.schedule(0.5, tick)
+
+    scheduler.schedule(0.5, tick)
+    scheduler.run()
+    assert ticks == [0.5, 1.0, 1.5]
+    assert scheduler.events_processed == 3
@@ -0,0 +1,121 @@
+import pytest
+
+from FrameCodec import (
+    ACK_BITMAP_BITS, ACK_PAYLOAD, BROADCAST_MAC, FLAG_AGGREGATE, FLAG_ARQ, FLAG_ARQ_ACK, FLAG_BLOCK_ACK,
+    HEADER_SIZE, SEQ_MODULO, arq_acked, build_frame, build_frame_array, decode_batch, encode_batch,
+    find_block_ack, is_arq_ack, is_block_ack, pack_aggregate, pack_arq, pack_arq_ack, pack_block_ack,
+    pack_selective_ack, parse_frame, parse_frame_flags, rx_masks, selective_ack_state, seq_diff,
+    unpack_aggregate, unpack_arq, unpack_arq_ack, view_slots,
+)
+
+
+def test_frame_roundtrip_with_flags():
+    frame = build_frame(1, BROADCAST_MAC, 3, b"hello", FLAG_ARQ | FLAG_AGGREGATE)
+    assert len(frame) == HEADER_SIZE + 5
+    src, dst, priority, flags, payload = parse_frame_flags(frame)
+    assert (src, dst, priority, flags) == (1, BROADCAST_MAC, 3, FLAG_ARQ | FLAG_AGGREGATE)
+    assert bytes(payload) == b"hello"
+    # parse_frame ne rend que la priorité
+    assert parse_frame(frame)[2] == 3
+
+
+def test_frame_array_matches_bytes():
+    assert build_frame_array(7, 8, 1, b"xyz", FLAG_ARQ).tobytes() == build_frame(7, 8, 1, b"xyz", FLAG_ARQ)
+
+
+def test_priority_does_not_leak_into_flags():
+    _, _, priority, flags, _ = parse_frame_flags(build_frame(1, 2, 0x1F, b""))
+    assert (priority, flags) == (0x0F, 0)
+
+
+def test_batch_roundtrip():
+    frames = [(1, 2, 0, b"a"), (3, 4, 1, b"bcd"), (5, 6, 0, b"")]
+    for slot_size in (None, 32):
+        decoded = decode_batch(encode_batch(frames, slot_size), slot_size)
+        assert [(s, d, p, bytes(x)) for s, d, p, x in decoded] == frames
+    with pytest.raises(ValueError):
+        encode_batch([(1, 2, 0, b"x" * 32)], slot_size=32)
+
+
+def test_rx_masks():
+    frames = [(9, 1, 0, b"data"), (9, 1, 0, ACK_PAYLOAD), (9, 2, 0, ACK_PAYLOAD), (9, BROADCAST_MAC, 0, b"bc")]
+    slots = view_slots(encode_batch(frames, 32), 32)
+    data_mask, ack_mask = rx_masks(slots, 1)
+    assert data_mask.tolist() == [True, False, False, True]
+    assert ack_mask.tolist() == [False, True, False, False]
+
+
+def test_rx_masks_flagged_ack_payload_is_data():
+    buf = build_frame(9, 1, 0, ACK_PAYLOAD, FLAG_ARQ).ljust(32, b"\0")
+    data_mask, ack_mask = rx_masks(view_slots(buf, 32), 1)
+    assert data_mask.tolist() == [True] and ack_mask.tolist() == [False]
+
+
+def test_aggregate_roundtrip():
+    records = [b"\xa9hello", b"world", b""]
+    assert [bytes(r) for r in unpack_aggregate(pack_aggregate(records))] == records
+
+
+@pytest.mark.parametrize("bad", [b"", b"\x02\x00\x01a", b"\x01\x00\x05ab", b"\x01\x00\x01ab"])
+def test_aggregate_rejects_inconsistent_lengths(bad):
+    with pytest.raises(ValueError):
+        unpack_aggregate(bad)
+
+
+def test_arq_roundtrip():
+    seq, data = unpack_arq(pack_arq(SEQ_MODULO + 5, b"payload"))
+    assert seq == 5 and bytes(data) == b"payload"
+    with pytest.raises(ValueError):
+        unpack_arq(b"\x01")
+    ack = pack_arq_ack(10, 0b101)
+    assert is_arq_ack(FLAG_ARQ_ACK, ack)
+    assert not is_arq_ack(0, ack)
+    assert unpack_arq_ack(ack) == (10, 0b101)
+
+
+def test_seq_diff_wraps():
+    assert seq_diff(2, SEQ_MODULO - 3) == 5
+    assert seq_diff(SEQ_MODULO - 3, 2) == -5
+    assert seq_diff(7, 7) == 0
+
+
+def test_arq_bitmap_window():
+    # Cumulatif 100 : tout ce qui précède est acquitté, puis bits 0 et 2
+    cumulative, bitmap = 100, 0b101
+    assert arq_acked(99, cumulative, bitmap)
+    assert arq_acked(100, cumulative, bitmap)
+    assert not arq_acked(101, cumulative, bitmap)
+    assert arq_acked(102, cumulative, bitmap)
+    assert not arq_acked(100 + ACK_BITMAP_BITS, cumulative, 0xFFFFFFFF)
+
+
+def test_arq_bitmap_window_across_wrap():
+    cumulative = SEQ_MODULO - 2
+    assert arq_acked(SEQ_MODULO - 3, cumulative, 0)
+    assert arq_acked(1, cumulative, 1 << 3)
+    assert not arq_acked(2, cumulative, 1 << 3)
+
+
+def test_selective_ack_covers_only_its_seq():
+    for seq in (0, 40, SEQ_MODULO - 1):
+        state = selective_ack_state(seq)
+        assert arq_acked(seq, *state)
+        assert not arq_acked((seq + 1) % SEQ_MODULO, *state)
+        assert not arq_acked((seq - 1) % SEQ_MODULO, *state)
+    assert unpack_arq_ack(pack_selective_ack(40)) == selective_ack_state(40)
+
+
+def test_block_ack_roundtrip():
+    payload = pack_block_ack([(1, 10, 0b1), (BROADCAST_MAC - 1, 20, 1 << 31)])
+    assert is_block_ack(FLAG_BLOCK_ACK, payload)
+    assert not is_block_ack(0, payload)
+    assert not is_block_ack(FLAG_BLOCK_ACK, payload[:-1])
+    assert find_block_ack(payload, 1) == (10, 0b1)
+    assert find_block_ack(payload, BROADCAST_MAC - 1) == (20, 1 << 31)
+    assert find_block_ack(payload, 3) is None
+
+
+def test_block_ack_empty_and_too_large():
+    assert is_block_ack(FLAG_BLOCK_ACK, pack_block_ack([]))
+    with pytest.raises(ValueError):
+        pack_block_ack([(i, 0, 0) for i in range(256)])
@@ -0,0 +1,55 @@
+import random
+
+from MacMetrics import LatencyHistogram, MacMetrics
+
+
+def test_empty():
+    hist = LatencyHistogram()
+    assert hist.percentile(50) is None
+    assert hist.summary()["mean"] is None
+
+
+def test_small_values_are_exact():
+    hist = LatencyHistogram()
+    for us in range(1, 11):
+        hist.record(us * 1e-6)
+    # Sous 2^precision µs, un bucket par valeur : milieu du bucket à 0,5 µs près
+    assert abs(hist.percentile(50) - 5.5e-6) < 1e-9
+    assert hist.percentile(100) == hist.max
+
+
+def test_relative_error_is_bounded():
+    rng = random.Random(1)
+    values = sorted(rng.lognormvariate(-4, 1.5) for _ in range(5000))
+    hist = LatencyHistogram(precision=6)
+    for v in values:
+        hist.record(v)
+    for q in (10, 50, 90, 99):
+        exact = values[max(1, int(round(q / 100 * len(values)))) - 1]
+        assert abs(hist.percentile(q) - exact) <= exact * 2 ** -5
+    summary = hist.summary()
+    assert summary["count"] == 5000
+    assert summary["min"] == values[0] and summary["max"] == values[-1]
+
+
+def test_values_beyond_max_are_clamped():
+    hist = LatencyHistogram(max_value_us=1000)
+    hist.record(10.0)
+    hist.record(-1.0)
+    assert hist.count == 2
+    # Percentile saturé au dernier bucket ; max garde la valeur exacte
+    assert hist.percentile(100) <= 1000e-6 * (1 + 2 ** -5)
+    assert hist.max == 10.0 and hist.min == -1.0
+
+
+def test_metrics_count_each_record():
+    clock = [0.0]
+    metrics = MacMetrics(lambda: clock[0])
+    records = [metrics.new_packet(10) for _ in range(3)]
+    metrics.on_tx(records)
+    clock[0] = 0.2
+    metrics.on_ack(records[:2])
+    metrics.on_fail(records[2:])
+    snapshot = metrics.snapshot()
+    assert snapshot["delivered"] == 2 and snapshot["failed"] == 1
+    assert abs(metrics.latency.percentile(50) - 0.2) < 0.2 * 2 ** -5
@@ -0,0 +1,52 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+from RingBuffer import RingBuffer
+from FrameCodec import SYNC_WORD, build_frame
+
+
+def test_skip_negative_is_noop():
+    ring = RingBuffer(16)
+    ring.write(b"\x01\x02")
+    ring.skip(-3)
+    assert len(ring) == 2
+    assert ring.read_idx == 0
+    assert ring.peek(2).tobytes() == b"\x01\x02"
+
+
+def test_skip_clamped_to_count():
+    ring = RingBuffer(16)
+    ring.write(b"\x01\x02\x03")
+    ring.skip(10)
+    assert len(ring) == 0
+
+
+def test_deframer_small_chunks():
+    # Régression : moins de sync_len-1 octets en attente, sans mot de synchro
+    pytest.importorskip("gnuradio")
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Archive"))
+    from Ichar_to_PMT import ichar_deframer
+
+    frames = [build_frame(1, 2, 0, bytes([i]) * (i + 1)) for i in range(5)]
+    stream = b"\x00" + b"".join(b"\x55" + SYNC_WORD + f for f in frames) + b"\x00"
+    stream = np.frombuffer(stream, dtype=np.int8)
+
+    block = ichar_deframer(capacity=256)
+    published = []
+    block.message_port_pub = lambda port, msg: published.append(msg)
+    offset = 0
+    for i in range(len(stream)):
+        n = 1 + i % 2
+        if offset >= len(stream):
+            break
+        chunk = stream[offset:offset + n]
+        block.work([chunk], [])
+        offset += n
+        # Jamais plus d'octets en attente que d'octets reçus
+        assert len(block.ring) <= offset
+
+    assert block.frames_out == len(frames)
+    assert [bytes(np.asarray(m[1], dtype=np.uint8)) for m in published] == frames
+    assert len(block.ring) <= len(SYNC_WORD) - 1
@@ -0,0 +1,52 @@
+import random
+
+from EventScheduler import EventScheduler
+from SimMac import aloha_mac_block
+
+
+def make_node(**kwargs):
+    scheduler = EventScheduler()
+    node = aloha_mac_block(mac_addr=1, dst_mac=2, scheduler=scheduler, verbose=False, rng=random.Random(1), **kwargs)
+    out = []
+    node.simulator_callback = lambda name, port, msg: out.append((port, msg))
+    return scheduler, node, out
+
+
+def test_plain_ack_must_match_current_seq():
+    scheduler, node, out = make_node()
+    node.handle_msg_in("a")
+    assert node.state == "WAIT_ACK"
+    # ACK retardé d'une trame précédente : ignoré
+    node.handle_phy_in((2, 1, 1, "ACK", node.tx_seq - 1))
+    assert node.state == "WAIT_ACK"
+    node.handle_phy_in((2, 1, 1, "ACK", node.tx_seq))
+    assert node.state == "IDLE"
+    assert [msg[0] for port, msg in out if port == "app_out"] == ["tx_success"]
+
+
+def test_block_ack_acknowledges_every_source():
+    scheduler = EventScheduler()
+    gateway = aloha_mac_block(name="GW", mac_addr=100, scheduler=scheduler, verbose=False, block_ack_delay=0.5)
+    nodes = [aloha_mac_block(name=f"N{m}", mac_addr=m, dst_mac=100, scheduler=scheduler, verbose=False,
+                             rng=random.Random(m)) for m in (1, 2)]
+    blocks = [gateway] + nodes
+    sent = []
+    results = []
+
+    def deliver(name, port, msg):
+        if port == "phy_out":
+            sent.append(msg[2])
+            for block in blocks:
+                if block.name != name:
+                    scheduler.schedule(0.01, block.handle_phy_in, msg)
+        elif port == "app_out" and name != "GW":
+            results.append(msg[0])
+
+    for block in blocks:
+        block.simulator_callback = deliver
+    for node in nodes:
+        node.handle_msg_in("data")
+    scheduler.run(until=1.0)
+    # Deux trames de données, un seul block-ACK (type 2) pour les deux sources
+    assert sent == [0, 0, 2]
+    assert results == ["tx_success", "tx_success"]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from Tracer import EV_ACK, EV_RX, EV_TX, Tracer, event_counts, load_trace
+
+
+def test_ring_keeps_last_events():
+    tracer = Tracer(capacity=4, clock=lambda: 1.5)
+    for seq in range(6):
+        tracer.record(1, EV_TX, seq)
+    records = tracer.records()
+    assert records["seq"].tolist() == [2, 3, 4, 5]
+    assert np.all(records["time"] == 1.5)
+    assert tracer.lost == 0
+
+
+def test_file_roundtrip(tmp_path):
+    path = str(tmp_path / "trace.bin")
+    tracer = Tracer(path, capacity=8)
+    for seq in range(20):
+        tracer.record(seq % 3, EV_TX if seq % 2 else EV_RX, seq, 0.5, timestamp=seq)
+    tracer.record(1, EV_ACK, 99)
+    tracer.close()
+    trace = load_trace(path)
+    assert len(trace) + tracer.lost == 21
+    assert trace["seq"][:len(trace)].tolist() == sorted(trace["seq"].tolist())
+    assert sum(event_counts(trace).values()) == len(trace)
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a trace at all")
+    with pytest.raises(ValueError):
+        load_trace(str(path))
+
+
+def test_shared_tracer_closed_by_last_user(tmp_path):
+    path = str(tmp_path / "shared.bin")
+    a = Tracer.resolve(path)
+    b = Tracer.resolve(path)
+    assert a is b and a.users == 2
+    a.record(1, EV_TX)
+    a.release()
+    assert b.file is not None
+    b.release()
+    assert b.file is None
+    assert len(load_trace(path)) == 1
+    # Un nouveau traceur est créé pour le même chemin
+    c = Tracer.resolve(path)
+    assert c is not a
+    c.release()
+
+
+def test_instance_not_closed_by_release():
+    tracer = Tracer()
+    assert Tracer.resolve(tracer) is tracer
+    assert Tracer.resolve("") is None
+    tracer.release()
+    tracer.record(1, EV_TX)
+    assert len(tracer.records()) == 1
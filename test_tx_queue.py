@@ -0,0 +1,76 @@
+import pytest
+
+from TxQueue import TxQueue, TAIL_DROP, DROP_OLDEST, DROP_LOW_PRIORITY, POLICIES
+
+
+def test_priority_then_fifo():
+    q = TxQueue(capacity=8)
+    for item, prio in (("a", 0), ("b", 1), ("c", 0), ("d", 1)):
+        assert q.put(item, prio)
+    assert list(q) == ["b", "d", "a", "c"]
+    assert q.peek() == "b"
+    assert [q.get() for _ in range(4)] == ["b", "d", "a", "c"]
+    assert q.empty()
+    with pytest.raises(IndexError):
+        q.get()
+
+
+def test_priority_clamped_to_levels():
+    q = TxQueue(capacity=4)
+    q.put("low", -3)
+    q.put("high", 9)
+    q.put("text", "urgent")
+    assert q.stats()["occupancy_by_level"] == [2, 1]
+
+
+def test_tail_drop_rejects_new_item():
+    q = TxQueue(capacity=2, policy=TAIL_DROP)
+    assert q.put("a") and q.put("b", 1)
+    assert not q.put("c", 1)
+    assert list(q) == ["b", "a"]
+    assert q.dropped_by_level == [0, 1]
+
+
+def test_drop_oldest_across_levels():
+    q = TxQueue(capacity=3, policy=DROP_OLDEST)
+    q.put("a", 1)
+    q.put("b", 0)
+    q.put("c", 1)
+    # Le plus ancien (tous niveaux) est évincé, même s'il est prioritaire
+    assert q.put("d", 0)
+    assert list(q) == ["c", "b", "d"]
+    assert q.dropped_by_level == [0, 1]
+    assert len(q) == 3
+
+
+def test_drop_low_priority():
+    q = TxQueue(capacity=3, policy=DROP_LOW_PRIORITY)
+    q.put("a", 0)
+    q.put("b", 0)
+    q.put("c", 1)
+    # Le plus récent paquet de priorité inférieure laisse sa place
+    assert q.put("d", 1)
+    assert list(q) == ["c", "d", "a"]
+    # Rien de moins prioritaire à évincer : rejet du nouveau paquet basse priorité
+    assert not q.put("e", 0)
+    assert q.dropped == 2
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_zero_capacity_rejects_everything(policy):
+    q = TxQueue(capacity=0, policy=policy)
+    assert not q.put("a", 1)
+    assert q.empty()
+    assert q.dropped == 1
+
+
+def test_unbounded():
+    q = TxQueue(capacity=None)
+    for i in range(1000):
+        assert q.put(i)
+    assert q.stats()["max_occupancy"] == 1000
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        TxQueue(policy="random_drop")